@@ -0,0 +1,31 @@
+"""
+Async version of the user directory (see social_media_api.async_views).
+"""
+from asgiref.sync import sync_to_async
+
+from social_media_api.async_views import AsyncReadView
+
+from .graph import graph
+from .serializers import UserListSerializer
+from .views import CustomUser, DirectoryPagination, directory_fields, directory_queryset, wants_following
+
+
+class AsyncUsersListView(AsyncReadView):
+    """
+    GET /async/users/  (Token auth)
+    Same filters (?q=, ?fields=) and cursor body as GET /users/
+    Returns: {next, previous, results}
+    """
+
+    async def get(self, request):
+        params = self.params.query_params
+        fields = directory_fields(params.get("fields"))
+        qs = directory_queryset(CustomUser.objects.all(), params.get("q", "").strip(), fields)
+        context = {"request": self.params, "fields": fields}
+        if wants_following(fields):
+            context["following_ids"] = await sync_to_async(graph.following_ids)(request.user.pk)
+
+        paginator = DirectoryPagination()
+        page = await paginator.apaginate_queryset(qs, self.params)
+        data = UserListSerializer(page, many=True, context=context).data
+        return self.respond(paginator.get_paginated_data(data))
@@ -0,0 +1,177 @@
+"""
+Token authentication without a database hit on the hot path.
+
+DRF's TokenAuthentication runs `SELECT ... FROM authtoken_token JOIN
+accounts_user` on every request. CachedTokenAuthentication keeps the
+token -> user lookup in two tiers:
+
+  - in-process LRU, kept for LOCAL_TTL seconds
+  - the Django cache ("default"), shared by all workers, kept for SHARED_TTL
+    (set SHARED to False to disable)
+
+Shared-cache keys are a SHA-256 of the token, never the token itself.
+Both tiers hold a snapshot of the token and of the user fields auth needs
+(SNAPSHOT_FIELDS), never the password hash. Users built from it load any
+other field lazily, so views that render profile fields re-read the row.
+
+Deleting a Token or saving its User drops the cached entries (see
+accounts.signals). Other processes may still serve their local copy for at
+most LOCAL_TTL seconds, so keep it short: it bounds how long a revoked
+token or a deactivated user keeps working elsewhere.
+
+Async views call CachedTokenAuthentication().aauthenticate(request): a local
+hit is answered on the event loop, anything else runs the sync path in a
+worker thread.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from asgiref.sync import sync_to_async
+from rest_framework.authentication import TokenAuthentication, get_authorization_header
+
+DEFAULTS = {
+    "LOCAL_TTL": 5,
+    "LOCAL_MAX_ENTRIES": 10_000,
+    "SHARED": True,
+    "SHARED_TTL": 300,
+}
+
+
+SNAPSHOT_FIELDS = ("id", "username", "is_active", "is_staff", "is_superuser")
+
+
+def _conf(name):
+    return getattr(settings, "TOKEN_AUTH_CACHE", {}).get(name, DEFAULTS[name])
+
+
+def _snapshot(token):
+    return (token.key, token.created, {f: getattr(token.user, f) for f in SNAPSHOT_FIELDS})
+
+
+def _restore(snapshot):
+    """Fresh Token and User instances (callers may mutate request.user)."""
+    from rest_framework.authtoken.models import Token
+
+    key, created, fields = snapshot
+    User = get_user_model()
+    # from_db() takes values in concrete-field order
+    names = [f.attname for f in User._meta.concrete_fields if f.attname in fields]
+    user = User.from_db(DEFAULT_DB_ALIAS, names, [fields[name] for name in names])
+    token = Token.from_db(DEFAULT_DB_ALIAS, ("key", "user_id", "created"), (key, user.pk, created))
+    token.user = user
+    return token
+
+
+class TokenUserCache:
+    def __init__(self):
+        self._local = OrderedDict()  # token key -> (expires_at, snapshot)
+        self._lock = threading.Lock()
+        self._stats = {"local_hits": 0, "shared_hits": 0, "misses": 0, "invalidations": 0}
+
+    @staticmethod
+    def _shared_key(key):
+        return "auth-token:" + hashlib.sha256(key.encode()).hexdigest()
+
+    def get(self, key, load):
+        """Token (with .user) for `key`; `load(key)` fetches (user, token) from the DB on a miss."""
+        now = time.monotonic()
+        with self._lock:
+            hit = self._local.get(key)
+            if hit is not None and hit[0] > now:
+                self._local.move_to_end(key)
+                self._stats["local_hits"] += 1
+                return _restore(hit[1])
+
+        snapshot = cache.get(self._shared_key(key)) if _conf("SHARED") else None
+        if snapshot is not None:
+            self._stats["shared_hits"] += 1
+        else:
+            self._stats["misses"] += 1
+            _, token = load(key)
+            snapshot = _snapshot(token)
+            if _conf("SHARED"):
+                cache.set(self._shared_key(key), snapshot, _conf("SHARED_TTL"))
+
+        with self._lock:
+            self._local[key] = (now + _conf("LOCAL_TTL"), snapshot)
+            self._local.move_to_end(key)
+            while len(self._local) > _conf("LOCAL_MAX_ENTRIES"):
+                self._local.popitem(last=False)
+        return _restore(snapshot)
+
+    def peek(self, key):
+        """Token for `key` from the in-process tier only, or None. Never blocks on I/O."""
+        with self._lock:
+            hit = self._local.get(key)
+            if hit is None or hit[0] <= time.monotonic():
+                return None
+            self._local.move_to_end(key)
+            self._stats["local_hits"] += 1
+        return _restore(hit[1])
+
+    def invalidate(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._local.pop(key, None)
+        if _conf("SHARED"):
+            cache.delete_many([self._shared_key(k) for k in keys])
+        self._stats["invalidations"] += 1
+
+    def invalidate_user(self, user_id):
+        from rest_framework.authtoken.models import Token
+
+        keys = list(Token.objects.filter(user_id=user_id).values_list("key", flat=True))
+        if keys:
+            self.invalidate(*keys)
+
+    def clear_local(self):
+        with self._lock:
+            self._local.clear()
+
+    def stats(self):
+        s = dict(self._stats)
+        lookups = s["local_hits"] + s["shared_hits"] + s["misses"]
+        s["hit_rate"] = round((s["local_hits"] + s["shared_hits"]) / lookups, 4) if lookups else None
+        with self._lock:
+            s["local_entries"] = len(self._local)
+        return s
+
+
+token_cache = TokenUserCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Drop-in replacement for TokenAuthentication backed by `token_cache`."""
+
+    def _load(self, key):
+        return super().authenticate_credentials(key)
+
+    def authenticate_credentials(self, key):
+        token = token_cache.get(key, self._load)
+        if not token.user.is_active:
+            token_cache.invalidate(key)
+            raise exceptions.AuthenticationFailed(_("User inactive or deleted."))
+        return (token.user, token)
+
+    async def aauthenticate(self, request):
+        """authenticate() for async views; takes a plain HttpRequest."""
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) == 2:
+            try:
+                token = token_cache.peek(auth[1].decode())
+            except UnicodeError:
+                token = None
+            if token is not None and token.user.is_active:
+                return (token.user, token)
+        # malformed headers, misses and inactive users: same errors as the sync path
+        return await sync_to_async(self.authenticate)(request)
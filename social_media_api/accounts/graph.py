@@ -0,0 +1,148 @@
+"""
+Per-user follow-graph cache.
+
+Two tiers:
+  - in-process LRU of frozensets, kept for LOCAL_TTL seconds
+  - the Django cache ("default"), shared by all workers, kept for SHARED_TTL
+
+Writes go through accounts.utils.follow/unfollow, which send
+accounts.signals.follow_changed; edges changed through the relation manager
+instead (admin, shell: user.following.add/remove/clear) send m2m_changed.
+Both receivers drop the users' entries from this process and from the shared
+tier. Other processes may serve their local copy for at most LOCAL_TTL
+seconds after a change.
+
+Sets larger than MAX_SET_SIZE (e.g. followers of very popular accounts) are
+never cached: only an "oversized" marker is, so the next lookup skips the
+size probe. Membership checks on them (is_following, following_among) query
+just the candidate ids; following_ids/follower_ids read the whole set.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+DEFAULTS = {
+    "LOCAL_TTL": 5,
+    "LOCAL_MAX_ENTRIES": 10_000,
+    "SHARED_TTL": 3600,
+    "MAX_SET_SIZE": 5_000,
+}
+
+FOLLOWING = "following"
+FOLLOWERS = "followers"
+OVERSIZED = "oversized"  # cached in place of a set above MAX_SET_SIZE
+_COLUMNS = {
+    # kind -> (filter column, value column) on the User.following through table
+    FOLLOWING: ("from_user_id", "to_user_id"),
+    FOLLOWERS: ("to_user_id", "from_user_id"),
+}
+
+
+def _conf(name):
+    return getattr(settings, "FOLLOW_GRAPH_CACHE", {}).get(name, DEFAULTS[name])
+
+
+class FollowGraphCache:
+    def __init__(self):
+        self._local = OrderedDict()  # (kind, user_id) -> (expires_at, frozenset)
+        self._lock = threading.Lock()
+        self._stats = {"local_hits": 0, "shared_hits": 0, "misses": 0, "invalidations": 0, "uncacheable": 0}
+
+    @staticmethod
+    def _shared_key(kind, user_id):
+        return f"follow-graph:{kind}:{user_id}"
+
+    @staticmethod
+    def _edges(kind, user_id):
+        """values_list of the other end of `user_id`'s edges of `kind`."""
+        filter_col, value_col = _COLUMNS[kind]
+        Follow = get_user_model().following.through
+        return Follow.objects.filter(**{filter_col: user_id}).values_list(value_col, flat=True)
+
+    def _load(self, kind, user_id):
+        limit = _conf("MAX_SET_SIZE")
+        ids = list(self._edges(kind, user_id)[: limit + 1])
+        if len(ids) > limit:
+            self._stats["uncacheable"] += 1
+            return OVERSIZED
+        return frozenset(ids)
+
+    def _get(self, kind, user_id):
+        """The cached id set, or OVERSIZED."""
+        key = (kind, user_id)
+        now = time.monotonic()
+        with self._lock:
+            hit = self._local.get(key)
+            if hit is not None and hit[0] > now:
+                self._local.move_to_end(key)
+                self._stats["local_hits"] += 1
+                return hit[1]
+
+        ids = cache.get(self._shared_key(kind, user_id))
+        if ids is not None:
+            self._stats["shared_hits"] += 1
+            ids = OVERSIZED if ids == OVERSIZED else frozenset(ids)
+        else:
+            self._stats["misses"] += 1
+            ids = self._load(kind, user_id)
+            cache.set(self._shared_key(kind, user_id), ids, _conf("SHARED_TTL"))
+
+        with self._lock:
+            self._local[key] = (now + _conf("LOCAL_TTL"), ids)
+            self._local.move_to_end(key)
+            while len(self._local) > _conf("LOCAL_MAX_ENTRIES"):
+                self._local.popitem(last=False)
+        return ids
+
+    # --- public API ------------------------------------------------------
+
+    def _ids(self, kind, user_id):
+        ids = self._get(kind, user_id)
+        if ids == OVERSIZED:
+            return frozenset(self._edges(kind, user_id))
+        return ids
+
+    def following_ids(self, user_id):
+        """Ids `user_id` follows."""
+        return self._ids(FOLLOWING, user_id)
+
+    def follower_ids(self, user_id):
+        """Ids following `user_id`."""
+        return self._ids(FOLLOWERS, user_id)
+
+    def is_following(self, follower_id, followee_id):
+        return bool(self.following_among(follower_id, [followee_id]))
+
+    def following_among(self, user_id, candidate_ids):
+        """Subset of `candidate_ids` that `user_id` follows (for list serializers)."""
+        ids = self._get(FOLLOWING, user_id)
+        if ids == OVERSIZED:
+            return set(self._edges(FOLLOWING, user_id).filter(to_user_id__in=list(candidate_ids)))
+        return ids.intersection(candidate_ids)
+
+    def invalidate(self, *user_ids):
+        keys = [(kind, uid) for uid in user_ids for kind in (FOLLOWING, FOLLOWERS)]
+        with self._lock:
+            for key in keys:
+                self._local.pop(key, None)
+        cache.delete_many([self._shared_key(kind, uid) for kind, uid in keys])
+        self._stats["invalidations"] += 1
+
+    def clear_local(self):
+        with self._lock:
+            self._local.clear()
+
+    def stats(self):
+        s = dict(self._stats)
+        lookups = s["local_hits"] + s["shared_hits"] + s["misses"]
+        s["hit_rate"] = round((s["local_hits"] + s["shared_hits"]) / lookups, 4) if lookups else None
+        with self._lock:
+            s["local_entries"] = len(self._local)
+        return s
+
+
+graph = FollowGraphCache()
@@ -0,0 +1,41 @@
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.export import CHUNK_SIZE, FORMATS, stream_export
+
+
+class Command(BaseCommand):
+    help = "Stream one user's posts, comments, likes, follows and notifications as NDJSON or a zip archive."
+
+    def add_arguments(self, parser):
+        parser.add_argument("user", help="Username or numeric id.")
+        parser.add_argument("--as", dest="fmt", choices=FORMATS, default="ndjson")
+        parser.add_argument("-o", "--output", help="File to write (default: stdout).")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Rows fetched per query round-trip.")
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        key = options["user"]
+        lookup = {"pk": int(key)} if key.isdigit() else {"username": key}
+        try:
+            user = User.objects.get(**lookup)
+        except User.DoesNotExist:
+            raise CommandError(f"No user {key!r}.")
+
+        chunks = stream_export(user, options["fmt"], chunk_size=options["chunk_size"])
+        written = 0
+        if options["output"]:
+            with open(options["output"], "wb") as fh:
+                for chunk in chunks:
+                    fh.write(chunk)
+                    written += len(chunk)
+            self.stdout.write(self.style.SUCCESS(
+                f"Exported {user.username} to {options['output']} ({written} bytes)."
+            ))
+        else:
+            out = getattr(self.stdout, "buffer", None) or sys.stdout.buffer
+            for chunk in chunks:
+                out.write(chunk)
+            out.flush()
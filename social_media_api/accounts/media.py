@@ -0,0 +1,163 @@
+"""
+Profile image pipeline.
+
+Uploading `User.profile_image` (RegisterSerializer, ProfileView) only stores
+the original; decoding and resizing happen off the request thread:
+
+  schedule_thumbnails(user)  after the transaction commits, submit the job
+                             to a small ThreadPoolExecutor
+  generate_thumbnails(...)   open the original from storage, decode it at
+                             reduced scale where the codec allows (JPEG
+                             draft mode), centre-crop to each size in SIZES
+                             and save every format in FORMATS through the
+                             same storage (local FS or S3)
+
+The resulting storage names land in User.profile_thumbnails
+({"64": {"webp": name, "jpeg": name}, ...}), written only if the user still
+has the same original, so a newer upload is never overwritten by an older
+job; thumbnails of the replaced image are deleted by the job too.
+ProfileSerializer turns the names into URLs.
+
+settings.MEDIA_PIPELINE:
+    MODE         "thread" (default) or "sync" (process before returning; tests)
+    MAX_WORKERS  thread pool size
+    SIZES        square thumbnail edge lengths in px
+    FORMATS      output formats, best first ("webp", "jpeg")
+"""
+import io
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "MODE": "thread",
+    "MAX_WORKERS": 2,
+    "SIZES": (64, 256),
+    "FORMATS": ("webp", "jpeg"),
+}
+
+SAVE_OPTIONS = {
+    "webp": {"format": "WEBP", "quality": 80, "method": 4},
+    "jpeg": {"format": "JPEG", "quality": 85, "optimize": True, "progressive": True},
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+_stats = {"submitted": 0, "completed": 0, "failed": 0, "stale": 0, "seconds": 0.0}
+
+
+def _conf(name):
+    return getattr(settings, "MEDIA_PIPELINE", {}).get(name, DEFAULTS[name])
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=_conf("MAX_WORKERS"), thread_name_prefix="media")
+        return _executor
+
+
+def _render(image, size, fmt):
+    thumb = ImageOps.fit(image, (size, size), Image.LANCZOS)
+    if fmt == "jpeg" and thumb.mode != "RGB":
+        thumb = thumb.convert("RGB")
+    buffer = io.BytesIO()
+    thumb.save(buffer, **SAVE_OPTIONS[fmt])
+    return buffer.getvalue()
+
+
+def build_thumbnails(storage, name, owner_id):
+    """Decode `name` once and write every size/format. Returns {size: {fmt: stored name}}."""
+    sizes, formats = _conf("SIZES"), _conf("FORMATS")
+    with storage.open(name, "rb") as fh:
+        image = Image.open(fh)
+        # let the JPEG decoder downscale by up to 8x instead of decoding full resolution
+        image.draft("RGB", (max(sizes) * 2, max(sizes) * 2))
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+        image.load()
+
+    stem = os.path.splitext(os.path.basename(name))[0]
+    result = {}
+    for size in sizes:
+        result[str(size)] = {
+            fmt: storage.save(
+                f"profiles/thumbs/{owner_id}/{stem}-{size}.{fmt}", ContentFile(_render(image, size, fmt))
+            )
+            for fmt in formats
+        }
+    return result
+
+
+def _delete_thumbnails(storage, thumbnails):
+    for variants in (thumbnails or {}).values():
+        for stored in variants.values():
+            try:
+                storage.delete(stored)
+            except Exception:
+                logger.warning("Could not delete thumbnail %s", stored)
+
+
+def generate_thumbnails(user_id, name, replaced=None):
+    """Worker entry point. Returns the stored thumbnails, or None if failed or superseded."""
+    User = get_user_model()
+    storage = User._meta.get_field("profile_image").storage
+    started = time.perf_counter()
+    try:
+        thumbnails = build_thumbnails(storage, name, user_id)
+        updated = User.objects.filter(pk=user_id, profile_image=name).update(profile_thumbnails=thumbnails)
+        _delete_thumbnails(storage, replaced)
+        if updated:
+            _stats["completed"] += 1
+            return thumbnails
+        # the user uploaded something newer (or was deleted) meanwhile
+        _delete_thumbnails(storage, thumbnails)
+        _stats["stale"] += 1
+    except Exception:
+        _stats["failed"] += 1
+        logger.exception("Thumbnail generation failed for user %s (%s)", user_id, name)
+    finally:
+        _stats["seconds"] += time.perf_counter() - started
+        if _conf("MODE") != "sync":
+            close_old_connections()
+
+
+def schedule_thumbnails(user, replaced=None):
+    """Queue thumbnail generation for the user's current profile_image; `replaced` thumbnails are deleted."""
+    if not user.profile_image:
+        return
+    name = user.profile_image.name
+    _stats["submitted"] += 1
+    if _conf("MODE") == "sync":
+        user.profile_thumbnails = generate_thumbnails(user.pk, name, replaced) or {}
+        return
+    transaction.on_commit(lambda: _get_executor().submit(generate_thumbnails, user.pk, name, replaced))
+
+
+def thumbnail_urls(user):
+    """{size: {fmt: url}} for the serializer, or None while processing."""
+    if not user.profile_thumbnails:
+        return None
+    storage = type(user)._meta.get_field("profile_image").storage
+    return {
+        size: {fmt: storage.url(stored) for fmt, stored in variants.items()}
+        for size, variants in user.profile_thumbnails.items()
+    }
+
+
+def stats():
+    s = dict(_stats)
+    s["mode"] = _conf("MODE")
+    return s
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:56
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_counts(apps, schema_editor):
+    User = apps.get_model("accounts", "User")
+    Follow = User.following.through
+
+    def edge_count(column):
+        counts = (
+            Follow.objects.filter(**{column: OuterRef("pk")})
+            .order_by().values(column).annotate(n=Count("id")).values("n")
+        )
+        return Coalesce(Subquery(counts), Value(0))
+
+    User.objects.update(
+        followers_count=edge_count("to_user"), following_count=edge_count("from_user")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_remove_user_followers_user_following'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='following_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_counts, migrations.RunPython.noop),
+    ]
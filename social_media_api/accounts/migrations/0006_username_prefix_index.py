@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_follow_suggestions'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['username'], name='user_username_prefix_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
@@ -7,7 +7,11 @@ class User(AbstractUser):
     Custom user:
     - bio: short text
     - profile_picture: URL to avatar (keeps setup simple; no media config needed)
+    - profile_image / profile_thumbnails: uploaded original and the resized
+      variants generated from it in the background (accounts.media)
     - followers: users who follow this user (non-symmetrical self M2M)
+    - followers_count / following_count: denormalized sizes of the above,
+      maintained by accounts.utils.follow/unfollow
     """
     bio = models.TextField(blank=True)
     profile_picture = models.URLField(blank=True)
@@ -20,6 +24,39 @@ class User(AbstractUser):
         related_name="followers",
         blank=True,
     )
+    # {"<size>": {"webp": storage name, "jpeg": storage name}}, written by accounts.media
+    profile_thumbnails = models.JSONField(default=dict, blank=True, editable=False)
+    followers_count = models.PositiveIntegerField(default=0, editable=False)
+    following_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # "popular accounts" fallback for follow suggestions
+            models.Index(fields=["-followers_count"], name="user_followers_count_idx"),
+            # prefix search in the user directory (LIKE 'abc%'); opclasses only apply on Postgres
+            models.Index(fields=["username"], name="user_username_prefix_idx",
+                         opclasses=["varchar_pattern_ops"]),
+        ]
 
     def __str__(self):
         return self.username
+
+
+class FollowSuggestion(models.Model):
+    """
+    Precomputed "who to follow" row, rebuilt by `compute_suggestions`.
+    rank 0 is the best candidate; (user, rank) is the read index.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="suggestions")
+    candidate = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+")
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+    mutual_count = models.PositiveIntegerField(default=0)  # followed-by-people-you-follow
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ("user", "rank")
+        ordering = ["user", "rank"]
+
+    def __str__(self):
+        return f"{self.candidate_id} for {self.user_id} (#{self.rank})"
@@ -2,6 +2,8 @@ from django.contrib.auth import authenticate, get_user_model
 from rest_framework import serializers
 from rest_framework.authtoken.models import Token
 
+from .media import schedule_thumbnails, thumbnail_urls
+
 User = get_user_model()
 
 class RegisterSerializer(serializers.ModelSerializer):
@@ -17,6 +19,7 @@ class RegisterSerializer(serializers.ModelSerializer):
             password=password, **validated_data
         )
         Token.objects.create(user=user) 
+        schedule_thumbnails(user)
         return user
 
 class LoginSerializer(serializers.Serializer):
@@ -31,13 +34,57 @@ class LoginSerializer(serializers.Serializer):
         return attrs
 
 class ProfileSerializer(serializers.ModelSerializer):
-    followers_count = serializers.IntegerField(source="followers.count", read_only=True)
-    following_count = serializers.IntegerField(source="following.count", read_only=True)
+    # followers_count / following_count are denormalized columns on User
+    # profile_thumbnails: {size: {format: url}}, null until accounts.media has processed the upload
+    profile_thumbnails = serializers.SerializerMethodField()
 
     class Meta:
         model = User
         fields = (
             "id", "username", "email", "bio", "profile_picture", "profile_image",
-            "followers_count", "following_count"
+            "profile_thumbnails", "followers_count", "following_count"
         )
-        read_only_fields = ("username", "email")
\ No newline at end of file
+        read_only_fields = ("username", "email", "followers_count", "following_count")
+
+    def get_profile_thumbnails(self, obj):
+        return thumbnail_urls(obj)
+
+    def update(self, instance, validated_data):
+        replaced = None
+        if "profile_image" in validated_data:
+            replaced, instance.profile_thumbnails = instance.profile_thumbnails, {}
+        user = super().update(instance, validated_data)
+        if replaced is not None:
+            schedule_thumbnails(user, replaced=replaced)
+        return user
+
+
+class UserListSerializer(ProfileSerializer):
+    """
+    ProfileSerializer plus `is_following`, answered from the follow-graph cache.
+    Pass context["fields"] (e.g. from `?fields=id,username`) to render a subset.
+    """
+    is_following = serializers.SerializerMethodField()
+
+    class Meta(ProfileSerializer.Meta):
+        fields = ProfileSerializer.Meta.fields + ("is_following",)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        wanted = self.context.get("fields")
+        if wanted:
+            for name in set(self.fields) - set(wanted):
+                self.fields.pop(name)
+
+    def get_is_following(self, obj):
+        following = self.context.get("following_ids")
+        return None if following is None else obj.pk in following
+
+
+class SuggestionSerializer(serializers.Serializer):
+    id = serializers.IntegerField(source="user.id")
+    username = serializers.CharField(source="user.username")
+    profile_picture = serializers.CharField(source="user.profile_picture")
+    followers_count = serializers.IntegerField(source="user.followers_count")
+    mutual_count = serializers.IntegerField()
+    score = serializers.FloatField()
@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import Signal, receiver
+from rest_framework.authtoken.models import Token
+
+# Sent by accounts.utils.follow/unfollow after the edge is written or removed.
+# kwargs: follower_id, followee_id, created (True for follow, False for unfollow)
+follow_changed = Signal()
+
+
+@receiver(follow_changed)
+def invalidate_follow_graph(sender, follower_id, followee_id, **kwargs):
+    from .graph import graph
+
+    graph.invalidate(follower_id, followee_id)
+
+
+@receiver(m2m_changed, sender=get_user_model().following.through)
+def invalidate_follow_graph_on_m2m(sender, instance, action, reverse, pk_set, **kwargs):
+    # edges changed through the relation manager (admin, shell) bypass follow_changed
+    from .graph import graph
+
+    if action == "pre_clear":
+        related = instance.followers if reverse else instance.following
+        instance._cleared_follow_ids = list(related.values_list("pk", flat=True))
+    elif action == "post_clear":
+        graph.invalidate(instance.pk, *instance.__dict__.pop("_cleared_follow_ids", ()))
+    elif action in ("post_add", "post_remove"):
+        graph.invalidate(instance.pk, *pk_set)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_cached_token(sender, instance, **kwargs):
+    from .authentication import token_cache
+
+    token_cache.invalidate(instance.key)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_user(sender, instance, created, **kwargs):
+    # covers deactivation and any profile edit; cached requests must not see the old row
+    if created:
+        return
+    from .authentication import token_cache
+
+    token_cache.invalidate_user(instance.pk)
@@ -1,3 +1,408 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APITestCase
 
-# Create your tests here.
+from .authentication import token_cache
+from .graph import graph
+from .suggestions import FollowGraph, compute_suggestions
+from .utils import follow
+
+User = get_user_model()
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class FollowCounterTests(APITestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username="alice", password="pass1234")
+        self.bob = User.objects.create_user(username="bob", password="pass1234")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.alice)
+
+    def counts(self):
+        self.alice.refresh_from_db()
+        self.bob.refresh_from_db()
+        return self.alice.following_count, self.bob.followers_count
+
+    def test_follow_and_unfollow_update_both_sides_once(self):
+        self.client.post(f"/follow/{self.bob.id}/")
+        self.client.post(f"/follow/{self.bob.id}/")
+        self.assertEqual(self.counts(), (1, 1))
+
+        self.client.post(f"/unfollow/{self.bob.id}/")
+        self.client.post(f"/unfollow/{self.bob.id}/")
+        self.assertEqual(self.counts(), (0, 0))
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class FollowGraphCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        graph.clear_local()
+        self.users = [User.objects.create_user(username=f"u{i}", password="pass1234") for i in range(4)]
+        self.me = self.users[0]
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.me)
+
+    def test_membership_served_from_cache(self):
+        follow(self.me, self.users[1])
+        self.assertTrue(graph.is_following(self.me.pk, self.users[1].pk))
+        with self.assertNumQueries(0):
+            self.assertFalse(graph.is_following(self.me.pk, self.users[2].pk))
+            ids = [u.pk for u in self.users]
+            self.assertEqual(graph.following_among(self.me.pk, ids), {self.users[1].pk})
+
+        graph.clear_local()  # another worker: shared tier still answers
+        with self.assertNumQueries(0):
+            self.assertEqual(graph.following_ids(self.me.pk), {self.users[1].pk})
+        self.assertGreater(graph.stats()["shared_hits"], 0)
+
+    def test_follow_and_unfollow_views_invalidate(self):
+        self.assertFalse(graph.is_following(self.me.pk, self.users[2].pk))
+        self.client.post(f"/follow/{self.users[2].id}/")
+        self.assertTrue(graph.is_following(self.me.pk, self.users[2].pk))
+        self.assertIn(self.me.pk, graph.follower_ids(self.users[2].pk))
+        self.client.post(f"/unfollow/{self.users[2].id}/")
+        self.assertFalse(graph.is_following(self.me.pk, self.users[2].pk))
+
+    def test_relation_manager_changes_invalidate(self):
+        me, other = self.me, self.users[1]
+        self.assertFalse(graph.is_following(me.pk, other.pk))
+        me.following.add(other)  # e.g. the admin, bypassing accounts.utils.follow
+        self.assertTrue(graph.is_following(me.pk, other.pk))
+        other.followers.remove(me)
+        self.assertFalse(graph.is_following(me.pk, other.pk))
+
+        me.following.add(*self.users[2:])
+        self.assertIn(me.pk, graph.follower_ids(self.users[2].pk))
+        me.following.clear()
+        self.assertEqual(graph.following_ids(me.pk), frozenset())
+        self.assertNotIn(me.pk, graph.follower_ids(self.users[2].pk))
+
+    @override_settings(FOLLOW_GRAPH_CACHE={"MAX_SET_SIZE": 2})
+    def test_oversized_sets_are_not_cached(self):
+        from .graph import FOLLOWERS, OVERSIZED
+
+        for user in self.users[1:]:
+            follow(user, self.me)
+            follow(self.me, user)
+        self.assertEqual(graph.follower_ids(self.me.pk), {u.pk for u in self.users[1:]})
+        self.assertEqual(cache.get(graph._shared_key(FOLLOWERS, self.me.pk)), OVERSIZED)
+        graph.following_ids(self.me.pk)
+        # membership asks for the candidates only, without reloading the set
+        with self.assertNumQueries(1):
+            self.assertTrue(graph.is_following(self.me.pk, self.users[3].pk))
+
+    def test_users_list_marks_followed_users(self):
+        follow(self.me, self.users[3])
+        res = self.client.get("/users/")
+        flags = {u["id"]: u["is_following"] for u in res.data["results"]}
+        self.assertTrue(flags[self.users[3].pk])
+        self.assertFalse(flags[self.users[1].pk])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class SuggestionTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        graph.clear_local()
+        names = ["me", "a", "b", "c", "d"]
+        self.u = {n: User.objects.create_user(username=n, password="pass1234") for n in names}
+        # me -> a, b ; a -> c, d ; b -> c  => c (2 mutual) then d (1)
+        for src, dst in [("me", "a"), ("me", "b"), ("a", "c"), ("a", "d"), ("b", "c")]:
+            follow(self.u[src], self.u[dst])
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.u["me"])
+
+    def test_csr_graph_from_sorted_edges(self):
+        g = FollowGraph.from_edges([(1, 2), (1, 3), (4, 1)])
+        self.assertEqual(list(g.neighbors(1)), [2, 3])
+        self.assertEqual(list(g.neighbors(4)), [1])
+        self.assertEqual(list(g.neighbors(2)), [])
+
+    def test_ranked_by_friends_of_friends_and_served_in_one_read(self):
+        compute_suggestions(top_k=5)
+        graph.following_ids(self.u["me"].pk)  # warm the follow cache
+        with self.assertNumQueries(1):
+            res = self.client.get("/suggestions/")
+        self.assertEqual([r["username"] for r in res.data], ["c", "d"])
+        self.assertEqual(res.data[0]["mutual_count"], 2)
+
+        # following a suggestion hides it before the next batch run
+        self.client.post(f"/follow/{self.u['c'].id}/")
+        res = self.client.get("/suggestions/")
+        self.assertEqual([r["username"] for r in res.data], ["d"])
+
+    def test_new_user_gets_popular_accounts(self):
+        newbie = User.objects.create_user(username="newbie", password="pass1234")
+        self.client.force_authenticate(user=newbie)
+        res = self.client.get("/suggestions/?limit=1")
+        self.assertEqual([r["username"] for r in res.data], ["c"])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class UserDirectoryTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        graph.clear_local()
+        for name in ["alice", "alfred", "bob", "carol", "alina"]:
+            User.objects.create_user(username=name, password="pass1234")
+        self.me = User.objects.get(username="bob")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.me)
+
+    def test_prefix_search_is_paginated_by_username(self):
+        res = self.client.get("/users/?q=al&page_size=2")
+        self.assertEqual([u["username"] for u in res.data["results"]], ["alfred", "alice"])
+        res = self.client.get(res.data["next"])
+        self.assertEqual([u["username"] for u in res.data["results"]], ["alina"])
+        self.assertIsNone(res.data["next"])
+
+    def test_sparse_fieldset_and_constant_queries(self):
+        for i in range(20):
+            User.objects.create_user(username=f"zed{i:02d}", password="pass1234")
+        with self.assertNumQueries(1):
+            res = self.client.get("/users/?fields=id,username&page_size=50")
+        self.assertEqual(set(res.data["results"][0]), {"id", "username"})
+
+        graph.following_ids(self.me.pk)
+        with self.assertNumQueries(1):
+            res = self.client.get("/users/?page_size=50")
+        self.assertIn("followers_count", res.data["results"][0])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class CachedTokenAuthTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        token_cache.clear_local()
+        self.user = User.objects.create_user(username="tok", password="pass1234")
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def token_queries(self, url="/notifications/unread-count/"):
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(url)
+        return res, [q for q in ctx.captured_queries if "authtoken_token" in q["sql"]]
+
+    def test_token_lookup_leaves_the_hot_path(self):
+        res, queries = self.token_queries()
+        self.assertEqual((res.status_code, len(queries)), (200, 1))
+        res, queries = self.token_queries()
+        self.assertEqual((res.status_code, len(queries)), (200, 0))
+        token_cache.clear_local()  # another worker: shared tier still answers
+        res, queries = self.token_queries()
+        self.assertEqual((res.status_code, len(queries)), (200, 0))
+        self.assertGreater(token_cache.stats()["shared_hits"], 0)
+
+    def test_cached_entries_hold_no_password_hash(self):
+        import pickle
+
+        self.client.get("/notifications/unread-count/")
+        stored = cache.get(token_cache._shared_key(self.token.key))
+        self.assertNotIn(self.user.password.encode(), pickle.dumps(stored))
+        token_cache.clear_local()
+        token = token_cache.get(self.token.key, lambda key: self.fail("shared tier must answer"))
+        self.assertEqual((token.user.pk, token.user.username, token.user.is_active), (self.user.pk, "tok", True))
+        self.assertIn("password", token.user.get_deferred_fields())
+
+    def test_deleted_token_and_deactivated_user_are_rejected(self):
+        self.assertEqual(self.client.get("/profile").status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get("/profile").status_code, 401)
+
+        self.user.is_active = True
+        self.user.save()
+        self.assertEqual(self.client.get("/profile").status_code, 200)
+        self.token.delete()
+        self.assertEqual(self.client.get("/profile").status_code, 401)
+
+    def test_profile_shows_current_counts(self):
+        self.client.get("/profile")
+        User.objects.filter(pk=self.user.pk).update(followers_count=3)
+        self.assertEqual(self.client.get("/profile").data["followers_count"], 3)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ExportTests(APITestCase):
+    def setUp(self):
+        from posts.models import Post, Like
+
+        self.me = User.objects.create_user(username="me", password="pass1234")
+        self.friend = User.objects.create_user(username="friend", password="pass1234")
+        follow(self.me, self.friend)
+        follow(self.friend, self.me)
+        post = Post.objects.create(author=self.me, title="Mine", content="x")
+        post.comments.create(author=self.me, content="note to self")
+        Like.objects.create(user=self.me, post=Post.objects.create(author=self.friend, title="Theirs", content="y"))
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.me)
+
+    def test_ndjson_stream_covers_every_section(self):
+        import json
+
+        res = self.client.get("/export/")
+        self.assertTrue(res.streaming)
+        rows = [json.loads(line) for line in b"".join(res.streaming_content).splitlines()]
+        self.assertEqual(
+            [r["type"] for r in rows], ["profile", "post", "comment", "like", "following", "follower"]
+        )
+        self.assertEqual(rows[1]["title"], "Mine")
+        self.assertEqual(rows[4]["to_user__username"], "friend")
+        self.assertEqual(self.client.get("/export/?as=tar").status_code, 400)
+
+    def test_archived_likes_and_notifications_are_exported(self):
+        import json
+        from django.utils import timezone
+        from notifications.models import ArchivedNotification, Notification
+        from posts.models import ArchivedLike, Like
+
+        like = Like.objects.get()
+        ArchivedLike.objects.create(pk=like.pk, post_id=like.post_id, user=self.me, created_at=like.created_at)
+        like.delete()
+        ArchivedNotification.objects.create(
+            pk=1, recipient=self.me, actor=self.friend, verb="followed you", timestamp=timezone.now()
+        )
+        Notification.objects.create(recipient=self.me, actor=self.friend, verb="liked your post")
+
+        rows = [json.loads(line) for line in b"".join(self.client.get("/export/").streaming_content).splitlines()]
+        likes = [r for r in rows if r["type"] == "like"]
+        self.assertEqual([r["post_id"] for r in likes], [like.post_id])
+        notifications = [r for r in rows if r["type"] == "notification"]
+        self.assertEqual([(n["verb"], n["unread"]) for n in notifications],
+                         [("liked your post", True), ("followed you", False)])
+        self.assertEqual(list(notifications[0]), list(notifications[1]))
+
+    def test_zip_archive_and_command(self):
+        import io
+        import os
+        import tempfile
+        import zipfile
+        from django.core.management import call_command
+
+        res = self.client.get("/export/?as=zip")
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(res.streaming_content)))
+        self.assertIn("post.ndjson", archive.namelist())
+        self.assertEqual(archive.read("notification.ndjson"), b"")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "me.zip")
+            call_command("export_user_data", "me", "--as", "zip", "-o", path, "--chunk-size", "1",
+                         stdout=io.StringIO())
+            self.assertIn(b"note to self", zipfile.ZipFile(path).read("comment.ndjson"))
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ProfileImagePipelineTests(APITestCase):
+    def setUp(self):
+        import shutil
+        import tempfile
+
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def upload(self, name, color, size=(800, 600)):
+        import io
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from PIL import Image
+
+        buffer = io.BytesIO()
+        Image.new("RGB", size, color).save(buffer, format="JPEG")
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/jpeg")
+
+    def test_register_and_replace_image_generate_thumbnails(self):
+        import os
+        from PIL import Image
+
+        res = self.client.post("/register", {
+            "username": "pic", "email": "pic@example.com", "password": "pass1234",
+            "profile_image": self.upload("me.jpg", "red"),
+        }, format="multipart")
+        self.assertEqual(res.status_code, 201)
+        user = User.objects.get(username="pic")
+        self.assertEqual(set(user.profile_thumbnails), {"64", "256"})
+        stored = user.profile_thumbnails["64"]
+        with Image.open(os.path.join(self.media_root, stored["webp"])) as thumb:
+            self.assertEqual((thumb.format, thumb.size), ("WEBP", (64, 64)))
+
+        client = APIClient()
+        client.force_authenticate(user=user)
+        res = client.patch("/profile", {"profile_image": self.upload("new.jpg", "blue")}, format="multipart")
+        self.assertTrue(res.data["profile_thumbnails"]["256"]["jpeg"].startswith("/media/profiles/thumbs/"))
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, stored["webp"])))
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ThrottleTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_login_is_limited_per_ip_and_reports_rejections(self):
+        from rest_framework.settings import api_settings
+        from social_media_api import throttling
+
+        User.objects.create_user(username="bruce", password="pass1234")
+        rates = dict(api_settings.DEFAULT_THROTTLE_RATES, login="3/min")
+        with override_settings(REST_FRAMEWORK={**api_settings.user_settings, "DEFAULT_THROTTLE_RATES": rates}):
+            # a rotated X-Forwarded-For does not buy a fresh allowance
+            codes = [
+                self.client.post("/login", {"username": "bruce", "password": "nope"},
+                                 HTTP_X_FORWARDED_FOR=f"203.0.113.{i}").status_code
+                for i in range(5)
+            ]
+            self.assertEqual(codes, [400, 400, 400, 429, 429])
+            other_ip = self.client.post("/login", {"username": "bruce", "password": "pass1234"},
+                                        REMOTE_ADDR="10.0.0.9")
+            self.assertEqual(other_ip.status_code, 200)
+        self.assertGreaterEqual(throttling.stats()["login"]["rejected"], 2)
+
+    def test_previous_window_carries_over(self):
+        from social_media_api.throttling import SlidingWindowThrottle
+
+        class View:
+            throttle_scope = "likes"
+
+        class Request:
+            method = "POST"
+            META = {"REMOTE_ADDR": "10.0.0.1"}
+            user = None
+
+        throttle = SlidingWindowThrottle()
+        throttle.get_rate = lambda scope: "10/min"
+        window = int(__import__("time").time() // 60)
+        cache.set(f"throttle:likes:ip:10.0.0.1:{window - 1}", 100_000)
+        self.assertFalse(throttle.allow_request(Request(), View()))
+        self.assertGreater(throttle.wait(), 0)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class AsyncUserDirectoryTests(APITestCase):
+    def setUp(self):
+        self.me = User.objects.create_user(username="me", password="pass1234")
+        for name in ("alice", "alina", "bob"):
+            User.objects.create_user(username=name, password="pass1234")
+        follow(self.me, User.objects.get(username="alina"))
+        self.auth = {"Authorization": f"Token {Token.objects.create(user=self.me).key}"}
+
+    async def test_matches_sync_directory(self):
+        from asgiref.sync import sync_to_async
+
+        for query in ("", "?q=ali", "?fields=id,username,is_following&page_size=2"):
+            res = await self.async_client.get(f"/async/users/{query}", headers=self.auth)
+            sync = await sync_to_async(self.client.get)(f"/users/{query}", headers=self.auth)
+            self.assertEqual(res.status_code, 200)
+            self.assertEqual(res.content.replace(b"/async/users/", b"/users/"), sync.content, query)
+
+        res = await self.async_client.get("/async/users/?q=ali&fields=username,is_following", headers=self.auth)
+        self.assertEqual(
+            res.json()["results"],
+            [{"username": "alice", "is_following": False}, {"username": "alina", "is_following": True}],
+        )
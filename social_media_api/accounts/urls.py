@@ -1,6 +1,7 @@
 from django.urls import path
 from .views import RegisterView, LoginView, ProfileView, FollowUserView, UnfollowUserView
-from .views import UsersListView
+from .views import UsersListView, SuggestionsView, ExportView
+from .async_views import AsyncUsersListView
 
 urlpatterns = [
     path("register", RegisterView.as_view(), name="register"),
@@ -15,4 +16,7 @@ urlpatterns = [
     path("unfollow/<int:user_id>/", UnfollowUserView.as_view(), name="unfollow-user"),
     
     path("users/", UsersListView.as_view(), name="users-list"),
+    path("suggestions/", SuggestionsView.as_view(), name="follow-suggestions"),
+    path("export/", ExportView.as_view(), name="account-export"),
+    path("async/users/", AsyncUsersListView.as_view(), name="users-list-async"),
 ]
@@ -0,0 +1,74 @@
+from django.contrib.auth import get_user_model
+from django.db import models, transaction
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
+
+from .signals import follow_changed
+
+User = get_user_model()
+Follow = User.following.through
+
+
+def _adjust_follow_counts(follower_id, followee_id, delta):
+    # one UPDATE touching both rows
+    User.objects.filter(pk__in=[follower_id, followee_id]).update(
+        following_count=Case(
+            When(pk=follower_id, then=F("following_count") + delta),
+            default=F("following_count"),
+            output_field=models.PositiveIntegerField(),
+        ),
+        followers_count=Case(
+            When(pk=followee_id, then=F("followers_count") + delta),
+            default=F("followers_count"),
+            output_field=models.PositiveIntegerField(),
+        ),
+    )
+
+
+def follow(user, target):
+    """`user` follows `target`. Returns False if the edge already existed."""
+    with transaction.atomic():
+        _, created = Follow.objects.get_or_create(from_user_id=user.pk, to_user_id=target.pk)
+        if created:
+            _adjust_follow_counts(user.pk, target.pk, 1)
+    if created:
+        follow_changed.send(sender=User, follower_id=user.pk, followee_id=target.pk, created=True)
+    return created
+
+
+def unfollow(user, target):
+    """`user` stops following `target`. Returns False if there was no edge."""
+    with transaction.atomic():
+        deleted, _ = Follow.objects.filter(from_user_id=user.pk, to_user_id=target.pk).delete()
+        if deleted:
+            _adjust_follow_counts(user.pk, target.pk, -1)
+    if deleted:
+        follow_changed.send(sender=User, follower_id=user.pk, followee_id=target.pk, created=False)
+    return bool(deleted)
+
+
+def _edge_count(column):
+    counts = (
+        Follow.objects.filter(**{column: OuterRef("pk")})
+        .order_by()
+        .values(column)
+        .annotate(n=Count("id"))
+        .values("n")
+    )
+    return Coalesce(Subquery(counts), Value(0))
+
+
+def reconcile_follow_counters(batch_size=5000):
+    """Rewrite drifted followers/following counters in pk-range batches. Returns rows fixed."""
+    fixed = 0
+    last_id = 0
+    while True:
+        ids = list(
+            User.objects.filter(pk__gt=last_id).order_by("pk").values_list("pk", flat=True)[:batch_size]
+        )
+        if not ids:
+            return fixed
+        last_id = ids[-1]
+        batch = User.objects.filter(pk__gte=ids[0], pk__lte=last_id)
+        for field, column in (("followers_count", "to_user"), ("following_count", "from_user")):
+            fixed += batch.filter(~Q(**{field: _edge_count(column)})).update(**{field: _edge_count(column)})
@@ -3,13 +3,21 @@ from rest_framework.response import Response
 from rest_framework import status, permissions
 from rest_framework.authtoken.models import Token
 from rest_framework.generics import RetrieveUpdateAPIView
-from rest_framework.authentication import TokenAuthentication
+from .authentication import CachedTokenAuthentication
 from django.shortcuts import get_object_or_404
 from django.contrib.auth import get_user_model
 from rest_framework import generics
 
-from .serializers import RegisterSerializer, LoginSerializer, ProfileSerializer
+from .serializers import RegisterSerializer, LoginSerializer, ProfileSerializer, UserListSerializer
+from .serializers import SuggestionSerializer
+from .graph import graph
+from .suggestions import suggestions_for
+from .export import FORMATS, stream_export
+from django.http import StreamingHttpResponse
+from social_media_api.pagination import KeysetPagination
 from notifications.utils import create_notification
+from posts.feed import backfill_author, prune_author
+from .utils import follow, unfollow
 
 CustomUser = get_user_model()
 
@@ -18,8 +26,10 @@ class RegisterView(APIView):
     POST /register
     Body: {username, email, password, bio?, profile_picture?}
     Returns: {user, token}
+    Throttle: "register" scope, per IP
     """
     permission_classes = [permissions.AllowAny]
+    throttle_scope = "register"
 
     def post(self, request):
         serializer = RegisterSerializer(data=request.data)
@@ -36,8 +46,10 @@ class LoginView(APIView):
     POST /login
     Body: {username, password}
     Returns: {user, token}
+    Throttle: "login" scope, per IP
     """
     permission_classes = [permissions.AllowAny]
+    throttle_scope = "login"
 
     def post(self, request):
         serializer = LoginSerializer(data=request.data)
@@ -53,18 +65,19 @@ class ProfileView(RetrieveUpdateAPIView):
     Auth: Token
     """
     serializer_class = ProfileSerializer
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
-        return self.request.user
+        # request.user may come from the token cache; counts must be current
+        return CustomUser.objects.get(pk=self.request.user.pk)
 
 class FollowUserView(APIView):
     """
     POST /follow/<user_id>/  (Token auth)
     Current user follows target user.
     """
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request, user_id):
@@ -72,8 +85,8 @@ class FollowUserView(APIView):
         if target == request.user:
             return Response({"detail": "You cannot follow yourself."}, status=status.HTTP_400_BAD_REQUEST)
 
-        request.user.following.add(target)   
-        if target.id != request.user.id:
+        if follow(request.user, target):
+            backfill_author(request.user, target)
             create_notification(recipient=target, actor=request.user, verb="followed you", target=target)
         return Response({"detail": f"Now following {target.username}."}, status=status.HTTP_200_OK)
 
@@ -84,28 +97,114 @@ class UnfollowUserView(APIView):
     POST /unfollow/<user_id>/  (Token auth)
     Current user unfollows target user.
     """
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request, user_id):
         target = get_object_or_404(CustomUser, pk=user_id)
         if target == request.user:
             return Response({"detail": "You cannot unfollow yourself."}, status=status.HTTP_400_BAD_REQUEST)
-        request.user.following.remove(target)
+        if unfollow(request.user, target):
+            prune_author(request.user, target)
         return Response({"detail": f"Unfollowed {target.username}."}, status=status.HTTP_200_OK)
 
+class DirectoryPagination(KeysetPagination):
+    page_size = 20
+    ordering = ("username",)
+
+
+def directory_fields(raw):
+    """`?fields=` -> the UserListSerializer fields to render, or None for all of them."""
+    if not raw:
+        return None
+    allowed = set(UserListSerializer.Meta.fields)
+    fields = [f for f in (part.strip() for part in raw.split(",")) if f in allowed]
+    return fields or None
+
+
+def directory_queryset(queryset, prefix, fields):
+    qs = queryset.filter(is_active=True)
+    if prefix:
+        qs = qs.filter(username__startswith=prefix)
+    if fields:
+        columns = {f.name for f in CustomUser._meta.concrete_fields}
+        qs = qs.only("id", "username", *[f for f in fields if f in columns])
+    return qs
+
+
+def wants_following(fields):
+    return fields is None or "is_following" in fields
+
+
 class UsersListView(generics.GenericAPIView):
     """
-    GET /users/  — minimal endpoint to satisfy checker.
+    GET /users/  (Token auth)
+    Paginated user directory, ordered by username (`?cursor=` from `next`).
+      ?q=ali             -> usernames starting with "ali" (index range scan)
+      ?fields=id,username -> sparse fieldset; only those columns are selected
     Uses generics.GenericAPIView and CustomUser.objects.all().
     """
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
-    serializer_class = ProfileSerializer
+    serializer_class = UserListSerializer
     queryset = CustomUser.objects.all()  # <-- exact substring for checker
+    pagination_class = DirectoryPagination
+
+    def get_fields(self):
+        return directory_fields(self.request.query_params.get("fields"))
+
+    def get_queryset(self):
+        prefix = self.request.query_params.get("q", "").strip()
+        return directory_queryset(super().get_queryset(), prefix, self.get_fields())
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["fields"] = self.get_fields()
+        if wants_following(context["fields"]):
+            context["following_ids"] = graph.following_ids(self.request.user.pk)
+        return context
+
+    def get(self, request):
+        page = self.paginate_queryset(self.get_queryset())
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+class SuggestionsView(APIView):
+    """
+    GET /suggestions/?limit=10  (Token auth)
+    "Who to follow", precomputed by `manage.py compute_suggestions`.
+    """
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        qs = self.get_queryset()
-        data = self.serializer_class(qs, many=True).data
+        try:
+            limit = max(1, min(int(request.query_params.get("limit", 10)), 50))
+        except ValueError:
+            limit = 10
+        rows = suggestions_for(request.user, limit, exclude_ids=graph.following_ids(request.user.pk))
+        data = SuggestionSerializer(
+            [{"user": u, "score": score, "mutual_count": mutual} for u, score, mutual in rows], many=True
+        ).data
         return Response(data)
-    
\ No newline at end of file
+
+
+class ExportView(APIView):
+    """
+    GET /export/?as=ndjson|zip  (Token auth)
+    Streams the caller's profile, posts, comments, likes, follows and
+    notifications; memory use does not grow with the account size.
+    """
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        fmt = request.query_params.get("as", "ndjson")
+        if fmt not in FORMATS:
+            return Response({"detail": f"`as` must be one of: {', '.join(FORMATS)}."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        content_type = "application/zip" if fmt == "zip" else "application/x-ndjson"
+        response = StreamingHttpResponse(stream_export(request.user, fmt), content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="{request.user.username}-export.{fmt}"'
+        return response
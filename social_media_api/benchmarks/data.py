@@ -0,0 +1,89 @@
+"""
+Synthetic data for benchmarks: users with tokens, a random follow graph,
+posts (fanned out to feeds), likes and comments. All writes are bulk and
+counters are reconciled at the end, so generating 100k rows takes seconds.
+"""
+import random
+from dataclasses import dataclass
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from rest_framework.authtoken.models import Token
+
+BENCH_PASSWORD = "bench-pass-1234"
+
+
+@dataclass
+class DataSpec:
+    users: int = 200
+    follows_per_user: int = 20
+    posts_per_user: int = 5
+    likes_per_post: int = 5
+    comments_per_post: int = 2
+    seed: int = 42
+
+
+@dataclass
+class Dataset:
+    user_ids: list
+    tokens: dict  # user_id -> key
+    post_ids: list
+
+
+def generate(spec, batch_size=2000):
+    from accounts.utils import reconcile_follow_counters
+    from posts.counters import reconcile_post_counters
+    from posts.feed import fan_out_posts
+    from posts.models import Post, Comment, Like
+
+    User = get_user_model()
+    Follow = User.following.through
+    rng = random.Random(spec.seed)
+    password = make_password(BENCH_PASSWORD)  # hash once; PBKDF2 per user would dominate
+
+    start = User.objects.count()
+    users = User.objects.bulk_create(
+        [User(username=f"bench{start + i}", password=password) for i in range(spec.users)],
+        batch_size=batch_size,
+    )
+    user_ids = [u.pk for u in users]
+    tokens = Token.objects.bulk_create([Token(user=u, key=Token.generate_key()) for u in users])
+
+    follows = []
+    for uid in user_ids:
+        for target in rng.sample(user_ids, min(spec.follows_per_user + 1, len(user_ids))):
+            if target != uid:
+                follows.append(Follow(from_user_id=uid, to_user_id=target))
+    Follow.objects.bulk_create(follows, batch_size=batch_size, ignore_conflicts=True)
+    reconcile_follow_counters()
+
+    posts = Post.objects.bulk_create(
+        [
+            Post(author_id=uid, title=f"Post {n} by {uid}", content=f"benchmark content {rng.random()}")
+            for uid in user_ids for n in range(spec.posts_per_user)
+        ],
+        batch_size=batch_size,
+    )
+    fan_out_posts(posts)
+    post_ids = [p.pk for p in posts]
+
+    likes = [
+        Like(post_id=pid, user_id=uid)
+        for pid in post_ids
+        for uid in rng.sample(user_ids, min(spec.likes_per_post, len(user_ids)))
+    ]
+    Like.objects.bulk_create(likes, batch_size=batch_size, ignore_conflicts=True)
+
+    comments = Comment.objects.bulk_create(
+        [
+            Comment(post_id=pid, author_id=rng.choice(user_ids), content="benchmark comment")
+            for pid in post_ids for _ in range(spec.comments_per_post)
+        ],
+        batch_size=batch_size,
+    )
+    for comment in comments:  # bulk_create skips Comment.save(), which sets the path
+        comment.path = Comment.path_for(comment.pk)
+    Comment.objects.bulk_update(comments, ["path"], batch_size=batch_size)
+    reconcile_post_counters()
+
+    return Dataset(user_ids=user_ids, tokens={t.user_id: t.key for t in tokens}, post_ids=post_ids)
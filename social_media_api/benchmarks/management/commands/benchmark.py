@@ -0,0 +1,99 @@
+from dataclasses import asdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from benchmarks import runner
+from benchmarks.data import DataSpec, generate
+from benchmarks.scenarios import SCENARIOS
+from benchmarks.serialization import compare_serializers
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate synthetic data in a throwaway test database, run in-process load scenarios "
+        "and report p50/p95/p99 latency, queries per request and requests/sec."
+    )
+
+    def add_arguments(self, parser):
+        defaults = DataSpec()
+        parser.add_argument("--users", type=int, default=defaults.users)
+        parser.add_argument("--follows-per-user", type=int, default=defaults.follows_per_user)
+        parser.add_argument("--posts-per-user", type=int, default=defaults.posts_per_user)
+        parser.add_argument("--likes-per-post", type=int, default=defaults.likes_per_post)
+        parser.add_argument("--comments-per-post", type=int, default=defaults.comments_per_post)
+        parser.add_argument("--seed", type=int, default=defaults.seed)
+        parser.add_argument("--iterations", type=int, default=200, help="Measured requests per scenario.")
+        parser.add_argument("--warmup", type=int, default=20, help="Unmeasured requests per scenario.")
+        parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                            help="Run only these scenarios (repeatable; default all).")
+        parser.add_argument("--serializers", action="store_true",
+                            help="Also compare PostSerializer with the compiled values() projection.")
+        parser.add_argument("-o", "--output", help="Write the JSON report here.")
+        parser.add_argument("--baseline", help="JSON report to compare against; regressions exit non-zero.")
+        parser.add_argument("--tolerance", type=float, default=0.25,
+                            help="Allowed fractional p95/throughput regression vs the baseline.")
+
+    def handle(self, *args, **options):
+        spec = DataSpec(
+            users=options["users"],
+            follows_per_user=options["follows_per_user"],
+            posts_per_user=options["posts_per_user"],
+            likes_per_post=options["likes_per_post"],
+            comments_per_post=options["comments_per_post"],
+            seed=options["seed"],
+        )
+        baseline = runner.load(options["baseline"]) if options["baseline"] else None
+
+        setup_test_environment()
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            # measure the code paths, not the rate limiter or the HTTPS redirect
+            with override_settings(
+                SECURE_SSL_REDIRECT=False,
+                REST_FRAMEWORK={**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": {}},
+                NOTIFICATIONS={**settings.NOTIFICATIONS, "DELIVERY": "sync"},
+            ):
+                cache.clear()
+                self.stdout.write(f"Generating data: {asdict(spec)}")
+                dataset = generate(spec)
+                report = runner.run(
+                    dataset, options["scenario"], options["iterations"], options["warmup"],
+                    seed=spec.seed, data_spec=asdict(spec),
+                )
+                if options["serializers"]:
+                    report["serializers"] = compare_serializers()
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write(f"{'scenario':<18}{'p50':>9}{'p95':>9}{'p99':>9}{'q/req':>8}{'req/s':>9}{'errors':>8}")
+        for name, r in report["scenarios"].items():
+            self.stdout.write(
+                f"{name:<18}{r['p50_ms']:>9}{r['p95_ms']:>9}{r['p99_ms']:>9}"
+                f"{r['queries_per_request']:>8}{r['requests_per_second']:>9}{r['errors']:>8}"
+            )
+        if "serializers" in report:
+            s = report["serializers"]
+            self.stdout.write(f"\n{'serializer (rows/s)':<22}{'serialize':>12}{'end-to-end':>12}")
+            for name in ("post_serializer", "summary_serializer"):
+                self.stdout.write(
+                    f"{name:<22}{s[name]['serialize_rows_per_second']:>12}{s[name]['end_to_end_rows_per_second']:>12}"
+                )
+            self.stdout.write(
+                f"{'speedup':<22}{s['serialize_speedup']:>11}x{s['end_to_end_speedup']:>11}x"
+                f"   identical output: {s['identical']}"
+            )
+        if options["output"]:
+            runner.dump(report, options["output"])
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+
+        if baseline is not None:
+            problems = runner.compare(report, baseline, options["tolerance"])
+            if problems:
+                raise CommandError("Regressions against baseline:\n  " + "\n  ".join(problems))
+            self.stdout.write(self.style.SUCCESS("No regressions against baseline."))
@@ -0,0 +1,128 @@
+"""
+Run scenarios, summarize and compare against a baseline.
+
+Every request is timed with perf_counter and its SQL captured with
+CaptureQueriesContext. A scenario result is:
+
+    {"requests", "errors", "p50_ms", "p95_ms", "p99_ms", "mean_ms",
+     "queries_per_request", "requests_per_second"}
+
+compare() flags a scenario as a regression when p95 latency or throughput
+is worse than the baseline by more than `tolerance` (a fraction), or when it
+runs over QUERY_SLACK more queries per request (cache warm-up makes the
+average fractional; an N+1 adds at least one per request). Reports are
+only comparable when generated from the same data spec.
+"""
+import json
+import math
+import platform
+import random
+import statistics
+import time
+
+import django
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from .scenarios import SCENARIOS
+
+QUERY_SLACK = 0.5
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies, queries, errors, wall):
+    ordered = sorted(latencies)
+    to_ms = lambda s: None if s is None else round(s * 1000, 3)  # noqa: E731
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": to_ms(percentile(ordered, 50)),
+        "p95_ms": to_ms(percentile(ordered, 95)),
+        "p99_ms": to_ms(percentile(ordered, 99)),
+        "mean_ms": to_ms(statistics.fmean(ordered)) if ordered else None,
+        "queries_per_request": round(sum(queries) / len(queries), 2) if queries else None,
+        "requests_per_second": round(len(latencies) / wall, 1) if wall else None,
+    }
+
+
+def run_scenario(name, dataset, iterations=200, warmup=20, seed=0):
+    scenario = SCENARIOS[name]
+    client = Client()
+    rng = random.Random(seed)
+    for i in range(warmup):
+        scenario(client, dataset, rng, i)
+
+    latencies, queries, errors = [], [], 0
+    started = time.perf_counter()
+    for i in range(warmup, warmup + iterations):
+        with CaptureQueriesContext(connection) as ctx:
+            t0 = time.perf_counter()
+            response = scenario(client, dataset, rng, i)
+            latencies.append(time.perf_counter() - t0)
+        queries.append(len(ctx.captured_queries))
+        if response.status_code >= 400:
+            errors += 1
+    return summarize(latencies, queries, errors, time.perf_counter() - started)
+
+
+def run(dataset, scenarios=None, iterations=200, warmup=20, seed=0, data_spec=None):
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "iterations": iterations,
+            "data": data_spec,
+        },
+        "scenarios": {},
+    }
+    for name in scenarios or SCENARIOS:
+        report["scenarios"][name] = run_scenario(name, dataset, iterations, warmup, seed)
+    return report
+
+
+def compare(report, baseline, tolerance=0.25):
+    """List of human-readable regressions of `report` against `baseline`."""
+    if baseline.get("meta", {}).get("data") != report["meta"]["data"]:
+        return [f"baseline data spec {baseline.get('meta', {}).get('data')} differs from this run's"]
+    problems = []
+    for name, base in baseline.get("scenarios", {}).items():
+        current = report["scenarios"].get(name)
+        if current is None:
+            continue
+        if base.get("p95_ms") and current["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            problems.append(f"{name}: p95 {current['p95_ms']}ms vs baseline {base['p95_ms']}ms")
+        if base.get("requests_per_second") and (
+            current["requests_per_second"] < base["requests_per_second"] * (1 - tolerance)
+        ):
+            problems.append(
+                f"{name}: {current['requests_per_second']} req/s vs baseline {base['requests_per_second']}"
+            )
+        if base.get("queries_per_request") is not None and (
+            current["queries_per_request"] > base["queries_per_request"] + QUERY_SLACK
+        ):
+            problems.append(
+                f"{name}: {current['queries_per_request']} queries/request vs baseline {base['queries_per_request']}"
+            )
+        if current["errors"] > base.get("errors", 0):
+            problems.append(f"{name}: {current['errors']} error responses")
+    return problems
+
+
+def dump(report, path):
+    with open(path, "w") as fh:
+        json.dump(report, fh, indent=2, sort_keys=True)
+        fh.write("\n")
+
+
+def load(path):
+    with open(path) as fh:
+        return json.load(fh)
@@ -0,0 +1,60 @@
+"""
+In-process benchmark scenarios. Each scenario is a function
+(client, dataset, rng, i) -> response, driven through django.test.Client, so
+the full middleware/DRF stack is measured without network noise.
+"""
+def _auth(dataset, rng):
+    uid = rng.choice(dataset.user_ids)
+    return uid, {"HTTP_AUTHORIZATION": f"Token {dataset.tokens[uid]}"}
+
+
+def feed(client, dataset, rng, i):
+    _, headers = _auth(dataset, rng)
+    return client.get("/api/feed/", **headers)
+
+
+def posts(client, dataset, rng, i):
+    _, headers = _auth(dataset, rng)
+    return client.get(f"/api/posts/?page={i % 3 + 1}", **headers)
+
+
+def posts_anonymous(client, dataset, rng, i):
+    return client.get(f"/api/posts/?page={i % 3 + 1}")
+
+
+def post_detail(client, dataset, rng, i):
+    return client.get(f"/api/posts/{rng.choice(dataset.post_ids)}/")
+
+
+def like_unlike(client, dataset, rng, i):
+    _, headers = _auth(dataset, rng)
+    post_id = rng.choice(dataset.post_ids)
+    verb = "like" if i % 2 == 0 else "unlike"
+    return client.post(f"/api/posts/{post_id}/{verb}/", **headers)
+
+
+def follow(client, dataset, rng, i):
+    uid, headers = _auth(dataset, rng)
+    target = rng.choice(dataset.user_ids)
+    if target == uid:
+        target = dataset.user_ids[(dataset.user_ids.index(uid) + 1) % len(dataset.user_ids)]
+    verb = "follow" if i % 2 == 0 else "unfollow"
+    return client.post(f"/{verb}/{target}/", **headers)
+
+
+def register(client, dataset, rng, i):
+    return client.post(
+        "/register",
+        {"username": f"newbie{i}-{rng.randrange(10**9)}", "email": "bench@example.com", "password": "pass1234"},
+    )
+
+
+SCENARIOS = {
+    "feed": feed,
+    "posts": posts,
+    "posts_anonymous": posts_anonymous,
+    "post_detail": post_detail,
+    "like_unlike": like_unlike,
+    "follow": follow,
+    "register": register,
+}
@@ -0,0 +1,62 @@
+"""
+PostSerializer vs the compiled values() projection (posts.projections) on
+one list page. Two measurements per serializer:
+
+    serialize   render an already-fetched page to JSON bytes
+    end_to_end  fetch the page (instances vs values() rows) and render it
+
+Results are rows per second (best of `rounds`, to damp scheduler noise);
+`identical` checks that both produce the same bytes.
+"""
+import time
+
+from rest_framework.renderers import JSONRenderer
+
+from posts.models import Post
+from posts.serializers import PostSerializer, PostSummarySerializer
+
+
+def _best(fn, rounds):
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def compare_serializers(page_size=100, rounds=30):
+    render = JSONRenderer().render
+    base = Post.objects.order_by("-created_at", "-id")
+
+    def fetch_instances():
+        return list(base.select_related("author")[:page_size])
+
+    def fetch_rows():
+        return list(PostSummarySerializer.project(base)[:page_size])
+
+    instances, rows = fetch_instances(), fetch_rows()
+    n = len(rows) or 1
+    report = {"page_size": len(rows), "rounds": rounds}
+    for name, fetch, serializer, page in (
+        ("post_serializer", fetch_instances, PostSerializer, instances),
+        ("summary_serializer", fetch_rows, PostSummarySerializer, rows),
+    ):
+        serialize = _best(lambda: render(serializer(page, many=True).data), rounds)
+        end_to_end = _best(lambda: render(serializer(fetch(), many=True).data), rounds)
+        report[name] = {
+            "serialize_rows_per_second": round(n / serialize, 1),
+            "end_to_end_rows_per_second": round(n / end_to_end, 1),
+        }
+    report["serialize_speedup"] = round(
+        report["summary_serializer"]["serialize_rows_per_second"]
+        / report["post_serializer"]["serialize_rows_per_second"], 2
+    )
+    report["end_to_end_speedup"] = round(
+        report["summary_serializer"]["end_to_end_rows_per_second"]
+        / report["post_serializer"]["end_to_end_rows_per_second"], 2
+    )
+    report["identical"] = (
+        render(PostSerializer(instances, many=True).data) == render(PostSummarySerializer(rows, many=True).data)
+    )
+    return report
@@ -0,0 +1,46 @@
+import copy
+from dataclasses import asdict
+
+from django.test import TestCase, override_settings
+
+from . import runner
+from .data import DataSpec, generate
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class BenchmarkHarnessTests(TestCase):
+    def setUp(self):
+        self.spec = DataSpec(users=6, follows_per_user=3, posts_per_user=2, likes_per_post=2, comments_per_post=1)
+        self.dataset = generate(self.spec)
+
+    def test_generator_keeps_counters_consistent(self):
+        from posts.models import Post, FeedEntry
+
+        self.assertEqual(len(self.dataset.post_ids), 12)
+        post = Post.objects.get(pk=self.dataset.post_ids[0])
+        self.assertEqual((post.likes_count, post.comments_count), (2, 1))
+        self.assertTrue(FeedEntry.objects.exists())
+
+    def test_report_and_baseline_comparison(self):
+        report = runner.run(self.dataset, ["feed", "like_unlike"], iterations=6, warmup=1,
+                            data_spec=asdict(self.spec))
+        feed = report["scenarios"]["feed"]
+        self.assertEqual((feed["requests"], feed["errors"]), (6, 0))
+        self.assertLessEqual(feed["p50_ms"], feed["p99_ms"])
+        self.assertEqual(runner.compare(report, report), [])
+
+        worse = copy.deepcopy(report)
+        worse["scenarios"]["feed"]["queries_per_request"] += 10  # an N+1 sneaks in
+        self.assertEqual(len(runner.compare(worse, report)), 1)
+
+    def test_percentile_is_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual((runner.percentile(values, 50), runner.percentile(values, 99)), (50, 99))
+
+    def test_serializer_comparison(self):
+        from .serialization import compare_serializers
+
+        report = compare_serializers(page_size=10, rounds=2)
+        self.assertTrue(report["identical"])
+        self.assertEqual(report["page_size"], 10)
+        self.assertGreater(report["summary_serializer"]["serialize_rows_per_second"], 0)
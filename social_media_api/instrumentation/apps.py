@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+
+
+class InstrumentationConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'instrumentation'
+
+    def ready(self):
+        from .conf import conf
+        from .serializers import patch_serializers
+
+        if conf("ENABLED") and conf("TIME_SERIALIZERS"):
+            patch_serializers()
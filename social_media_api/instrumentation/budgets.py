@@ -0,0 +1,39 @@
+"""
+Query budgets: the most SQL statements a view may run per request.
+
+Declare them on the view (`query_budget = 3`) or by URL name in
+INSTRUMENTATION["QUERY_BUDGETS"] (the setting wins). A number covers every
+method; a dict sets one per method, e.g. {"GET": 2, "*": 14}, where "*"
+covers the methods not listed and HEAD falls back to GET. Reads and writes
+on one URL differ by an order of magnitude, so a shared number would let
+an N+1 on the read through. Exceeding one is
+logged and counted; with ENFORCE_BUDGETS (on under the test runner) the
+middleware raises QueryBudgetExceeded, so an N+1 fails the test that
+triggers it.
+"""
+from .conf import conf
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def budget_for(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return None
+    budgets = conf("QUERY_BUDGETS")
+    if match.view_name in budgets:
+        budget = budgets[match.view_name]
+    else:
+        view_class = getattr(match.func, "cls", None) or getattr(match.func, "view_class", None)
+        budget = getattr(view_class, "query_budget", None)
+    return _for_method(budget, request.method)
+
+
+def _for_method(budget, method):
+    if not isinstance(budget, dict):
+        return budget
+    if method == "HEAD" and "HEAD" not in budget:
+        method = "GET"
+    return budget.get(method, budget.get("*"))
@@ -0,0 +1,31 @@
+"""
+settings.INSTRUMENTATION (all keys optional):
+
+    ENABLED          record metrics at all
+    HEADERS          add X-DB-Queries / Server-Timing headers (default: settings.DEBUG)
+    TIME_SERIALIZERS time DRF serializers (patches to_representation once, at startup)
+    QUERY_BUDGETS    {"url-name": max queries or {"METHOD": max queries, "*": ...}};
+                     views may also set `query_budget`
+    ENFORCE_BUDGETS  raise QueryBudgetExceeded instead of logging (turn on for tests)
+    METRICS_TOKEN    bearer token required by /metrics (without one it is served only when DEBUG)
+    COLLECTORS       {"prefix": "dotted.path.to.stats"}: callables returning dicts of
+                     numbers (or {label: {name: number}}), exported as gauges
+"""
+from django.conf import settings
+
+DEFAULTS = {
+    "ENABLED": True,
+    "HEADERS": None,
+    "TIME_SERIALIZERS": True,
+    "QUERY_BUDGETS": {},
+    "ENFORCE_BUDGETS": False,
+    "METRICS_TOKEN": "",
+    "COLLECTORS": {},
+}
+
+
+def conf(name):
+    value = getattr(settings, "INSTRUMENTATION", {}).get(name, DEFAULTS[name])
+    if name == "HEADERS" and value is None:
+        return settings.DEBUG
+    return value
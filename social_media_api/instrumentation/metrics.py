@@ -0,0 +1,118 @@
+"""
+Process-local metric registry with Prometheus text exposition.
+
+Histograms use fixed cumulative buckets, so recording is O(buckets) and
+memory is O(label sets x buckets) no matter how many requests are seen.
+Every worker process keeps its own registry; scrape each worker (or run one
+process) for complete numbers.
+"""
+import bisect
+import threading
+from collections import defaultdict
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    inner = ",".join(
+        '{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in labels
+    )
+    return "{" + inner + "}"
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets):
+        self.name, self.help, self.buckets = name, help_text, tuple(buckets)
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {key: list(series) for key, series in self._series.items()}
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self.snapshot().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(key + (('le', bound),))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_labels(key + (('le', '+Inf'),))} {series[-1]}")
+            lines.append(f"{self.name}_sum{_labels(key)} {series[-2]}")
+            lines.append(f"{self.name}_count{_labels(key)} {series[-1]}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name, self.help = name, help_text
+        self._values = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        with self._lock:
+            self._values[tuple(sorted(labels.items()))] += amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        lines.extend(f"{self.name}{_labels(key)} {value}" for key, value in values)
+        return lines
+
+
+REQUEST_SECONDS = Histogram("http_request_duration_seconds", "Wall time per request.", DURATION_BUCKETS)
+DB_QUERIES = Histogram("http_request_db_queries", "SQL queries per request.", QUERY_BUCKETS)
+DB_SECONDS = Histogram("http_request_db_seconds", "Time spent in SQL per request.", DURATION_BUCKETS)
+SERIALIZER_SECONDS = Histogram(
+    "http_request_serializer_seconds", "Time spent in DRF serializers per request.", DURATION_BUCKETS
+)
+RESPONSE_BYTES = Histogram("http_response_size_bytes", "Response body size.", SIZE_BUCKETS)
+REQUESTS = Counter("http_requests_total", "Requests by view, method and status.")
+BUDGET_EXCEEDED = Counter("query_budget_exceeded_total", "Requests that ran more queries than their budget.")
+
+REGISTRY = [REQUEST_SECONDS, DB_QUERIES, DB_SECONDS, SERIALIZER_SECONDS, RESPONSE_BYTES, REQUESTS, BUDGET_EXCEEDED]
+
+
+def _metric_name(*parts):
+    return "_".join(str(p) for p in parts).replace(".", "_").replace("-", "_")
+
+
+def render_collector(prefix, stats):
+    """Gauges from a subsystem's stats() dict; nested dicts become a `key` label."""
+    lines = []
+    for name, value in sorted(stats.items()):
+        if isinstance(value, dict):
+            for inner, inner_value in sorted(value.items()):
+                if isinstance(inner_value, (int, float)) and not isinstance(inner_value, bool):
+                    lines.append(f"{_metric_name(prefix, inner)}{_labels((('key', name),))} {inner_value}")
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            lines.append(f"{_metric_name(prefix, name)} {value}")
+    return lines
+
+
+def render(collectors=()):
+    """Prometheus text format for the registry plus (prefix, stats dict) collectors."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    for prefix, stats in collectors:
+        lines.extend(render_collector(prefix, stats))
+    return "\n".join(lines) + "\n"
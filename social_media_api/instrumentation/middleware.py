@@ -0,0 +1,140 @@
+"""
+Per-request instrumentation: query count, DB time, serializer time, total
+time and response size, tagged by the resolved URL name.
+
+SQL is observed through connection.execute_wrapper() on every configured
+database, so it covers the ORM and raw cursors alike at the cost of one
+extra function call per query. Numbers go to the histograms in
+instrumentation.metrics (exported at /metrics) and, when
+INSTRUMENTATION["HEADERS"] is on, to X-DB-Queries / X-DB-Time-ms /
+X-Serializer-Time-ms and a Server-Timing header.
+
+Put it first in MIDDLEWARE so the timing covers everything below it.
+The middleware is async-capable, so under ASGI it does not force async
+views back into a worker thread.
+"""
+import logging
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.db import connections
+
+from . import metrics, serializers
+from .budgets import QueryBudgetExceeded, budget_for
+from .conf import conf
+
+logger = logging.getLogger(__name__)
+
+
+# The request being measured. Concurrent async requests can share a worker
+# thread (and so a connection); each one only counts its own queries.
+_current = ContextVar("query_stats", default=None)
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        if _current.get() is not self:
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+
+
+def view_label(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "<unresolved>"
+    return match.view_name or match._func_path
+
+
+def _watch(stack, queries):
+    # connections are per thread: under ASGI this must run in the thread the ORM uses
+    for alias in connections:
+        stack.enter_context(connections[alias].execute_wrapper(queries))
+
+
+class InstrumentationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not conf("ENABLED"):
+            return self.get_response(request)
+
+        queries = QueryStats()
+        _current.set(queries)
+        started = time.perf_counter()
+        serializers.begin()
+        try:
+            with ExitStack() as stack:
+                _watch(stack, queries)
+                response = self.get_response(request)
+        finally:
+            _current.set(None)
+            serializer_seconds = serializers.end()
+        return self._record(request, response, queries, serializer_seconds, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        if not conf("ENABLED"):
+            return await self.get_response(request)
+
+        queries = QueryStats()
+        _current.set(queries)
+        started = time.perf_counter()
+        serializers.begin()
+        stack = ExitStack()
+        try:
+            # async ORM calls run in the request's thread-sensitive worker; watch that one
+            await sync_to_async(_watch)(stack, queries)
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+            _current.set(None)
+            serializer_seconds = serializers.end()
+        return self._record(request, response, queries, serializer_seconds, time.perf_counter() - started)
+
+    def _record(self, request, response, queries, serializer_seconds, seconds):
+        view = view_label(request)
+        size = None if response.streaming else len(response.content)
+        metrics.REQUEST_SECONDS.observe(seconds, view=view)
+        metrics.DB_QUERIES.observe(queries.count, view=view)
+        metrics.DB_SECONDS.observe(queries.seconds, view=view)
+        metrics.SERIALIZER_SECONDS.observe(serializer_seconds, view=view)
+        if size is not None:
+            metrics.RESPONSE_BYTES.observe(size, view=view)
+        metrics.REQUESTS.inc(view=view, method=request.method, status=response.status_code)
+
+        if conf("HEADERS"):
+            response["X-DB-Queries"] = str(queries.count)
+            response["X-DB-Time-ms"] = f"{queries.seconds * 1000:.2f}"
+            response["X-Serializer-Time-ms"] = f"{serializer_seconds * 1000:.2f}"
+            response["Server-Timing"] = (
+                f"db;dur={queries.seconds * 1000:.2f}, serialize;dur={serializer_seconds * 1000:.2f}, "
+                f"total;dur={seconds * 1000:.2f}"
+            )
+
+        budget = budget_for(request)
+        if budget is not None and queries.count > budget:
+            metrics.BUDGET_EXCEEDED.inc(view=view)
+            message = f"{view} ran {queries.count} queries (budget {budget})"
+            if conf("ENFORCE_BUDGETS"):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
@@ -0,0 +1,65 @@
+"""
+Serializer timing. DRF has no hook around serialization, so
+patch_serializers() wraps Serializer/ListSerializer.to_representation once
+at startup. Only the outermost call is timed, so nested serializers are
+not counted twice.
+
+State lives in a ContextVar rather than a thread-local: async views on one
+event loop thread interleave, and each request runs in its own context.
+"""
+import time
+from contextvars import ContextVar
+
+from rest_framework import serializers
+
+
+class _Timing:
+    __slots__ = ("depth", "seconds")
+
+    def __init__(self):
+        self.depth = 0
+        self.seconds = 0.0
+
+
+_current = ContextVar("serializer_timing", default=None)
+
+
+def begin():
+    _current.set(_Timing())
+
+
+def elapsed():
+    timing = _current.get()
+    return timing.seconds if timing is not None else 0.0
+
+
+def _timed(method):
+    def wrapper(self, *args, **kwargs):
+        timing = _current.get()
+        if timing is None:  # not inside an instrumented request
+            return method(self, *args, **kwargs)
+        depth = timing.depth
+        timing.depth = depth + 1
+        started = time.perf_counter() if depth == 0 else None
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            timing.depth = depth
+            if started is not None:
+                timing.seconds += time.perf_counter() - started
+
+    wrapper.__wrapped__ = method
+    wrapper._instrumented = True
+    return wrapper
+
+
+def end():
+    seconds = elapsed()
+    _current.set(None)
+    return seconds
+
+
+def patch_serializers():
+    for cls in (serializers.Serializer, serializers.ListSerializer):
+        if not getattr(cls.to_representation, "_instrumented", False):
+            cls.to_representation = _timed(cls.to_representation)
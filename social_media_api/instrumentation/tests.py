@@ -0,0 +1,78 @@
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import path
+from rest_framework.response import Response
+from rest_framework.test import APITestCase
+from rest_framework.views import APIView
+
+from . import metrics
+from .budgets import QueryBudgetExceeded
+
+User = get_user_model()
+
+
+class NPlusOneView(APIView):
+    authentication_classes = []
+    query_budget = 2
+
+    def get(self, request):
+        return Response([User.objects.filter(pk=u.pk).count() for u in User.objects.all()])
+
+
+class ReadWriteView(APIView):
+    authentication_classes = []
+    query_budget = {"GET": 1, "*": 10}
+
+    def get(self, request):
+        return Response([User.objects.count(), User.objects.count()])
+
+    post = get
+
+
+urlpatterns = [
+    path("n-plus-one/", NPlusOneView.as_view(), name="n-plus-one"),
+    path("read-write/", ReadWriteView.as_view(), name="read-write"),
+]
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class InstrumentationTests(APITestCase):
+    def test_headers_and_histograms(self):
+        from posts.models import Post
+
+        Post.objects.create(author=User.objects.create_user(username="a", password="pass1234"), title="T", content="x")
+        with override_settings(INSTRUMENTATION={"HEADERS": True}):
+            res = self.client.get("/api/posts/")
+        self.assertEqual(res["X-DB-Queries"], "2")
+        self.assertIn("serialize;dur=", res["Server-Timing"])
+        series = metrics.DB_QUERIES.snapshot()[(("view", "post-list"),)]
+        self.assertGreaterEqual(series[-1], 1)
+
+    @override_settings(ROOT_URLCONF=__name__, INSTRUMENTATION={"ENFORCE_BUDGETS": True})
+    def test_query_budget_fails_n_plus_one(self):
+        for i in range(3):
+            User.objects.create_user(username=f"u{i}", password="pass1234")
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get("/n-plus-one/")
+
+    @override_settings(ROOT_URLCONF=__name__, INSTRUMENTATION={"ENFORCE_BUDGETS": True})
+    def test_query_budget_per_method(self):
+        self.assertEqual(self.client.post("/read-write/").status_code, 200)
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get("/read-write/")
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.head("/read-write/")
+
+    def test_metrics_endpoint_requires_token_and_includes_collectors(self):
+        self.client.get("/api/posts/")
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        settings = {
+            "METRICS_TOKEN": "s3cret",
+            "COLLECTORS": {"token_auth_cache": "accounts.authentication.token_cache.stats"},
+        }
+        with override_settings(INSTRUMENTATION=settings):
+            res = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer s3cret")
+        body = res.content.decode()
+        self.assertEqual(res.status_code, 200)
+        self.assertIn('http_request_duration_seconds_bucket{view="post-list",le="+Inf"}', body)
+        self.assertIn("token_auth_cache_misses ", body)
@@ -0,0 +1,46 @@
+from django.http import HttpResponse, HttpResponseForbidden
+from django.conf import settings
+from django.utils.crypto import constant_time_compare
+from importlib import import_module
+
+from . import metrics
+from .conf import conf
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _authorized(request):
+    token = conf("METRICS_TOKEN")
+    if not token:
+        return settings.DEBUG
+    header = request.META.get("HTTP_AUTHORIZATION", "")
+    return header.startswith("Bearer ") and constant_time_compare(header[7:], token)
+
+
+def resolve(path):
+    """Import "pkg.module.obj.attr": the longest importable prefix, then attributes."""
+    parts = path.split(".")
+    for i in range(len(parts) - 1, 0, -1):
+        try:
+            target = import_module(".".join(parts[:i]))
+        except ImportError:
+            continue
+        for attr in parts[i:]:
+            target = getattr(target, attr)
+        return target
+    raise ImportError(path)
+
+
+def _collectors():
+    for prefix, path in conf("COLLECTORS").items():
+        try:
+            yield prefix, resolve(path)()
+        except Exception:  # one broken collector must not hide the rest
+            yield prefix, {"collector_errors": 1}
+
+
+def metrics_view(request):
+    """GET /metrics  (Bearer METRICS_TOKEN) -> Prometheus text exposition."""
+    if not _authorized(request):
+        return HttpResponseForbidden()
+    return HttpResponse(metrics.render(_collectors()), content_type=CONTENT_TYPE)
@@ -0,0 +1,62 @@
+"""
+Retention for the inbox table.
+
+Read notifications older than ARCHIVE["NOTIFICATIONS_AFTER_DAYS"] are moved
+to ArchivedNotification in batches (social_media_api.archival). The inbox
+keeps showing them: InboxPagination merges the archive into a page whenever
+archived rows could belong there (see needs_archive()).
+
+Archived rows are always older than the current cutoff, because the cutoff
+only moves forward. Raising the setting breaks that for rows archived
+under the old value until they age past the new cutoff.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from social_media_api.archival import move_rows
+from .models import ArchivedNotification, Notification
+
+DEFAULTS = {
+    "NOTIFICATIONS_AFTER_DAYS": 90,
+    "BATCH_SIZE": 1000,
+    "PAUSE": 0.0,
+}
+
+FIELDS = (
+    "recipient_id", "actor_id", "verb", "target_content_type_id", "target_object_id",
+    "timestamp", "actor_count",
+)
+
+
+def _conf(name):
+    return getattr(settings, "ARCHIVE", {}).get(name, DEFAULTS[name])
+
+
+def cutoff(now=None):
+    return (now or timezone.now()) - timedelta(days=_conf("NOTIFICATIONS_AFTER_DAYS"))
+
+
+def archive_notifications(batch_size=None, pause=None, dump=None, now=None, on_batch=None):
+    """Move old read notifications to the archive. Returns rows moved."""
+    return move_rows(
+        Notification.objects.filter(unread=False, timestamp__lt=cutoff(now)),
+        ArchivedNotification, FIELDS,
+        batch_size=batch_size or _conf("BATCH_SIZE"),
+        pause=_conf("PAUSE") if pause is None else pause,
+        dump=dump, on_batch=on_batch,
+    )
+
+
+def needs_archive(rows, page_size, reverse):
+    """
+    Whether an inbox page read from the live table must be merged with the archive.
+    `rows` are the live candidates (page_size + 1 at most), annotated with `has_archive`.
+    """
+    if reverse or not rows:
+        return True
+    if not rows[0].has_archive:
+        return False
+    # a full page that ends above the cutoff cannot contain archived rows
+    return len(rows) <= page_size or rows[-1].timestamp < cutoff()
@@ -0,0 +1,119 @@
+"""
+Server-Sent Events stream of new notifications (see notifications.push).
+"""
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_datetime
+from rest_framework import exceptions
+from rest_framework.utils.encoders import JSONEncoder
+
+from accounts.authentication import CachedTokenAuthentication
+from social_media_api.async_views import AsyncReadView
+from .models import Notification
+from .push import _conf, broker, ticket_user_id
+from .serializers import NotificationSerializer
+
+
+def sse(data=None, event=None, id=None, comment=None):
+    lines = []
+    if comment is not None:
+        lines.append(f": {comment}")
+    if id is not None:
+        lines.append(f"id: {id}")
+    if event is not None:
+        lines.append(f"event: {event}")
+    if data is not None:
+        lines.append("data: " + json.dumps(data, cls=JSONEncoder, ensure_ascii=False, separators=(",", ":")))
+    return ("\n".join(lines) + "\n\n").encode()
+
+
+def render(user_id, ids=None, since=None):
+    """
+    Inbox-format rows for `ids` (or everything touched after `since`), oldest
+    first, and how many rows past BUFFER were left out.
+    """
+    qs = Notification.objects.filter(recipient_id=user_id)
+    if ids is not None:
+        qs = qs.filter(pk__in=ids)
+    else:
+        qs = qs.filter(timestamp__gt=since)
+    limit = _conf("BUFFER")
+    rows = list(qs.select_related("actor").prefetch_related("target").order_by("timestamp", "id")[: limit + 1])
+    left_out = qs.count() - limit if len(rows) > limit else 0
+    return NotificationSerializer(rows[:limit], many=True).data, left_out
+
+
+class StreamAuthentication(CachedTokenAuthentication):
+    """
+    `Authorization: Token ...`, or `?ticket=` from POST /notifications/stream/ticket/
+    for EventSource clients, which cannot set request headers.
+    """
+
+    async def aauthenticate(self, request):
+        ticket = request.GET.get("ticket")
+        if ticket is None:
+            return await super().aauthenticate(request)
+        user_id = ticket_user_id(ticket)
+        user = None
+        if user_id is not None:
+            user = await get_user_model().objects.filter(pk=user_id, is_active=True).afirst()
+        if user is None:
+            raise exceptions.AuthenticationFailed("Invalid or expired stream ticket.")
+        return (user, None)
+
+
+class NotificationStreamView(AsyncReadView):
+    """
+    GET /notifications/stream/  (Token auth, or ?ticket= for EventSource; ASGI)
+    text/event-stream of the caller's new and updated notifications:
+      event: notification   data: {...same fields as GET /notifications/}
+      event: resync         data: {dropped}  -- buffer overflowed or the replay was
+                                                cut at BUFFER rows, refetch the inbox
+      ": keep-alive" comments every HEARTBEAT seconds while idle
+    Event ids are row timestamps; reconnecting with Last-Event-ID replays what
+    was written or merged since. Streams end after MAX_AGE seconds and
+    EventSource reconnects on its own (with a fresh ticket when the old one
+    has expired).
+    """
+    authentication_class = StreamAuthentication
+
+    async def get(self, request):
+        since = parse_datetime(request.headers.get("Last-Event-ID", "") or "")
+        response = StreamingHttpResponse(
+            self.events(request.user.pk, since), content_type="text/event-stream"
+        )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"  # nginx: do not buffer the stream
+        return response
+
+    async def events(self, user_id, since):
+        # subscribe before replaying, so nothing written in between is missed
+        sub = broker.subscribe(user_id)
+        try:
+            yield f"retry: {_conf('RETRY_MS')}\n\n".encode()
+            if since is not None:
+                rows, left_out = await sync_to_async(render)(user_id, since=since)
+                for row in rows:
+                    yield sse(row, event="notification", id=row["timestamp"])
+                if left_out:
+                    yield sse({"dropped": left_out}, event="resync")
+
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + _conf("MAX_AGE")
+            while (remaining := deadline - loop.time()) > 0:
+                ids, dropped = await sub.get(min(_conf("HEARTBEAT"), remaining))
+                if dropped:
+                    yield sse({"dropped": dropped}, event="resync")
+                if ids:
+                    rows, _ = await sync_to_async(render)(user_id, ids=ids)  # ids <= BUFFER
+                    for row in rows:
+                        yield sse(row, event="notification", id=row["timestamp"])
+                elif not dropped:
+                    yield sse(comment="keep-alive")
+        finally:
+            broker.unsubscribe(sub)
+
@@ -0,0 +1,37 @@
+"""
+Recipient-side helpers for the inbox endpoints.
+
+The unread badge is served from the cache; anything that changes a user's
+unread set (pipeline writes, mark-read) drops the key and the next read
+recounts with one indexed COUNT on (recipient, unread, timestamp).
+"""
+from django.core.cache import cache
+
+from .models import Notification
+
+UNREAD_KEY = "notifications:unread:{}"
+UNREAD_TTL = 300
+
+
+def unread_count(user_id):
+    key = UNREAD_KEY.format(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(recipient_id=user_id, unread=True).count()
+        cache.set(key, count, UNREAD_TTL)
+    return count
+
+
+def invalidate_unread(user_ids):
+    cache.delete_many([UNREAD_KEY.format(uid) for uid in set(user_ids)])
+
+
+def mark_read(user_id, ids=None):
+    """Mark all (or only `ids`) of a user's notifications read with one UPDATE."""
+    qs = Notification.objects.filter(recipient_id=user_id, unread=True)
+    if ids is not None:
+        qs = qs.filter(pk__in=ids)
+    updated = qs.update(unread=False)
+    if updated:
+        invalidate_unread([user_id])
+    return updated
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:49
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('notifications', '0003_inbox_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedNotification',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('verb', models.CharField(max_length=100)),
+                ('target_object_id', models.PositiveIntegerField(blank=True, null=True)),
+                ('timestamp', models.DateTimeField()),
+                ('actor_count', models.PositiveIntegerField(default=1)),
+                ('actor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_notifications', to=settings.AUTH_USER_MODEL)),
+                ('target_content_type', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['recipient', '-timestamp', '-id'], name='notif_archive_inbox_idx')],
+            },
+        ),
+    ]
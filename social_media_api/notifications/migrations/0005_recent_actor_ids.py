@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0004_archivednotification'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='recent_actor_ids',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+    ]
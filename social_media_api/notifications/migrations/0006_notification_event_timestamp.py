@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:46
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0005_recent_actor_ids'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notification',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 
@@ -15,12 +16,52 @@ class Notification(models.Model):
     target_content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, null=True, blank=True)
     target_object_id = models.PositiveIntegerField(null=True, blank=True)
     target = GenericForeignKey("target_content_type", "target_object_id")
-    timestamp = models.DateTimeField(auto_now_add=True)  # <-- timestamp
+    # set from the event time by notifications.pipeline, not when a batch is flushed
+    timestamp = models.DateTimeField(default=timezone.now)  # <-- timestamp
     unread = models.BooleanField(default=True)
+    # >1 when several actors were collapsed into this row ("N people liked your post");
+    # `actor` is the most recent one
+    actor_count = models.PositiveIntegerField(default=1)
+    # distinct actors already counted in actor_count, newest last (capped, see pipeline)
+    recent_actor_ids = models.JSONField(default=list, blank=True, editable=False)
 
     class Meta:
         ordering = ["-timestamp"]
+        indexes = [
+            # inbox pages (?unread=1) and the unread COUNT
+            models.Index(fields=["recipient", "unread", "-timestamp", "-id"], name="notif_inbox_unread_idx"),
+            # inbox pages over everything
+            models.Index(fields=["recipient", "-timestamp", "-id"], name="notif_inbox_idx"),
+        ]
 
     def __str__(self):
         return f"{self.actor} {self.verb} → {self.recipient}"
 
+
+class ArchivedNotification(models.Model):
+    """
+    Read notifications moved out of the inbox table by `manage.py archive_old_rows`
+    (notifications.archive). Keeps the original id and the columns the inbox renders;
+    everything here is read, so there is no `unread` column.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    recipient = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="archived_notifications"
+    )
+    actor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+")
+    verb = models.CharField(max_length=100)
+    target_content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, null=True, blank=True)
+    target_object_id = models.PositiveIntegerField(null=True, blank=True)
+    target = GenericForeignKey("target_content_type", "target_object_id")
+    timestamp = models.DateTimeField()
+    actor_count = models.PositiveIntegerField(default=1)
+
+    unread = False
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["recipient", "-timestamp", "-id"], name="notif_archive_inbox_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.actor} {self.verb} → {self.recipient} (archived)"
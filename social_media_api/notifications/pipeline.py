@@ -0,0 +1,250 @@
+"""
+Batched notification delivery.
+
+Request handlers call notifications.utils.create_notification(), which only
+builds a small NotificationEvent and hands it to the process-wide
+`dispatcher`. A background thread drains the buffer every FLUSH_INTERVAL
+seconds (or as soon as BATCH_SIZE events are waiting) and writes them with:
+
+    1 SELECT      open unread notifications that can absorb the new events
+    1 bulk_update bump actor/actor_count/timestamp on those
+    1 bulk_create everything else
+
+Events with the same (recipient, verb, target) are collapsed, so a burst of
+likes becomes one "N people liked your post" row (Notification.actor_count).
+Rows carry the time of their latest event, not of the flush, so a delayed
+batch does not reorder the inbox.
+actor_count counts distinct actors: the row remembers the last RECENT_ACTORS
+of them (recent_actor_ids), so someone who unlikes and likes again is not
+counted twice unless that many others acted in between.
+Written and merged rows are then pushed to connected clients (notifications.push).
+
+Events still buffered when the process exits are written by an atexit flush;
+a hard kill loses at most FLUSH_INTERVAL seconds of them.
+
+settings.NOTIFICATIONS:
+    DELIVERY         "thread" (default) or "sync" (write before returning; tests)
+    BATCH_SIZE       max events per write batch
+    FLUSH_INTERVAL   seconds between background flushes
+    COALESCE_WINDOW  seconds an unread notification keeps absorbing events
+    MAX_BUFFER       events kept in memory before the oldest are dropped
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import deque, OrderedDict
+from datetime import timedelta
+from typing import NamedTuple, Optional
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import push
+from .inbox import invalidate_unread
+from .models import Notification
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "DELIVERY": "thread",
+    "BATCH_SIZE": 500,
+    "FLUSH_INTERVAL": 0.5,
+    "COALESCE_WINDOW": 3600,
+    "MAX_BUFFER": 100_000,
+}
+
+RECENT_ACTORS = 200
+
+
+def _conf(name):
+    return getattr(settings, "NOTIFICATIONS", {}).get(name, DEFAULTS[name])
+
+
+class NotificationEvent(NamedTuple):
+    recipient_id: int
+    actor_id: int
+    verb: str
+    target_ct_id: Optional[int]
+    target_id: Optional[int]
+    created_at: object
+
+    @property
+    def key(self):
+        return (self.recipient_id, self.verb, self.target_ct_id, self.target_id)
+
+
+def coalesce(events):
+    """Group events by key -> (latest event, distinct actor ids oldest first), order preserved."""
+    groups = OrderedDict()
+    for event in events:
+        latest, actors = groups.get(event.key, (None, {}))
+        actors.pop(event.actor_id, None)
+        actors[event.actor_id] = None  # dict as an ordered set: most recent last
+        if latest is None or event.created_at >= latest.created_at:
+            latest = event
+        groups[event.key] = (latest, actors)
+    return [(latest, list(actors)) for latest, actors in groups.values()]
+
+
+def write_events(events):
+    """Persist a batch of events. Returns (rows_created, rows_merged)."""
+    groups = coalesce(events)
+    if not groups:
+        return 0, 0
+
+    window_start = timezone.now() - timedelta(seconds=_conf("COALESCE_WINDOW"))
+    match = Q()
+    for latest, _ in groups:
+        match |= Q(
+            recipient_id=latest.recipient_id, verb=latest.verb,
+            target_content_type_id=latest.target_ct_id, target_object_id=latest.target_id,
+        )
+    open_rows = {}
+    for n in Notification.objects.filter(match, unread=True, timestamp__gte=window_start):
+        key = (n.recipient_id, n.verb, n.target_content_type_id, n.target_object_id)
+        open_rows.setdefault(key, n)  # newest first (Meta.ordering)
+
+    to_update, to_create = [], []
+    for latest, actors in groups:
+        existing = open_rows.get(latest.key)
+        if existing is not None:
+            # rows written before recent_actor_ids existed know their latest actor only
+            known = existing.recent_actor_ids or [existing.actor_id]
+            existing.actor_count += len(set(actors) - set(known))
+            existing.recent_actor_ids = ([a for a in known if a not in actors] + actors)[-RECENT_ACTORS:]
+            if latest.created_at >= existing.timestamp:  # a late flush must not move a row back
+                existing.actor_id = latest.actor_id
+                existing.timestamp = latest.created_at
+            to_update.append(existing)
+        else:
+            to_create.append(Notification(
+                recipient_id=latest.recipient_id, actor_id=latest.actor_id, verb=latest.verb,
+                target_content_type_id=latest.target_ct_id, target_object_id=latest.target_id,
+                actor_count=len(actors), recent_actor_ids=actors[-RECENT_ACTORS:],
+                timestamp=latest.created_at,
+            ))
+
+    with transaction.atomic():
+        if to_update:
+            Notification.objects.bulk_update(
+                to_update, ["actor", "actor_count", "recent_actor_ids", "timestamp"]
+            )
+        if to_create:
+            Notification.objects.bulk_create(to_create)
+    if to_create:
+        invalidate_unread(n.recipient_id for n in to_create)
+    push.publish(to_create + to_update)
+    return len(to_create), len(to_update)
+
+
+class NotificationDispatcher:
+    def __init__(self):
+        self._buffer = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._stats = {
+            "enqueued": 0, "written": 0, "created": 0, "merged": 0, "coalesced": 0,
+            "dropped": 0, "batches": 0, "errors": 0, "flush_seconds": 0.0,
+        }
+
+    # --- producer side ---------------------------------------------------
+
+    def enqueue(self, event):
+        self.enqueue_many([event])
+
+    def enqueue_many(self, events):
+        """enqueue() for events raised together; sync delivery writes them as one batch."""
+        events = list(events)
+        if not events:
+            return
+        if _conf("DELIVERY") == "sync":
+            self._stats["enqueued"] += len(events)
+            self._write(events)
+            return
+        # only deliver once the surrounding request transaction commits
+        transaction.on_commit(lambda: [self._push(event) for event in events])
+
+    def _push(self, event):
+        with self._lock:
+            if len(self._buffer) >= _conf("MAX_BUFFER"):
+                self._buffer.popleft()
+                self._stats["dropped"] += 1
+            self._buffer.append(event)
+            self._stats["enqueued"] += 1
+            pending = len(self._buffer)
+        self._ensure_worker()
+        if pending >= _conf("BATCH_SIZE"):
+            self._wakeup.set()
+
+    # --- consumer side ---------------------------------------------------
+
+    def flush(self):
+        """Drain and write everything buffered so far. Returns events written."""
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = [
+                        self._buffer.popleft()
+                        for _ in range(min(len(self._buffer), _conf("BATCH_SIZE")))
+                    ]
+                if not batch:
+                    return written
+                self._write(batch)
+                written += len(batch)
+
+    def _write(self, batch):
+        started = time.perf_counter()
+        try:
+            created, merged = write_events(batch)
+        except Exception:
+            self._stats["errors"] += 1
+            logger.exception("Failed to write %d notification events", len(batch))
+            return
+        self._stats["written"] += len(batch)
+        self._stats["created"] += created
+        self._stats["merged"] += merged
+        self._stats["coalesced"] += len(batch) - created - merged
+        self._stats["batches"] += 1
+        self._stats["flush_seconds"] += time.perf_counter() - started
+
+    def _ensure_worker(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="notification-dispatcher", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(_conf("FLUSH_INTERVAL"))
+            self._wakeup.clear()
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+    # --- metrics ---------------------------------------------------------
+
+    def stats(self):
+        s = dict(self._stats)
+        with self._lock:
+            s["pending"] = len(self._buffer)
+        s["events_per_second"] = (
+            round(s["written"] / s["flush_seconds"], 1) if s["flush_seconds"] else None
+        )
+        s["delivery"] = _conf("DELIVERY")
+        return s
+
+
+dispatcher = NotificationDispatcher()
+# write what is still buffered on a clean shutdown (worker restarts, deploys)
+atexit.register(dispatcher.flush)
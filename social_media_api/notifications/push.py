@@ -0,0 +1,330 @@
+"""
+Realtime push of notifications to connected clients (see NotificationStreamView).
+
+When notifications.pipeline writes a batch, publish() hands the
+(recipient_id, notification_id) pairs to a backend once the transaction
+commits. The backend delivers them to the `broker` of every process that
+has SSE connections; the broker wakes the recipient's connections, which
+render the rows themselves (one query per wake-up, in the inbox format).
+Only ids travel, so messages stay small and writers never serialize.
+
+Each connection owns a Subscription: a bounded deque plus an asyncio.Event.
+An idle connection is parked on that event and only wakes for a heartbeat,
+so it costs no CPU in between. When the buffer overflows the oldest ids are
+dropped and the client gets a `resync` event telling it to refetch the inbox.
+
+Backends (settings.NOTIFICATION_PUSH["BACKEND"], or a dotted path):
+    "local"     single process (default)
+    "socket"    several processes on one host: each listening process binds
+                a Unix datagram socket in SOCKET_DIR, publishers send to all
+    "postgres"  several hosts: NOTIFY on CHANNEL, one LISTEN connection per
+                listening process (psycopg2 or psycopg 3)
+
+settings.NOTIFICATION_PUSH:
+    ENABLED      publish at all
+    BACKEND      see above
+    BUFFER       ids kept per connection before the oldest are dropped
+    HEARTBEAT    seconds between keep-alive comments on an idle stream
+    MAX_AGE      seconds before a stream is closed (clients reconnect with
+                 Last-Event-ID and get what they missed)
+    RETRY_MS     reconnect delay suggested to EventSource clients
+    SOCKET_DIR   rendezvous directory for the socket backend
+    CHANNEL      NOTIFY channel for the postgres backend
+    TICKET_TTL   seconds a stream ticket stays valid (see stream_ticket())
+"""
+import asyncio
+import atexit
+import glob
+import json
+import logging
+import os
+import select
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from collections import deque
+
+from django.conf import settings
+from django.core import signing
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "ENABLED": True,
+    "BACKEND": "local",
+    "BUFFER": 100,
+    "HEARTBEAT": 15,
+    "MAX_AGE": 300,
+    "RETRY_MS": 3000,
+    "SOCKET_DIR": os.path.join(tempfile.gettempdir(), "social_media_api-push"),
+    "CHANNEL": "notifications",
+    "TICKET_TTL": 60,
+}
+
+TICKET_SALT = "notifications.stream"
+
+PAIRS_PER_MESSAGE = 300  # keeps a NOTIFY payload under PostgreSQL's 8000 bytes
+
+
+def _conf(name):
+    return getattr(settings, "NOTIFICATION_PUSH", {}).get(name, DEFAULTS[name])
+
+
+class Subscription:
+    """One SSE connection. Filled from any thread, drained on its event loop."""
+
+    def __init__(self, user_id, loop, size):
+        self.user_id = user_id
+        self.loop = loop
+        self.pending = deque(maxlen=size)
+        self.dropped = 0
+        self.ready = asyncio.Event()
+
+    def push(self, ids):  # on self.loop
+        for notification_id in ids:
+            if len(self.pending) == self.pending.maxlen:
+                self.dropped += 1
+            self.pending.append(notification_id)
+        self.ready.set()
+
+    async def get(self, timeout):
+        """(ids, dropped) once something arrives, or ([], 0) after `timeout` seconds."""
+        if not self.pending and not self.dropped:
+            try:
+                await asyncio.wait_for(self.ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return [], 0
+        self.ready.clear()
+        ids = list(dict.fromkeys(self.pending))  # merged rows can be published twice
+        self.pending.clear()
+        dropped, self.dropped = self.dropped, 0
+        return ids, dropped
+
+
+class Broker:
+    def __init__(self):
+        self._subs = {}  # user_id -> set of Subscription
+        self._lock = threading.Lock()
+        self._stats = {"published": 0, "delivered": 0, "dropped": 0, "connections_total": 0}
+
+    def subscribe(self, user_id):
+        """Call from the connection's event loop."""
+        backend().listen(self.deliver)
+        sub = Subscription(user_id, asyncio.get_running_loop(), _conf("BUFFER"))
+        with self._lock:
+            self._subs.setdefault(user_id, set()).add(sub)
+            self._stats["connections_total"] += 1
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            subs = self._subs.get(sub.user_id)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subs[sub.user_id]
+        self._stats["dropped"] += sub.dropped
+
+    def deliver(self, pairs):
+        """Wake the local connections of each recipient in `pairs`. Safe from any thread."""
+        by_user = {}
+        with self._lock:
+            for user_id, notification_id in pairs:
+                if user_id in self._subs:
+                    by_user.setdefault(user_id, []).append(notification_id)
+            targets = [(sub, ids) for user_id, ids in by_user.items() for sub in self._subs[user_id]]
+        for sub, ids in targets:
+            try:
+                sub.loop.call_soon_threadsafe(sub.push, ids)
+            except RuntimeError:  # loop closed under us
+                self.unsubscribe(sub)
+                continue
+            self._stats["delivered"] += len(ids)
+
+    def stats(self):
+        s = dict(self._stats)
+        with self._lock:
+            s["connections"] = sum(len(subs) for subs in self._subs.values())
+            s["users"] = len(self._subs)
+            s["dropped"] += sum(sub.dropped for subs in self._subs.values() for sub in subs)
+        s["backend"] = type(backend()).__name__
+        return s
+
+
+broker = Broker()
+
+
+# --- backends --------------------------------------------------------------
+
+class LocalBackend:
+    """Publisher and connections share one process."""
+
+    def listen(self, deliver):
+        pass  # publish() delivers in-process
+
+    def publish(self, pairs):
+        broker.deliver(pairs)
+
+
+def _unlink_quietly(path):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+class SocketBackend:
+    """Unix datagram sockets in SOCKET_DIR, one per process that has connections."""
+
+    def __init__(self):
+        self.directory = _conf("SOCKET_DIR")
+        self.path = None
+        self._lock = threading.Lock()
+        self._sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sender.setblocking(False)  # a full receiver loses the message, never stalls a writer
+
+    def listen(self, deliver):
+        if self.path is not None:
+            return
+        with self._lock:
+            if self.path is not None:
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, f"{os.getpid()}-{uuid.uuid4().hex[:8]}.sock")
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            sock.bind(path)
+            atexit.register(_unlink_quietly, path)
+            threading.Thread(
+                target=self._receive, args=(sock, deliver), name="notification-push", daemon=True
+            ).start()
+            self.path = path
+
+    def _receive(self, sock, deliver):
+        while True:
+            data = sock.recv(65536)  # blocks: no CPU while idle
+            try:
+                deliver(json.loads(data))
+            except Exception:
+                logger.exception("Bad notification push datagram")
+
+    def publish(self, pairs):
+        for start in range(0, len(pairs), PAIRS_PER_MESSAGE):
+            chunk = pairs[start:start + PAIRS_PER_MESSAGE]
+            data = json.dumps(chunk, separators=(",", ":")).encode()
+            for path in glob.glob(os.path.join(self.directory, "*.sock")):
+                try:
+                    self._sender.sendto(data, path)
+                except (ConnectionRefusedError, FileNotFoundError):
+                    # the process is gone; its socket file is stale
+                    _unlink_quietly(path)
+                except BlockingIOError:
+                    broker._stats["dropped"] += len(chunk)
+
+
+class PostgresBackend:
+    """NOTIFY on publish; a dedicated LISTEN connection per listening process."""
+
+    RECONNECT_DELAY = 5
+
+    def __init__(self):
+        self.channel = _conf("CHANNEL")
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def listen(self, deliver):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, args=(deliver,), name="notification-push", daemon=True
+                )
+                self._thread.start()
+
+    def publish(self, pairs):
+        with connection.cursor() as cursor:
+            for start in range(0, len(pairs), PAIRS_PER_MESSAGE):
+                payload = json.dumps(pairs[start:start + PAIRS_PER_MESSAGE], separators=(",", ":"))
+                cursor.execute("SELECT pg_notify(%s, %s)", [self.channel, payload])
+
+    def _run(self, deliver):
+        while True:
+            conn = connections.create_connection(DEFAULT_DB_ALIAS)  # not shared with requests
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {conn.ops.quote_name(self.channel)}")
+                for payload in self._payloads(conn.connection):
+                    deliver(json.loads(payload))
+            except Exception:
+                logger.exception("Notification LISTEN connection failed; reconnecting")
+                time.sleep(self.RECONNECT_DELAY)
+            finally:
+                conn.close()
+
+    @staticmethod
+    def _payloads(raw):
+        if hasattr(raw, "poll"):  # psycopg2
+            while True:
+                select.select([raw], [], [])  # blocks until the server sends something
+                raw.poll()
+                while raw.notifies:
+                    yield raw.notifies.pop(0).payload
+        else:  # psycopg 3
+            for notify in raw.notifies():
+                yield notify.payload
+
+
+BACKENDS = {"local": LocalBackend, "socket": SocketBackend, "postgres": PostgresBackend}
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                name = _conf("BACKEND")
+                _backend = (BACKENDS.get(name) or import_string(name))()
+    return _backend
+
+
+def publish(notifications):
+    """Push saved Notification rows to their recipients once the transaction commits."""
+    if not _conf("ENABLED"):
+        return
+    pairs = [(n.recipient_id, n.pk) for n in notifications if n.pk is not None]
+    if not pairs:
+        return
+
+    def send():
+        broker._stats["published"] += len(pairs)
+        try:
+            backend().publish(pairs)
+        except Exception:
+            logger.exception("Failed to publish %d notifications", len(pairs))
+
+    transaction.on_commit(send)
+
+
+def stats():
+    return broker.stats()
+
+
+def stream_ticket(user_id):
+    """
+    Signed, short-lived `?ticket=` for GET /notifications/stream/. Browsers'
+    EventSource cannot send an Authorization header, and a ticket keeps the
+    long-lived API token out of URLs and access logs.
+    """
+    return signing.dumps(user_id, salt=TICKET_SALT, compress=True)
+
+
+def ticket_user_id(ticket):
+    """User id from a stream ticket, or None when it is forged or expired."""
+    try:
+        return signing.loads(ticket, salt=TICKET_SALT, max_age=_conf("TICKET_TTL"))
+    except signing.BadSignature:  # includes SignatureExpired
+        return None
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
 from .models import Notification
 
 User = get_user_model()
@@ -11,7 +12,32 @@ class ActorMiniSerializer(serializers.ModelSerializer):
 
 class NotificationSerializer(serializers.ModelSerializer):
     actor = ActorMiniSerializer(read_only=True)
+    target_type = serializers.SerializerMethodField()
+    target = serializers.SerializerMethodField()
 
     class Meta:
         model = Notification
-        fields = ("id", "verb", "actor", "timestamp", "unread", "target_object_id")
+        fields = (
+            "id", "verb", "actor", "actor_count", "timestamp", "unread",
+            "target_type", "target_object_id", "target",
+        )
+
+    def get_target_type(self, obj):
+        ct_id = obj.target_content_type_id
+        if ct_id is None:
+            return None
+        # ContentType.objects caches by id, so this is not a query per row
+        return ContentType.objects.get_for_id(ct_id).model
+
+    def get_target(self, obj):
+        # `target` is resolved by prefetch_related("target") in the view:
+        # one query per content type for the whole page
+        target = obj.target
+        if target is None:
+            return None
+        label = getattr(target, "title", None) or getattr(target, "username", None)
+        return {"id": target.pk, "label": label}
+
+
+class MarkReadSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, max_length=1000)
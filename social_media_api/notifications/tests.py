@@ -1,3 +1,316 @@
-from django.test import TestCase
+import os
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient, APITestCase
+
+from posts.models import Post
+from .models import Notification
+from .pipeline import NotificationDispatcher, NotificationEvent
+from .utils import create_notification
+
+User = get_user_model()
+
+
+class NotificationPipelineTests(TestCase):
+    """Batched writes and coalescing in notifications.pipeline."""
+
+    def setUp(self):
+        self.owner = User.objects.create_user(username="owner", password="pass1234")
+        self.fans = [User.objects.create_user(username=f"fan{i}", password="pass1234") for i in range(3)]
+        self.post = Post.objects.create(author=self.owner, title="T", content="x")
+        self.post_ct = ContentType.objects.get_for_model(Post).pk
+
+    def event(self, actor, verb="liked your post"):
+        return NotificationEvent(self.owner.pk, actor.pk, verb, self.post_ct, self.post.pk, timezone.now())
+
+    def test_burst_collapses_into_one_row(self):
+        d = NotificationDispatcher()
+        for fan in self.fans:
+            d._push(self.event(fan))
+        d._push(self.event(self.fans[0], verb="commented on your post"))
+        self.assertEqual(d.flush(), 4)
+
+        liked = Notification.objects.get(verb="liked your post")
+        self.assertEqual(liked.actor_count, 3)
+        self.assertEqual(liked.actor_id, self.fans[-1].pk)
+        self.assertEqual(Notification.objects.count(), 2)
+        self.assertEqual(d.stats()["coalesced"], 2)
+
+    def test_later_batch_merges_into_open_unread_row(self):
+        d = NotificationDispatcher()
+        d._push(self.event(self.fans[0]))
+        d.flush()
+        d._push(self.event(self.fans[1]))
+        d.flush()
+        self.assertEqual(Notification.objects.get().actor_count, 2)
+
+        Notification.objects.update(unread=False)
+        d._push(self.event(self.fans[2]))
+        d.flush()
+        self.assertEqual(Notification.objects.count(), 2)
+
+    def test_returning_actor_is_counted_once(self):
+        d = NotificationDispatcher()
+        for fan in (self.fans[0], self.fans[1], self.fans[0]):  # like, like, unlike + like again
+            d._push(self.event(fan))
+            d.flush()
+        d._push(self.event(self.fans[1]))
+        d._push(self.event(self.fans[2]))
+        d.flush()
+        row = Notification.objects.get()
+        self.assertEqual((row.actor_count, row.actor_id), (3, self.fans[2].pk))
+
+    def test_delayed_flush_keeps_event_times(self):
+        d = NotificationDispatcher()
+        liked_at = timezone.now() - timedelta(minutes=5)
+        commented_at = liked_at + timedelta(minutes=1)
+        d._push(self.event(self.fans[0])._replace(created_at=liked_at))
+        d._push(self.event(self.fans[1], verb="commented on your post")._replace(created_at=commented_at))
+        d.flush()  # minutes after the events, as after a stalled worker
+        inbox = list(Notification.objects.filter(recipient=self.owner).values_list("verb", "timestamp"))
+        self.assertEqual(inbox, [("commented on your post", commented_at), ("liked your post", liked_at)])
+
+        # an older event flushed late still counts, but does not move the row back in time
+        d._push(self.event(self.fans[2])._replace(created_at=liked_at - timedelta(minutes=1)))
+        d.flush()
+        row = Notification.objects.get(verb="liked your post")
+        self.assertEqual((row.actor_count, row.actor_id, row.timestamp), (2, self.fans[0].pk, liked_at))
+
+    @override_settings(NOTIFICATIONS={"DELIVERY": "thread"})
+    def test_thread_mode_defers_until_commit(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            create_notification(recipient=self.owner, actor=self.fans[0], verb="followed you", target=self.owner)
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(len(callbacks), 1)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class InboxTests(APITestCase):
+    """Inbox listing, cached unread count and bulk mark-read."""
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username="owner", password="pass1234")
+        self.fan = User.objects.create_user(username="fan", password="pass1234")
+        self.posts = [Post.objects.create(author=self.owner, title=f"P{i}", content="x") for i in range(4)]
+        for post in self.posts:
+            create_notification(recipient=self.owner, actor=self.fan, verb="liked your post", target=post)
+        create_notification(recipient=self.owner, actor=self.fan, verb="followed you", target=self.owner)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.owner)
+
+    def test_inbox_resolves_targets_in_batch(self):
+        # page + actor join, then one target query per content type (post, user)
+        with self.assertNumQueries(3):
+            res = self.client.get("/notifications/?cursor=&page_size=10")
+        self.assertEqual(len(res.data["results"]), 5)
+        labels = {n["target"]["label"] for n in res.data["results"]}
+        self.assertEqual(labels, {"P0", "P1", "P2", "P3", "owner"})
+
+    def test_unread_count_is_cached_and_mark_read_is_one_update(self):
+        self.assertEqual(self.client.get("/notifications/unread-count/").data["unread_count"], 5)
+        with self.assertNumQueries(0):
+            self.client.get("/notifications/unread-count/")
+
+        some = list(Notification.objects.values_list("id", flat=True)[:2])
+        res = self.client.post("/notifications/mark-read/", {"ids": some}, format="json")
+        self.assertEqual((res.data["updated"], res.data["unread_count"]), (2, 3))
+
+        res = self.client.post("/notifications/mark-read/", {}, format="json")
+        self.assertEqual((res.data["updated"], res.data["unread_count"]), (3, 0))
+        self.assertEqual(len(self.client.get("/notifications/?unread=1").data["results"]), 0)
+
+    def test_inbox_is_private(self):
+        other = APIClient()
+        other.force_authenticate(user=self.fan)
+        self.assertEqual(other.get("/notifications/").data["results"], [])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ArchiveTests(APITestCase):
+    """Old read notifications move to ArchivedNotification; the inbox still lists them."""
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username="owner", password="pass1234")
+        self.fan = User.objects.create_user(username="fan", password="pass1234")
+        for i in range(6):
+            post = Post.objects.create(author=self.owner, title=f"P{i}", content="x")
+            create_notification(recipient=self.owner, actor=self.fan, verb="liked your post", target=post)
+        ids = list(Notification.objects.order_by("id").values_list("id", flat=True))
+        old = timezone.now() - timedelta(days=200)
+        for i, pk in enumerate(ids[:3]):
+            Notification.objects.filter(pk=pk).update(unread=False, timestamp=old + timedelta(minutes=i))
+        Notification.objects.filter(pk=ids[3]).update(unread=False)  # read but recent: stays live
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.owner)
+
+    def walk(self, url):
+        seen = []
+        while url:
+            res = self.client.get(url)
+            seen += [n["id"] for n in res.data["results"]]
+            url = res.data["next"]
+        return seen
+
+    def test_inbox_reads_through_the_archive(self):
+        from .archive import archive_notifications
+        from .models import ArchivedNotification
+
+        before = self.walk("/notifications/?cursor=&page_size=2")
+        self.assertEqual(archive_notifications(batch_size=2), 3)
+        self.assertEqual((Notification.objects.count(), ArchivedNotification.objects.count()), (3, 3))
+
+        self.assertEqual(self.walk("/notifications/?cursor=&page_size=2"), before)
+        self.assertEqual(self.walk("/notifications/?cursor=&page_size=4"), before)
+        res = self.client.get("/notifications/?cursor=&page_size=10&count=1")
+        self.assertEqual(res.data["count"], 6)
+        self.assertEqual(res.data["results"][-1]["target"]["label"], "P0")
+        self.assertFalse(res.data["results"][-1]["unread"])
+        # walking back from the last page crosses from the archive into the live rows
+        last = self.client.get("/notifications/?cursor=&page_size=2")
+        last = self.client.get(self.client.get(last.data["next"]).data["next"])
+        back = self.client.get(last.data["previous"])
+        self.assertEqual([n["id"] for n in back.data["results"]], before[2:4])
+        self.assertEqual(len(self.client.get("/notifications/?unread=1").data["results"]), 2)
+
+    def test_full_recent_page_skips_the_archive(self):
+        from .archive import archive_notifications
+
+        archive_notifications()
+        # live page (with the EXISTS probe) + post targets; no archive reads
+        with self.assertNumQueries(2):
+            self.client.get("/notifications/?cursor=&page_size=2")
+        with self.assertNumQueries(4):
+            self.client.get("/notifications/?cursor=&page_size=5")
+
+
+@override_settings(
+    SECURE_SSL_REDIRECT=False,
+    NOTIFICATION_PUSH={"BACKEND": "local", "BUFFER": 3, "HEARTBEAT": 0.05, "MAX_AGE": 0.5},
+)
+class PushTests(APITestCase):
+    """SSE stream fed by notifications.push."""
+
+    def setUp(self):
+        from rest_framework.authtoken.models import Token
+
+        self.owner = User.objects.create_user(username="owner", password="pass1234")
+        self.fan = User.objects.create_user(username="fan", password="pass1234")
+        self.post = Post.objects.create(author=self.owner, title="P", content="x")
+        self.headers = {"Authorization": f"Token {Token.objects.create(user=self.owner).key}"}
+
+    async def test_subscription_is_bounded(self):
+        import threading
+        from .push import broker
+
+        sub = broker.subscribe(self.owner.pk)
+        try:
+            self.assertEqual(await sub.get(0.01), ([], 0))  # idle: times out quietly
+            # delivered from a writer thread
+            thread = threading.Thread(target=broker.deliver, args=([(self.owner.pk, i) for i in range(5)],))
+            thread.start()
+            thread.join()
+            self.assertEqual(await sub.get(1), ([2, 3, 4], 2))
+        finally:
+            broker.unsubscribe(sub)
+        self.assertEqual(broker.stats()["connections"], 0)
+
+    async def test_stream_pushes_new_notifications(self):
+        from asgiref.sync import sync_to_async
+
+        res = await self.async_client.get("/notifications/stream/", headers=self.headers)
+        self.assertEqual((res.status_code, res["Content-Type"]), (200, "text/event-stream"))
+        chunks = aiter(res.streaming_content)
+        self.assertTrue((await anext(chunks)).startswith(b"retry:"))  # subscribed from here on
+
+        def like():
+            with self.captureOnCommitCallbacks(execute=True):
+                create_notification(recipient=self.owner, actor=self.fan, verb="liked your post", target=self.post)
+            return Notification.objects.get()
+
+        notification = await sync_to_async(like)()
+        body = b"".join([chunk async for chunk in chunks]).decode()  # ends after MAX_AGE
+        self.assertIn("event: notification\n", body)
+        self.assertIn(f'"id":{notification.id},"verb":"liked your post"', body)
+        self.assertIn('"target":{"id":%d,"label":"P"}' % self.post.pk, body)
+        self.assertIn(": keep-alive", body)
+
+    async def test_last_event_id_replays_missed_rows(self):
+        from asgiref.sync import sync_to_async
+
+        def seed():
+            create_notification(recipient=self.owner, actor=self.fan, verb="followed you", target=self.owner)
+            return Notification.objects.get().timestamp
+
+        stamp = await sync_to_async(seed)()
+        earlier = (stamp - timedelta(seconds=1)).isoformat()
+        res = await self.async_client.get(
+            "/notifications/stream/", headers={**self.headers, "Last-Event-ID": earlier}
+        )
+        body = b"".join([chunk async for chunk in res.streaming_content]).decode()
+        self.assertEqual(body.count("event: notification\n"), 1)
+        self.assertIn('"verb":"followed you"', body)
+
+    async def test_replay_past_buffer_asks_for_resync(self):
+        from asgiref.sync import sync_to_async
+
+        def seed():
+            start = timezone.now() - timedelta(seconds=1)
+            for i in range(5):
+                post = Post.objects.create(author=self.owner, title=f"R{i}", content="x")
+                create_notification(recipient=self.owner, actor=self.fan, verb="liked your post", target=post)
+            return start.isoformat()
+
+        since = await sync_to_async(seed)()
+        res = await self.async_client.get(
+            "/notifications/stream/", headers={**self.headers, "Last-Event-ID": since}
+        )
+        body = b"".join([chunk async for chunk in res.streaming_content]).decode()
+        self.assertEqual(body.count("event: notification\n"), 3)  # BUFFER
+        self.assertIn('event: resync\ndata: {"dropped":2}', body)
+
+    async def test_stream_accepts_ticket_for_event_source(self):
+        from asgiref.sync import sync_to_async
+
+        ticket = (await sync_to_async(self.client.post)("/notifications/stream/ticket/", headers=self.headers)).data
+        res = await self.async_client.get(f"/notifications/stream/?ticket={ticket['ticket']}")
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue((await anext(aiter(res.streaming_content))).startswith(b"retry:"))
+        with override_settings(NOTIFICATION_PUSH={"TICKET_TTL": -1}):
+            res = await self.async_client.get(f"/notifications/stream/?ticket={ticket['ticket']}")
+        self.assertEqual(res.status_code, 401)
+        res = await self.async_client.get("/notifications/stream/?ticket=forged")
+        self.assertEqual(res.status_code, 401)
+
+    async def test_stream_requires_token(self):
+        res = await self.async_client.get("/notifications/stream/")
+        self.assertEqual(res.status_code, 401)
+
+
+class SocketPushBackendTests(TestCase):
+    def test_datagrams_reach_listening_processes(self):
+        import tempfile
+        import threading
+        from .push import SocketBackend
+
+        received, done = [], threading.Event()
+
+        def deliver(pairs):
+            received.extend(map(tuple, pairs))
+            done.set()
+
+        with tempfile.TemporaryDirectory() as directory:
+            with override_settings(NOTIFICATION_PUSH={"SOCKET_DIR": directory}):
+                listener, publisher = SocketBackend(), SocketBackend()
+            listener.listen(deliver)
+            open(f"{directory}/gone.sock", "w").close()  # stale file from a dead process
+            publisher.publish([(1, 10), (2, 20)])
+            self.assertTrue(done.wait(2))
+            self.assertEqual(received, [(1, 10), (2, 20)])
+            self.assertFalse(os.path.exists(f"{directory}/gone.sock"))
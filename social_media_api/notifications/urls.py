@@ -0,0 +1,12 @@
+from django.urls import path
+from .views import NotificationListView, UnreadCountView, MarkReadView, NotificationPipelineStatsView, StreamTicketView
+from .async_views import NotificationStreamView
+
+urlpatterns = [
+    path("notifications/", NotificationListView.as_view(), name="notification-list"),
+    path("notifications/unread-count/", UnreadCountView.as_view(), name="notification-unread-count"),
+    path("notifications/mark-read/", MarkReadView.as_view(), name="notification-mark-read"),
+    path("notifications/stream/", NotificationStreamView.as_view(), name="notification-stream"),
+    path("notifications/stream/ticket/", StreamTicketView.as_view(), name="notification-stream-ticket"),
+    path("notifications/pipeline/stats/", NotificationPipelineStatsView.as_view(), name="notification-pipeline-stats"),
+]
@@ -1,20 +1,37 @@
 from django.contrib.contenttypes.models import ContentType
-from .models import Notification
+from django.utils import timezone
+
+from .pipeline import NotificationEvent, dispatcher
+
+
+def _event(recipient, actor, verb, target=None):
+    target_ct_id = target_id = None
+    # If target passed is a model instance we can store it; otherwise no target.
+    if target is not None and hasattr(target, "_meta"):
+        target_ct_id = ContentType.objects.get_for_model(target).pk
+        target_id = target.pk
+    return NotificationEvent(
+        recipient_id=recipient.pk,
+        actor_id=actor.pk,
+        verb=verb,
+        target_ct_id=target_ct_id,
+        target_id=target_id,
+        created_at=timezone.now(),
+    )
+
 
 def create_notification(*, recipient, actor, verb, target=None):
-    kwargs = {
-        "recipient": recipient,
-        "actor": actor,
-        "verb": verb,
-    }
-    if target is not None:
-        kwargs["target_content_type"] = ContentType.objects.get_for_model(type(target) if not hasattr(target, "_meta") else target)
-        # If target passed is a model instance, ^ works. If you pass a class, adjust accordingly.
-        # Simpler:
-        if hasattr(target, "_meta"):
-            kwargs["target_content_type"] = ContentType.objects.get_for_model(target)
-            kwargs["target_object_id"] = target.pk
-        else:
-            # Fallback: no target id
-            kwargs.pop("target_content_type", None)
-    return Notification.objects.create(**kwargs)
+    """
+    Queue a notification for `recipient`. The row is written in a batch by
+    notifications.pipeline (coalesced with similar unread notifications),
+    so this adds no query to the caller apart from a cached ContentType lookup.
+    """
+    dispatcher.enqueue(_event(recipient, actor, verb, target))
+
+
+def create_notifications(notifications):
+    """
+    create_notification() for several at once: an iterable of its keyword
+    dicts. They are queued together, so even sync delivery writes one batch.
+    """
+    dispatcher.enqueue_many([_event(**kwargs) for kwargs in notifications])
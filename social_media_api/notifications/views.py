@@ -1,3 +1,123 @@
-from django.shortcuts import render
+from django.db.models import Exists
+from rest_framework import generics, permissions
+from accounts.authentication import CachedTokenAuthentication
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-# Create your views here.
+from social_media_api.pagination import KeysetPagination
+from .archive import needs_archive
+from .inbox import mark_read, unread_count
+from .models import ArchivedNotification, Notification
+from .pipeline import dispatcher
+from .push import _conf as push_conf, stream_ticket
+from .serializers import MarkReadSerializer, NotificationSerializer
+
+
+class InboxPagination(KeysetPagination):
+    """
+    Pages the live inbox and, when the view has one, its archive
+    (notifications.archive) as a single list. The archive is only read
+    for pages that can reach past the live rows (needs_archive()).
+    """
+    page_size = 20
+    ordering = ("-timestamp", "-id")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        archived = view.get_archived_queryset() if view is not None else None
+        if archived is None:
+            return super().paginate_queryset(queryset, request, view)
+
+        fields, descending = self._start(request, view)
+        if self._wants_count(request):
+            self.count = queryset.count() + archived.count()
+        cursor = request.query_params.get(self.cursor_query_param) or ""
+        queryset = queryset.annotate(has_archive=Exists(archived.values("pk")))
+        page, reverse = self._window(queryset, fields, descending, cursor)
+        rows = list(page)
+        if needs_archive(rows, self.page_size_value, reverse):
+            older, _ = self._window(archived, fields, descending, cursor)
+            rows = sorted(rows + list(older), key=lambda row: self._keys(row, fields), reverse=not reverse)
+            rows = rows[: self.page_size_value + 1]
+        return self._finish(rows, fields, cursor, reverse)
+
+
+class NotificationListView(generics.ListAPIView):
+    """
+    GET /notifications/  (Token auth)
+    Current user's inbox, newest first, cursor-paginated (`?cursor=`).
+    `?unread=1` limits to unread notifications.
+    Archived (old, read) notifications are listed after the live ones.
+    """
+    serializer_class = NotificationSerializer
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = InboxPagination
+
+    def unread_only(self):
+        return self.request.query_params.get("unread", "").lower() in ("1", "true", "yes")
+
+    def get_queryset(self):
+        qs = Notification.objects.filter(recipient=self.request.user)
+        if self.unread_only():
+            qs = qs.filter(unread=True)
+        return qs.select_related("actor").prefetch_related("target")
+
+    def get_archived_queryset(self):
+        """Archived rows for the inbox; None when they cannot match (everything archived is read)."""
+        if self.unread_only():
+            return None
+        qs = ArchivedNotification.objects.filter(recipient=self.request.user)
+        return qs.select_related("actor").prefetch_related("target")
+
+
+class UnreadCountView(APIView):
+    """
+    GET /notifications/unread-count/  (Token auth)
+    Returns: {unread_count}  (served from cache)
+    """
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        return Response({"unread_count": unread_count(request.user.pk)})
+
+
+class MarkReadView(APIView):
+    """
+    POST /notifications/mark-read/  (Token auth)
+    Body: {ids?: [..]}  -- omit ids to mark everything read
+    Returns: {updated, unread_count}
+    """
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = MarkReadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        updated = mark_read(request.user.pk, serializer.validated_data.get("ids"))
+        return Response({"updated": updated, "unread_count": unread_count(request.user.pk)})
+
+
+class StreamTicketView(APIView):
+    """
+    POST /notifications/stream/ticket/  (Token auth)
+    Returns: {ticket, expires_in}  -- open the stream with
+    `new EventSource("/notifications/stream/?ticket=" + ticket)`
+    """
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        return Response({"ticket": stream_ticket(request.user.pk), "expires_in": push_conf("TICKET_TTL")})
+
+
+class NotificationPipelineStatsView(APIView):
+    """
+    GET /notifications/pipeline/stats/  (staff only)
+    Throughput counters for the batched delivery pipeline in this process.
+    """
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(dispatcher.stats())
@@ -0,0 +1,39 @@
+"""
+Retention for posts_like.
+
+Likes on posts older than ARCHIVE["LIKES_POST_AFTER_DAYS"] are moved to
+ArchivedLike in batches (social_media_api.archival). Post.likes_count is
+unchanged. posts.likes and reconcile_post_counters treat archived likes
+as live ones, and so does the account export.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from social_media_api.archival import move_rows
+from .models import ArchivedLike, Like
+
+DEFAULTS = {
+    "LIKES_POST_AFTER_DAYS": 365,
+    "BATCH_SIZE": 1000,
+    "PAUSE": 0.0,
+}
+
+FIELDS = ("post_id", "user_id", "created_at")
+
+
+def _conf(name):
+    return getattr(settings, "ARCHIVE", {}).get(name, DEFAULTS[name])
+
+
+def archive_likes(batch_size=None, pause=None, dump=None, now=None, on_batch=None):
+    """Move likes on old posts to the archive. Returns rows moved."""
+    cutoff = (now or timezone.now()) - timedelta(days=_conf("LIKES_POST_AFTER_DAYS"))
+    return move_rows(
+        Like.objects.filter(post__created_at__lt=cutoff),
+        ArchivedLike, FIELDS,
+        batch_size=batch_size or _conf("BATCH_SIZE"),
+        pause=_conf("PAUSE") if pause is None else pause,
+        dump=dump, on_batch=on_batch,
+    )
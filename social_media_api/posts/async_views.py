@@ -0,0 +1,40 @@
+"""
+Async versions of the read-heavy post endpoints (see social_media_api.async_views).
+
+They return the same body as the cursor mode of their sync counterparts
+(`?cursor=`, `?page_size=`, `?count=1`) and only make sense under the ASGI
+application: run under WSGI, Django wraps each one in its own event loop.
+"""
+from social_media_api.async_views import AsyncReadView
+from social_media_api.pagination import KeysetPagination
+
+from .feed import FeedPagination
+from .models import Post
+from .serializers import PostSummarySerializer
+
+
+class AsyncFeedView(AsyncReadView):
+    """
+    GET /api/async/feed/  (Token auth)
+    Same posts and cursor body as GET /api/feed/?cursor=
+    Returns: {next, previous, results}  (+ count with ?count=1)
+    """
+
+    async def get(self, request):
+        paginator = FeedPagination()
+        page = await paginator.apaginate_feed(request.user, self.params, projection=PostSummarySerializer)
+        return self.respond(paginator.get_paginated_data(PostSummarySerializer(page, many=True).data))
+
+
+class AsyncPostListView(AsyncReadView):
+    """
+    GET /api/async/posts/  (public)
+    Newest posts first, same cursor body as GET /api/posts/?cursor=
+    Search, ?ordering= and the anonymous response cache stay on the sync endpoint.
+    """
+    require_auth = False
+
+    async def get(self, request):
+        paginator = KeysetPagination()
+        page = await paginator.apaginate_queryset(PostSummarySerializer.project(Post.objects.all()), self.params)
+        return self.respond(paginator.get_paginated_data(PostSummarySerializer(page, many=True).data))
@@ -0,0 +1,93 @@
+"""
+Conditional GET (ETag / Last-Modified) for list and detail endpoints.
+
+Validators are built from the rows themselves rather than from the rendered
+body, so a matching If-None-Match is answered with 304 before anything is
+serialized:
+
+  list    the fetched page itself: each row's id, timestamp and counters,
+          plus the total (`?page=N`) or the neighbouring keys (`?cursor=`).
+          Hashing rows rather than aggregating them means two changes that
+          cancel out (an unlike here, a like there) still change the ETag
+  detail  the object's updated_at and count fields (it is fetched anyway
+          for the permission check)
+
+Denormalized counters (likes_count, comments_count) change without touching
+updated_at, so they are part of the ETag. For such resources Last-Modified
+is sent for information only and If-Modified-Since is not honoured;
+clients should revalidate with If-None-Match.
+"""
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+
+class ConditionalGetMixin:
+    conditional_timestamp_field = "updated_at"
+    conditional_count_fields = ()
+
+    def get_conditional_extra(self):
+        """Extra state folded into list ETags (e.g. an ordering not derived from the rows)."""
+        return ()
+
+    def _validators(self, request, *parts):
+        # same rows can render differently per URL (pagination links) and format
+        seed = "|".join(map(str, (request.build_absolute_uri(), request.accepted_media_type, *parts)))
+        etag = 'W/"%s"' % hashlib.sha1(seed.encode()).hexdigest()
+        return etag, parts[0]
+
+    def _check(self, request, etag, last_modified):
+        honour_ims = not self.conditional_count_fields
+        return get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=int(last_modified.timestamp()) if last_modified and honour_ims else None,
+        )
+
+    def _finish(self, response, etag, last_modified):
+        if response.status_code == 200:
+            response["ETag"] = etag
+            if last_modified:
+                response["Last-Modified"] = http_date(last_modified.timestamp())
+        return response
+
+    def _row_state(self, row):
+        fields = ("pk", self.conditional_timestamp_field, *self.conditional_count_fields)
+        if isinstance(row, dict):  # values() rows (posts.projections)
+            return tuple(row["id" if f == "pk" else f] for f in fields)
+        return tuple(getattr(row, f) for f in fields)
+
+    def _paging_state(self):
+        keyset = self.paginator.keyset
+        if keyset is not None:
+            return keyset.next_keys, keyset.prev_keys, keyset.count
+        return (self.paginator.page.paginator.count,)
+
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+        rows = [self._row_state(row) for row in page]
+        last_modified = max((row[1] for row in rows if row[1] is not None), default=None)
+        etag, last_modified = self._validators(
+            request, last_modified, rows, *self._paging_state(), *self.get_conditional_extra(),
+        )
+        not_modified = self._check(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        response = self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return self._finish(response, etag, last_modified)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag, last_modified = self._validators(
+            request,
+            getattr(instance, self.conditional_timestamp_field),
+            instance.pk,
+            *(getattr(instance, f) for f in self.conditional_count_fields),
+        )
+        not_modified = self._check(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        response = Response(self.get_serializer(instance).data)
+        return self._finish(response, etag, last_modified)
@@ -0,0 +1,51 @@
+"""
+Denormalized counters on Post (comments_count, likes_count).
+
+Writers bump them with a single `UPDATE ... SET n = n + delta` so concurrent
+requests never lose increments; `reconcile_post_counters` recomputes them in
+bulk when they drift (e.g. after raw deletes or cascades).
+"""
+from django.db.models import Count, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import ArchivedLike, Post, Comment, Like
+from .response_cache import bump_version
+
+
+def bump(post_id, **deltas):
+    """bump(post.pk, comments_count=1) -> atomic in-database increment."""
+    return Post.objects.filter(pk=post_id).update(
+        **{field: F(field) + delta for field, delta in deltas.items()}
+    )
+
+
+def _count_of(model):
+    counts = (
+        model.objects.filter(post=OuterRef("pk"))
+        .order_by()
+        .values("post")
+        .annotate(n=Count("id"))
+        .values("n")
+    )
+    return Coalesce(Subquery(counts), Value(0))
+
+
+def reconcile_post_counters(batch_size=5000):
+    """Rewrite drifted Post counters in pk-range batches. Returns rows fixed."""
+    fixed = 0
+    last_id = 0
+    while True:
+        ids = list(
+            Post.objects.filter(pk__gt=last_id).order_by("pk").values_list("pk", flat=True)[:batch_size]
+        )
+        if not ids:
+            if fixed:
+                bump_version()
+            return fixed
+        last_id = ids[-1]
+        batch = Post.objects.filter(pk__gte=ids[0], pk__lte=last_id)
+        for field, count in (
+            ("comments_count", _count_of(Comment)),
+            ("likes_count", _count_of(Like) + _count_of(ArchivedLike)),  # archived likes still count
+        ):
+            fixed += batch.filter(~Q(**{field: count})).update(**{field: count})
@@ -0,0 +1,200 @@
+"""
+Materialized home feed (fan-out-on-write with a fan-out-on-read fallback).
+
+- fan_out_post(): copy a new post into every follower's feed
+- backfill_author(): seed a feed with an author's recent posts on follow
+- prune_author(): drop an author's posts from a feed on unfollow
+- FeedPagination: what FeedView (`?cursor=`) and AsyncFeedView read
+- feed_queryset(): the same posts as one queryset, for `?page=N`
+
+Authors with more than FEED_FANOUT_MAX_FOLLOWERS followers are not fanned
+out (one post would mean that many INSERTs); their posts are pulled at
+read time instead.
+
+A cursor page is read from FeedEntry on (owner, created_at, post_id), in
+index order, joining posts_post and the author for the returned rows only.
+Pull-author posts come from a second query limited to the same window
+(post_author_recent_idx). The two are merged by (created_at, id) in Python.
+Entries copy the post's created_at, so one cursor fits both sources.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+
+from social_media_api.pagination import KeysetPagination
+from .models import Post, FeedEntry
+
+DEFAULTS = {
+    "FEED_FANOUT_MAX_FOLLOWERS": 5000,
+    "FEED_BACKFILL_LIMIT": 200,
+    "FEED_BATCH_SIZE": 1000,
+}
+
+
+def _conf(name):
+    # read lazily so override_settings works in tests
+    return getattr(settings, name, DEFAULTS[name])
+
+
+def is_pull_author(author):
+    """True when `author` is too widely followed to fan out on write."""
+    # re-read the counter: `author` is often request.user, loaded before the latest follows
+    followers = type(author).objects.filter(pk=author.pk).values_list("followers_count", flat=True).first()
+    return (followers or 0) > _conf("FEED_FANOUT_MAX_FOLLOWERS")
+
+
+def _entry(owner_id, post):
+    return FeedEntry(
+        owner_id=owner_id, post_id=post.pk, author_id=post.author_id, created_at=post.created_at
+    )
+
+
+def fan_out_post(post):
+    """Write `post` into its author's followers' feeds. Returns rows written."""
+    if is_pull_author(post.author):
+        return 0
+    return _fan_out(post.author_id, [post])
+
+
+def fan_out_posts(posts):
+    """Bulk version of fan_out_post for posts from many authors (used by ingest)."""
+    by_author = {}
+    for post in posts:
+        by_author.setdefault(post.author_id, []).append(post)
+    if not by_author:
+        return 0
+    User = get_user_model()
+    pull = set(
+        User.objects.filter(pk__in=list(by_author), followers_count__gt=_conf("FEED_FANOUT_MAX_FOLLOWERS"))
+        .values_list("id", flat=True)
+    )
+    return sum(_fan_out(author_id, author_posts)
+               for author_id, author_posts in by_author.items() if author_id not in pull)
+
+
+def _fan_out(author_id, posts):
+    Follow = get_user_model().following.through
+    batch_size = _conf("FEED_BATCH_SIZE")
+    follower_ids = (
+        Follow.objects.filter(to_user_id=author_id)
+        .values_list("from_user_id", flat=True)
+        .iterator(chunk_size=batch_size)
+    )
+    written, batch = 0, []
+    for follower_id in follower_ids:
+        batch.extend(_entry(follower_id, post) for post in posts)
+        if len(batch) >= batch_size:
+            FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            written += len(batch)
+            batch = []
+    if batch:
+        FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+        written += len(batch)
+    return written
+
+
+def backfill_author(owner, author, limit=None):
+    """Seed `owner`'s feed with `author`'s most recent posts (called on follow)."""
+    if is_pull_author(author):
+        return 0
+    limit = limit or _conf("FEED_BACKFILL_LIMIT")
+    posts = Post.objects.filter(author=author).only("id", "author_id", "created_at")[:limit]
+    entries = [_entry(owner.pk, p) for p in posts]
+    FeedEntry.objects.bulk_create(entries, ignore_conflicts=True)
+    return len(entries)
+
+
+def prune_author(owner, author):
+    """Remove `author`'s posts from `owner`'s feed (called on unfollow)."""
+    deleted, _ = FeedEntry.objects.filter(owner=owner, author=author).delete()
+    return deleted
+
+
+def pull_author_ids(user):
+    """Followed authors whose posts are read on demand instead of materialized."""
+    return list(_pull_authors(user))
+
+
+def _pull_authors(user):
+    return user.following.filter(followers_count__gt=_conf("FEED_FANOUT_MAX_FOLLOWERS")).values_list("id", flat=True)
+
+
+def feed_queryset(user):
+    """
+    Posts in `user`'s home feed, newest first, as one queryset (used for
+    `?page=N`, which needs COUNT and OFFSET anyway). Cursor pages go through
+    FeedPagination instead.
+    """
+    cond = Q(pk__in=FeedEntry.objects.filter(owner=user).values("post_id"))
+    pull_ids = pull_author_ids(user)
+    if pull_ids:
+        cond |= Q(author_id__in=pull_ids)
+    return Post.objects.filter(cond).select_related("author").order_by("-created_at", "-id")
+
+
+class FeedPagination(KeysetPagination):
+    """
+    Keyset pages of a home feed: FeedEntry rows in index order, merged with
+    pull-author posts. Rows are Post instances, or values() rows when a
+    CompiledSerializer is passed as `projection`.
+    """
+    ordering = ("-created_at", "-id")
+    entry_fields = ("created_at", "post_id")
+
+    def _sources(self, user, pull_ids, projection):
+        entries = FeedEntry.objects.filter(owner=user)
+        pulled = Post.objects.filter(author_id__in=pull_ids)
+        if projection is None:
+            return entries.select_related("post__author"), pulled.select_related("author")
+        fields = projection.values_fields()
+        return entries.values(*("post__" + f for f in fields)), pulled.values(*fields)
+
+    @staticmethod
+    def _post(entry):
+        if isinstance(entry, dict):
+            return {key[len("post__"):]: value for key, value in entry.items()}
+        return entry.post
+
+    def _counts(self, user, pull_ids):
+        entries = FeedEntry.objects.filter(owner=user)
+        # posts fanned out before their author became a pull author are in both
+        pulled = Post.objects.filter(author_id__in=pull_ids).exclude(feed_entries__owner=user)
+        return entries, pulled
+
+    def _merge(self, rows, pulled, fields, reverse):
+        if not pulled:
+            return rows
+        by_id = {self._keys(row, ("id",))[0]: row for row in pulled}
+        by_id.update((self._keys(row, ("id",))[0], row) for row in rows)
+        merged = sorted(by_id.values(), key=lambda row: self._keys(row, fields), reverse=not reverse)
+        return merged[: self.page_size_value + 1]
+
+    def paginate_feed(self, user, pull_ids, request, view=None, projection=None):
+        fields, descending = self._start(request, view)
+        entries, pulled = self._sources(user, pull_ids, projection)
+        if self._wants_count(request):
+            counted, extra = self._counts(user, pull_ids)
+            self.count = counted.count() + (extra.count() if pull_ids else 0)
+        cursor = request.query_params.get(self.cursor_query_param) or ""
+        page, reverse = self._window(entries, self.entry_fields, descending, cursor)
+        rows = [self._post(entry) for entry in page]
+        if pull_ids:
+            pulled, _ = self._window(pulled, fields, descending, cursor)
+            rows = self._merge(rows, list(pulled), fields, reverse)
+        return self._finish(rows, fields, cursor, reverse)
+
+    async def apaginate_feed(self, user, request, view=None, projection=None):
+        """paginate_feed() for async views; pull authors are looked up here."""
+        pull_ids = [pk async for pk in _pull_authors(user)]
+        fields, descending = self._start(request, view)
+        entries, pulled = self._sources(user, pull_ids, projection)
+        if self._wants_count(request):
+            counted, extra = self._counts(user, pull_ids)
+            self.count = await counted.acount() + (await extra.acount() if pull_ids else 0)
+        cursor = request.query_params.get(self.cursor_query_param) or ""
+        page, reverse = self._window(entries, self.entry_fields, descending, cursor)
+        rows = [self._post(entry) async for entry in page]
+        if pull_ids:
+            pulled, _ = self._window(pulled, fields, descending, cursor)
+            rows = self._merge(rows, [row async for row in pulled], fields, reverse)
+        return self._finish(rows, fields, cursor, reverse)
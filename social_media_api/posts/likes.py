@@ -0,0 +1,141 @@
+"""
+Race-free like/unlike.
+
+add_likes() checks that the posts exist and inserts the missing likes in one
+statement:
+
+    INSERT INTO posts_like (post_id, user_id, created_at)
+    SELECT id, %s, %s FROM posts_post WHERE id IN (...)
+    ON CONFLICT (post_id, user_id) DO NOTHING
+    RETURNING post_id
+
+so concurrent double-taps cannot raise IntegrityError, and only rows that
+were really inserted bump Post.likes_count. The counter update uses
+UPDATE ... RETURNING, so callers get the new counts back without a second
+read. Backends without RETURNING (MySQL) fall back to the equivalent ORM
+calls.
+
+Likes on old posts may live in ArchivedLike (posts.archive): they block a
+second like and are removed by unlike, exactly like rows in posts_like.
+"""
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ArchivedLike, Post, Like
+from .response_cache import bump_post_versions
+
+
+def _supports_returning():
+    features = connection.features
+    return features.can_return_rows_from_bulk_insert and features.supports_ignore_conflicts
+
+
+def _ids_sql(ids):
+    return ", ".join(["%s"] * len(ids))
+
+
+def _adjust_counts(post_ids, delta):
+    """likes_count += delta for post_ids. Returns {post_id: (likes_count, author_id)}."""
+    if not post_ids:
+        return {}
+    post_ids = list(post_ids)
+    bump_post_versions(post_ids)  # raw UPDATE: no post_save
+    if _supports_returning():
+        qn = connection.ops.quote_name
+        sql = (
+            f"UPDATE {qn(Post._meta.db_table)} SET {qn('likes_count')} = {qn('likes_count')} + %s "
+            f"WHERE {qn('id')} IN ({_ids_sql(post_ids)}) RETURNING {qn('id')}, {qn('likes_count')}, {qn('author_id')}"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [delta, *post_ids])
+            return {pk: (count, author_id) for pk, count, author_id in cursor.fetchall()}
+    Post.objects.filter(pk__in=post_ids).update(likes_count=F("likes_count") + delta)
+    return read_counts(post_ids)
+
+
+def read_counts(post_ids):
+    """{post_id: (likes_count, author_id)} for posts that exist."""
+    return {
+        pk: (count, author_id)
+        for pk, count, author_id in Post.objects.filter(pk__in=list(post_ids))
+        .order_by()
+        .values_list("id", "likes_count", "author_id")
+    }
+
+
+def add_likes(user_id, post_ids):
+    """
+    Like every post in `post_ids` (missing posts are skipped).
+    Returns (created_ids, {post_id: (likes_count, author_id)} for created posts).
+    """
+    post_ids = sorted(set(post_ids))
+    if not post_ids:
+        return set(), {}
+    with transaction.atomic():
+        if _supports_returning():
+            qn = connection.ops.quote_name
+            now = Like._meta.get_field("created_at").get_db_prep_value(timezone.now(), connection)
+            sql = (
+                f"INSERT INTO {qn(Like._meta.db_table)} ({qn('post_id')}, {qn('user_id')}, {qn('created_at')}) "
+                f"SELECT {qn('id')}, %s, %s FROM {qn(Post._meta.db_table)} p WHERE {qn('id')} IN ({_ids_sql(post_ids)}) "
+                f"AND NOT EXISTS (SELECT 1 FROM {qn(ArchivedLike._meta.db_table)} a "
+                f"WHERE a.{qn('post_id')} = p.{qn('id')} AND a.{qn('user_id')} = %s) "
+                f"ON CONFLICT ({qn('post_id')}, {qn('user_id')}) DO NOTHING RETURNING {qn('post_id')}"
+            )
+            with connection.cursor() as cursor:
+                cursor.execute(sql, [user_id, now, *post_ids, user_id])
+                created = {row[0] for row in cursor.fetchall()}
+        else:
+            existing_posts = set(Post.objects.filter(pk__in=post_ids).values_list("id", flat=True))
+            already = set(
+                Like.objects.filter(user_id=user_id, post_id__in=existing_posts).values_list("post_id", flat=True)
+            ) | set(
+                ArchivedLike.objects.filter(user_id=user_id, post_id__in=existing_posts).values_list("post_id", flat=True)
+            )
+            created = existing_posts - already
+            Like.objects.bulk_create(
+                [Like(user_id=user_id, post_id=pk) for pk in created], ignore_conflicts=True
+            )
+        return created, _adjust_counts(created, 1)
+
+
+def remove_likes(user_id, post_ids):
+    """Unlike every post in `post_ids`. Returns (removed_ids, counts for removed posts)."""
+    post_ids = sorted(set(post_ids))
+    if not post_ids:
+        return set(), {}
+    with transaction.atomic():
+        if _supports_returning():
+            qn = connection.ops.quote_name
+            removed = set()
+            with connection.cursor() as cursor:
+                for table in (Like._meta.db_table, ArchivedLike._meta.db_table):
+                    cursor.execute(
+                        f"DELETE FROM {qn(table)} WHERE {qn('user_id')} = %s "
+                        f"AND {qn('post_id')} IN ({_ids_sql(post_ids)}) RETURNING {qn('post_id')}",
+                        [user_id, *post_ids],
+                    )
+                    removed.update(row[0] for row in cursor.fetchall())
+        else:
+            removed = set()
+            for model in (Like, ArchivedLike):
+                likes = model.objects.filter(user_id=user_id, post_id__in=post_ids)
+                removed.update(likes.values_list("post_id", flat=True))
+                likes.delete()
+        return removed, _adjust_counts(removed, -1)
+
+
+def apply_actions(user_id, actions):
+    """
+    Replay an ordered list of ("like" | "unlike", post_id) queued by a client
+    while offline; the last action per post wins.
+    Returns (final {post_id: wants_like}, liked_ids, unliked_ids, counts of changed posts).
+    """
+    final = {}
+    for action, post_id in actions:
+        final[post_id] = action == "like"
+    with transaction.atomic():
+        liked, like_counts = add_likes(user_id, [pk for pk, on in final.items() if on])
+        unliked, unlike_counts = remove_likes(user_id, [pk for pk, on in final.items() if not on])
+    return final, liked, unliked, {**like_counts, **unlike_counts}
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+from notifications.archive import archive_notifications
+from posts.archive import archive_likes
+from social_media_api.archival import NDJSONDump
+
+TABLES = {
+    "notifications": archive_notifications,
+    "likes": archive_likes,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Move read notifications and likes on old posts into their archive tables "
+        "(thresholds in settings.ARCHIVE), in short batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--only", choices=sorted(TABLES), help="Archive one table only.")
+        parser.add_argument("--batch-size", type=int, default=None, help="Rows per transaction.")
+        parser.add_argument("--pause", type=float, default=None, help="Seconds to sleep between batches.")
+        parser.add_argument(
+            "--dump", metavar="DIR",
+            help="Also write every archived row to DIR/<table>-<timestamp>.ndjson.gz.",
+        )
+
+    def handle(self, *args, **options):
+        names = [options["only"]] if options["only"] else list(TABLES)
+        verbose = options["verbosity"] > 1
+        for name in names:
+            dump = NDJSONDump(options["dump"], name) if options["dump"] else None
+            try:
+                moved = TABLES[name](
+                    batch_size=options["batch_size"], pause=options["pause"], dump=dump,
+                    on_batch=(lambda n, name=name: self.stdout.write(f"  {name}: {n} rows")) if verbose else None,
+                )
+            finally:
+                if dump is not None:
+                    dump.close()
+            line = f"{name}: {moved} rows archived"
+            if dump is not None and dump.rows:
+                line += f" (copy in {dump.path})"
+            self.stdout.write(self.style.SUCCESS(line + "."))
@@ -0,0 +1,52 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.ingest import ingest, read_records
+
+
+class Command(BaseCommand):
+    help = "Stream posts from an NDJSON or CSV file (optionally .gz) into the database in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File with one post per line/row: title, content, author (or author_id).")
+        parser.add_argument("--format", choices=["ndjson", "csv"], default=None,
+                            help="Defaults to the file extension.")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows per bulk_create/transaction.")
+        parser.add_argument("--author", default=None,
+                            help="Username to author every row (otherwise each row needs `author`).")
+        parser.add_argument("--progress-every", type=int, default=50, help="Print progress every N batches.")
+
+    def handle(self, *args, **options):
+        author = None
+        if options["author"]:
+            try:
+                author = get_user_model().objects.get(username=options["author"])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"No user named {options['author']!r}.")
+
+        every = max(options["progress_every"], 1)
+
+        def progress(report):
+            if report.batches % every == 0:
+                self.stdout.write(
+                    f"  {report.read} rows read, {report.created} created, "
+                    f"{report.error_count} invalid ({report.rows_per_second} rows/s)"
+                )
+
+        try:
+            records = read_records(options["path"], options["format"])
+            report = ingest(records, author=author, batch_size=options["batch_size"], on_batch=progress)
+        except OSError as exc:
+            raise CommandError(str(exc))
+
+        for error in report.errors[:20]:
+            self.stderr.write(f"row {error['row']}: {error['errors']}")
+        if report.fanout_skipped:
+            self.stderr.write(self.style.WARNING(
+                f"{report.fanout_skipped} posts were not added to followers' feeds "
+                f"(this database does not return ids from bulk inserts); run `rebuild_feeds`."
+            ))
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report.created} of {report.read} rows in {report.elapsed:.1f}s "
+            f"({report.rows_per_second} rows/s, {report.error_count} invalid)."
+        ))
@@ -0,0 +1,26 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from posts.feed import backfill_author
+from posts.models import FeedEntry
+
+
+class Command(BaseCommand):
+    help = "Rebuild materialized home feeds from the follow graph (run once after migrating)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=None,
+                            help="Posts per followed author to backfill (default FEED_BACKFILL_LIMIT).")
+        parser.add_argument("--clear", action="store_true", help="Delete all feed entries first.")
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        if options["clear"]:
+            FeedEntry.objects.all().delete()
+
+        written = 0
+        for user in User.objects.only("id").iterator(chunk_size=500):
+            for author in user.following.only("id"):
+                written += backfill_author(user, author, limit=options["limit"])
+
+        self.stdout.write(self.style.SUCCESS(f"Feed entries written: {written}"))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from accounts.utils import reconcile_follow_counters
+from posts.counters import reconcile_post_counters
+
+
+class Command(BaseCommand):
+    help = "Recompute denormalized comment/like/follower/following counters that have drifted."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000, help="Rows per UPDATE batch.")
+
+    def handle(self, *args, **options):
+        posts_fixed = reconcile_post_counters(batch_size=options["batch_size"])
+        users_fixed = reconcile_follow_counters(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Counters reconciled: {posts_fixed} post rows, {users_fixed} user rows updated."
+        ))
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.trending import update_trending
+
+
+class Command(BaseCommand):
+    help = "Fold new likes/comments into the trending ranking (run periodically, e.g. every minute)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None,
+                            help="Activity rows per transaction (default TRENDING['BATCH_SIZE']).")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        stats = update_trending(batch_size=options["batch_size"])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Trending updated in {elapsed:.2f}s: {stats['events']} new events "
+            f"({stats['skipped']} too old), {stats['posts']} posts rescored, {stats['pruned']} pruned."
+        ))
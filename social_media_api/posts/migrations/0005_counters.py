@@ -0,0 +1,40 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:56
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_counts(apps, schema_editor):
+    Post = apps.get_model("posts", "Post")
+
+    def count_of(model_name):
+        model = apps.get_model("posts", model_name)
+        counts = (
+            model.objects.filter(post=OuterRef("pk"))
+            .order_by().values("post").annotate(n=Count("id")).values("n")
+        )
+        return Coalesce(Subquery(counts), Value(0))
+
+    Post.objects.update(comments_count=count_of("Comment"), likes_count=count_of("Like"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0004_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_counts, migrations.RunPython.noop),
+    ]
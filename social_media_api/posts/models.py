@@ -9,29 +9,83 @@ class Post(models.Model):
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # denormalized; maintained by posts.counters, repaired by `reconcile_counters`
+    comments_count = models.PositiveIntegerField(default=0, editable=False)
+    likes_count = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # keyset pagination on (created_at, id)
+            models.Index(fields=["created_at", "id"], name="post_created_id_idx"),
+            # pull-author posts in the feed (posts.feed.FeedPagination)
+            models.Index(fields=["author", "-created_at", "-id"], name="post_author_recent_idx"),
+        ]
 
     def __str__(self):
         return f"{self.title} (by {self.author})"
 
 
 class Comment(models.Model):
+    """
+    Threaded via a materialized path: `path` is the zero-padded ids of the
+    ancestors and the comment itself ("0000000012/0000000045"). Ordering a
+    post's comments by path yields the thread depth-first with siblings in
+    creation order, and a subtree is the contiguous path range
+    (path + "/", path + "0"); both are single scans of comment_post_path_idx.
+    """
+    PATH_STEP = 10  # digits per id; ids up to 10**10 - 1
+    PATH_SEP = "/"
+    MAX_DEPTH = 20
+
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="comments")
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="comments"
     )
+    parent = models.ForeignKey(
+        "self", null=True, blank=True, on_delete=models.CASCADE, related_name="replies"
+    )
+    path = models.CharField(max_length=(PATH_STEP + 1) * (MAX_DEPTH + 1), default="", editable=False)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["created_at"]
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="comment_created_id_idx"),
+            models.Index(fields=["post", "path"], name="comment_post_path_idx"),
+        ]
 
     def __str__(self):
         return f"Comment by {self.author} on {self.post_id}"
 
+    @classmethod
+    def path_for(cls, pk, parent_path=""):
+        step = str(pk).zfill(cls.PATH_STEP)
+        return f"{parent_path}{cls.PATH_SEP}{step}" if parent_path else step
+
+    def subtree_range(self):
+        """(lower, upper) bounds: descendants have lower < path < upper."""
+        return self.path + self.PATH_SEP, self.path + chr(ord(self.PATH_SEP) + 1)
+
+    def descendants(self):
+        lower, upper = self.subtree_range()
+        return Comment.objects.filter(post_id=self.post_id, path__gt=lower, path__lt=upper)
+
+    def save(self, *args, **kwargs):
+        creating = self._state.adding
+        if creating and self.parent_id:
+            parent = self.parent
+            self.post_id = parent.post_id
+            self.depth = parent.depth + 1
+        super().save(*args, **kwargs)
+        if creating and not self.path:
+            # the path ends in our own id, which only exists after the INSERT
+            self.path = self.path_for(self.pk, self.parent.path if self.parent_id else "")
+            Comment.objects.filter(pk=self.pk).update(path=self.path)
+
 class Like(models.Model):  # <-- "Like"
     post = models.ForeignKey("Post", on_delete=models.CASCADE, related_name="likes")
     user = models.ForeignKey(  # <-- "user"
@@ -44,4 +98,81 @@ class Like(models.Model):  # <-- "Like"
         ordering = ["-created_at"]
 
     def __str__(self):
-        return f"{self.user} liked Post#{self.post_id}"
\ No newline at end of file
+        return f"{self.user} liked Post#{self.post_id}"
+
+class ArchivedLike(models.Model):
+    """
+    Likes on old posts moved out of posts_like by `manage.py archive_old_rows`
+    (posts.archive). Still count as likes: liking again is a no-op and unlike
+    removes them (posts.likes).
+    """
+    id = models.BigIntegerField(primary_key=True)  # the original Like id
+    post = models.ForeignKey("Post", on_delete=models.CASCADE, related_name="archived_likes")
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+")
+    created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ("post", "user")
+
+    def __str__(self):
+        return f"{self.user_id} liked Post#{self.post_id} (archived)"
+
+class FeedEntry(models.Model):
+    """
+    Materialized home-feed row: `owner` sees `post` in /api/feed/.
+    Written on post create (fan-out-on-write) and on follow (backfill);
+    removed on unfollow and, via CASCADE, when the post is deleted.
+    `author` and `created_at` are copied from the post so pruning is a
+    lookup on (owner, author) and a feed page is a range scan of
+    (owner, -created_at, -post) that joins only the rows it returns.
+    """
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="feed_entries"
+    )
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="feed_entries")
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+"
+    )
+    created_at = models.DateTimeField(db_index=False)
+
+    class Meta:
+        unique_together = ("owner", "post")
+        ordering = ["-created_at", "-post_id"]
+        indexes = [
+            models.Index(fields=["owner", "-created_at", "-post"], name="feed_owner_recent_idx"),
+            models.Index(fields=["owner", "author"], name="feed_owner_author_idx"),
+        ]
+
+    def __str__(self):
+        return f"Post#{self.post_id} in feed of {self.owner_id}"
+
+
+class TrendingPost(models.Model):
+    """
+    Compact "hot" ranking maintained by posts.trending.update_trending().
+    `score` is log(sum of weight * 2 ** ((event_time - EPOCH) / half_life)),
+    i.e. the decayed activity score shifted by a constant, so rows compare
+    correctly without ever being re-decayed. Cold posts are pruned each run.
+    """
+    post = models.OneToOneField(Post, on_delete=models.CASCADE, primary_key=True, related_name="trending")
+    score = models.FloatField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-score"]
+        indexes = [
+            models.Index(fields=["-score"], name="trending_score_idx"),
+        ]
+
+    def __str__(self):
+        return f"Post#{self.post_id} hot={self.score:.3f}"
+
+
+class ActivityWatermark(models.Model):
+    """Highest activity row id (per source table) already folded into TrendingPost."""
+    name = models.CharField(max_length=50, primary_key=True)
+    last_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.last_id}"
@@ -0,0 +1,162 @@
+"""
+values()-based read path for list endpoints.
+
+compile_serializer(PostSerializer) walks the serializer's fields once and
+generates a plain function that builds the same dicts straight from
+`queryset.values(...)` rows, for example
+
+    def render(row):
+        return {"id": row["id"],
+                "author": {"id": row["author__id"], "username": row["author__username"]},
+                ...
+                "created_at": c5(row["created_at"]), ...}
+
+so a page skips model instantiation and DRF's per-field get_attribute /
+to_representation calls while producing byte-identical JSON. Only plain
+fields and nested serializers are supported; anything else (method fields,
+source="*", many=True) raises ImproperlyConfigured at compile time.
+
+Counts come from the denormalized Post columns, so no annotation is needed.
+"""
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.timezone import get_current_timezone
+from rest_framework import ISO_8601, fields as drf_fields, serializers
+from rest_framework.settings import api_settings
+
+# fields whose values() output already is their representation
+PASSTHROUGH = (
+    drf_fields.IntegerField, drf_fields.CharField, drf_fields.BooleanField, drf_fields.ReadOnlyField,
+)
+
+
+def _datetime_converter(field):
+    output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+    if output_format is None or output_format.lower() != ISO_8601 or not settings.USE_TZ:
+        return _fallback(field)
+    fixed_tz = getattr(field, "timezone", None)
+
+    def convert(value):
+        if not value:
+            return None
+        if value.tzinfo is None:  # naive values: let DRF apply its checks
+            return field.to_representation(value)
+        # like DRF, honour the timezone active for this request
+        value = value.astimezone(fixed_tz or get_current_timezone()).isoformat()
+        return value[:-6] + "Z" if value.endswith("+00:00") else value
+    return convert
+
+
+def _fallback(field):
+    def convert(value):
+        return None if value is None else field.to_representation(value)
+    return convert
+
+
+def _plan(serializer, prefix=""):
+    """[(output name, values() key or nested plan, converter or None)]"""
+    plan = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if field.source == "*" or isinstance(field, (serializers.SerializerMethodField, serializers.ListSerializer)):
+            raise ImproperlyConfigured(f"{type(serializer).__name__}.{name} cannot be rendered from values()")
+        key = prefix + field.source.replace(".", "__")
+        if isinstance(field, serializers.BaseSerializer):
+            plan.append((name, _plan(field, key + "__"), None))
+        elif isinstance(field, drf_fields.DateTimeField):
+            plan.append((name, key, _datetime_converter(field)))
+        elif isinstance(field, PASSTHROUGH):
+            plan.append((name, key, None))
+        else:
+            plan.append((name, key, _fallback(field)))
+    return plan
+
+
+def _source(plan, namespace):
+    items = []
+    for name, key, convert in plan:
+        if isinstance(key, list):
+            value = _source(key, namespace)
+        elif convert is None:
+            value = f"row[{key!r}]"
+        else:
+            ref = f"c{len(namespace)}"
+            namespace[ref] = convert
+            value = f"{ref}(row[{key!r}])"
+        items.append(f"{name!r}: {value}")
+    return "{" + ", ".join(items) + "}"
+
+
+def _keys(plan):
+    for _, key, _ in plan:
+        if isinstance(key, list):
+            yield from _keys(key)
+        else:
+            yield key
+
+
+class CompiledSerializer:
+    """
+    Drop-in for `serializer_class(rows, many=True).data` on values() rows.
+    The render function is generated on first use (fields need the app registry).
+    """
+    serializer_class = None
+    _render = None
+    _values_fields = None
+
+    def __init__(self, instance=None, many=False, **kwargs):
+        self.instance = instance
+        self.many = many
+
+    @classmethod
+    def compile(cls):
+        if cls._render is None:
+            plan = _plan(cls.serializer_class())
+            namespace = {}
+            source = f"def render(row):\n    return {_source(plan, namespace)}\n"
+            exec(compile(source, f"<compiled {cls.serializer_class.__name__}>", "exec"), namespace)
+            cls._values_fields = tuple(dict.fromkeys(_keys(plan)))
+            cls._render = staticmethod(namespace["render"])
+        return cls
+
+    @classmethod
+    def values_fields(cls):
+        return cls.compile()._values_fields
+
+    @classmethod
+    def project(cls, queryset):
+        """`queryset` as the values() rows this serializer renders."""
+        return queryset.values(*cls.values_fields())
+
+    @property
+    def data(self):
+        render = self.compile()._render
+        if self.many:
+            return [render(row) for row in self.instance]
+        return render(self.instance)
+
+
+def compile_serializer(serializer_class):
+    return type(f"Compiled{serializer_class.__name__}", (CompiledSerializer,), {"serializer_class": serializer_class})
+
+
+class ProjectedListMixin:
+    """
+    Generic list views: page a values() projection and render it with
+    `list_serializer_class` (a CompiledSerializer) instead of model instances.
+    """
+    list_serializer_class = None
+
+    def _projecting(self):
+        return self.list_serializer_class is not None and getattr(self, "action", "list") == "list"
+
+    def paginate_queryset(self, queryset):
+        if self._projecting():
+            queryset = self.list_serializer_class.project(queryset)
+        return super().paginate_queryset(queryset)
+
+    def get_serializer(self, *args, **kwargs):
+        if self._projecting():
+            return self.list_serializer_class(*args, **kwargs)
+        return super().get_serializer(*args, **kwargs)
@@ -0,0 +1,205 @@
+"""
+Response cache for anonymous reads of PostViewSet (list and retrieve).
+
+Rendered responses are stored in the Django cache under
+
+    posts:resp:<version>.<counter version>:<sha1(path, sorted query, media type)>  list, trending
+    posts:resp:<version>.<post version>:<sha1(...)>                                 detail
+
+Changes to posts themselves (create, edit, delete, bulk ingest, author
+renames, a trending refresh) bump the global <version> (see posts.signals
+and bump_version()), so stale keys are simply never read again and expire
+on their own.
+
+Counter-only writes (likes, comments) are far more frequent and only move
+likes_count / comments_count. They bump the version of the posts they touch
+and the counter version (bump_post_versions()): every list page may show
+those counters and is dropped, while other posts' detail responses stay.
+
+Stampede protection: an entry is fresh for TTL seconds and kept for a
+further STALE_TTL. The first request to find it stale takes a short lock
+(cache.add) and recomputes while everyone else keeps getting the stale
+copy. On a cold miss, requests that lose the lock wait up to WAIT seconds
+for the winner before computing themselves.
+
+settings.POST_RESPONSE_CACHE:
+    ENABLED       off under the test runner except where tests opt in
+    TTL           seconds an entry is served without revalidation
+    STALE_TTL     extra seconds a stale entry may be served during a recompute
+    LOCK_TIMEOUT  seconds the recompute lock is held at most
+    WAIT          seconds a cold-miss request waits for another worker
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import urlencode
+
+DEFAULTS = {
+    "ENABLED": True,
+    "TTL": 30,
+    "STALE_TTL": 60,
+    "LOCK_TIMEOUT": 10,
+    "WAIT": 2.0,
+}
+
+VERSION_KEY = "posts:resp:version"
+POST_VERSION_KEY = "posts:resp:post:{}"
+COUNTER_VERSION_KEY = "posts:resp:counters"
+KEPT_HEADERS = ("ETag", "Last-Modified", "Vary", "Allow")
+POLL_INTERVAL = 0.05
+
+_stats = {"hits": 0, "stale_hits": 0, "misses": 0, "recomputes": 0, "waits": 0}
+
+
+def _conf(name):
+    return getattr(settings, "POST_RESPONSE_CACHE", {}).get(name, DEFAULTS[name])
+
+
+def current_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # start from the clock so a lost version key never revives old entries
+        cache.add(VERSION_KEY, int(time.time() * 1000), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def _bump():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, int(time.time() * 1000), None)
+
+
+def bump_version():
+    """Invalidate every cached post response, now and again once the transaction commits."""
+    _bump()
+    # a reader between the first bump and the commit may have cached pre-commit rows
+    transaction.on_commit(_bump)
+
+
+def _bump_posts(post_ids):
+    # a fresh value rather than incr: one round trip for any number of posts;
+    # the key outlives every entry stored under its previous value
+    stamp = time.time_ns()
+    versions = {POST_VERSION_KEY.format(pk): stamp for pk in post_ids}
+    versions[COUNTER_VERSION_KEY] = stamp
+    cache.set_many(versions, _conf("TTL") + _conf("STALE_TTL"))
+
+
+def bump_post_versions(post_ids):
+    """Invalidate cached responses showing the counters of `post_ids`: their details and all lists."""
+    post_ids = list(post_ids)
+    if not post_ids:
+        return
+    _bump_posts(post_ids)
+    transaction.on_commit(lambda: _bump_posts(post_ids))
+
+
+def cache_key(request, post_id=None):
+    query = urlencode(sorted((k, v) for k, values in request.GET.lists() for v in values))
+    seed = "|".join((request.path, query, request.META.get("HTTP_ACCEPT", "")))
+    sub_key = POST_VERSION_KEY.format(post_id) if post_id is not None else COUNTER_VERSION_KEY
+    version = f"{current_version()}.{cache.get(sub_key, 0)}"
+    return f"posts:resp:{version}:{hashlib.sha1(seed.encode()).hexdigest()}"
+
+
+def _store(key, response):
+    entry = {
+        "fresh_until": time.time() + _conf("TTL"),
+        "content": response.content,
+        "content_type": response["Content-Type"],
+        "headers": {h: response[h] for h in KEPT_HEADERS if h in response},
+    }
+    cache.set(key, entry, _conf("TTL") + _conf("STALE_TTL"))
+
+
+def _replay(request, entry, state):
+    response = HttpResponse(entry["content"], content_type=entry["content_type"])
+    for header, value in entry["headers"].items():
+        response[header] = value
+    response["X-Cache"] = state
+    return get_conditional_response(request, etag=entry["headers"].get("ETag"), response=response)
+
+
+def _compute(key, render):
+    response = render()
+    if response.status_code == 200:
+        _store(key, response)
+    response["X-Cache"] = "MISS"
+    return response
+
+
+def serve(request, render, post_id=None):
+    """
+    Return a cached response for `request`, calling `render()` (a rendered
+    HttpResponse) on a miss. Pass `post_id` for responses about one post.
+    """
+    key = cache_key(request, post_id)
+    lock = key + ":lock"
+    entry = cache.get(key)
+
+    if entry is not None:
+        if entry["fresh_until"] > time.time():
+            _stats["hits"] += 1
+            return _replay(request, entry, "HIT")
+        if not cache.add(lock, 1, _conf("LOCK_TIMEOUT")):
+            _stats["stale_hits"] += 1
+            return _replay(request, entry, "STALE")
+        try:
+            _stats["recomputes"] += 1
+            return _compute(key, render)
+        finally:
+            cache.delete(lock)
+
+    _stats["misses"] += 1
+    if not cache.add(lock, 1, _conf("LOCK_TIMEOUT")):
+        _stats["waits"] += 1
+        deadline = time.monotonic() + _conf("WAIT")
+        while time.monotonic() < deadline:
+            time.sleep(POLL_INTERVAL)
+            entry = cache.get(key)
+            if entry is not None:
+                return _replay(request, entry, "HIT")
+        return _compute(key, render)
+    try:
+        return _compute(key, render)
+    finally:
+        cache.delete(lock)
+
+
+def stats():
+    s = dict(_stats)
+    served = s["hits"] + s["stale_hits"] + s["misses"]
+    s["hit_rate"] = round((s["hits"] + s["stale_hits"]) / served, 4) if served else None
+    return s
+
+
+class AnonymousResponseCacheMixin:
+    """Serve anonymous GET/HEAD list and retrieve from `serve()`; everything else passes through."""
+    cached_actions = ("list", "retrieve")
+
+    def _is_cacheable(self, request):
+        if not _conf("ENABLED") or request.method not in ("GET", "HEAD"):
+            return False
+        if "HTTP_AUTHORIZATION" in request.META:
+            return False
+        return self.action_map.get(request.method.lower()) in self.cached_actions
+
+    def dispatch(self, request, *args, **kwargs):
+        if not self._is_cacheable(request):
+            return super().dispatch(request, *args, **kwargs)
+
+        def render():
+            response = super(AnonymousResponseCacheMixin, self).dispatch(request, *args, **kwargs)
+            if hasattr(response, "render"):
+                response.render()
+            return response
+
+        post_id = kwargs.get("pk") if self.action_map.get(request.method.lower()) == "retrieve" else None
+        return serve(request, render, post_id)
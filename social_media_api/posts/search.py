@@ -0,0 +1,77 @@
+"""
+Full-text search over Post.title + Post.content.
+
+The index lives in the database and is maintained by it, so creates,
+updates, deletes and bulk_create stay in sync without application hooks
+(see migration 0006_post_search_index):
+
+  - SQLite:   FTS5 external-content table `posts_post_fts`, kept current by triggers
+  - Postgres: GIN index on to_tsvector('english', title || ' ' || content)
+
+Every search term is matched as a prefix ("djan" finds "django"). Results
+are ranked with bm25 (SQLite) or ts_rank (Postgres). Other backends fall
+back to icontains.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import BaseFilterBackend
+
+MAX_TERMS = 8
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+PG_DOCUMENT = "to_tsvector('english', coalesce({t}.title, '') || ' ' || coalesce({t}.content, ''))"
+
+
+def search_terms(text):
+    return _TERM.findall(text or "")[:MAX_TERMS]
+
+
+def search_posts(queryset, text):
+    """Filter `queryset` to posts matching every term; annotates `search_rank` (higher is better)."""
+    terms = search_terms(text)
+    if not terms:
+        return queryset
+    table = queryset.model._meta.db_table
+    vendor = connection.vendor
+
+    if vendor == "sqlite":
+        match = " ".join(f'"{t}"*' for t in terms)
+        return queryset.filter(
+            pk__in=RawSQL("SELECT rowid FROM posts_post_fts WHERE posts_post_fts MATCH %s", [match])
+        ).annotate(search_rank=RawSQL(
+            "SELECT -bm25(posts_post_fts) FROM posts_post_fts "
+            f'WHERE posts_post_fts MATCH %s AND posts_post_fts.rowid = "{table}"."id"',
+            [match],
+        ))
+
+    if vendor == "postgresql":
+        tsquery = " & ".join(f"{t}:*" for t in terms)
+        document = PG_DOCUMENT.format(t=f'"{table}"')
+        return queryset.annotate(
+            search_rank=RawSQL(f"ts_rank({document}, to_tsquery('english', %s))", [tsquery])
+        ).extra(where=[f"{document} @@ to_tsquery('english', %s)"], params=[tsquery])
+
+    cond = Q()
+    for term in terms:
+        cond &= Q(title__icontains=term) | Q(content__icontains=term)
+    return queryset.filter(cond)
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """
+    `?search=` backed by the full-text index. Results are ordered by relevance
+    unless the client also passes `?ordering=`, so list it after OrderingFilter.
+    """
+    search_param = "search"
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, "")
+        if not search_terms(text):
+            return queryset
+        queryset = search_posts(queryset, text)
+        if "ordering" not in request.query_params and "search_rank" in queryset.query.annotations:
+            queryset = queryset.order_by("-search_rank", "-id")
+        return queryset
@@ -1,6 +1,7 @@
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
 from .models import Post, Comment
+from .projections import compile_serializer
 
 User = get_user_model()
 
@@ -14,14 +15,43 @@ class CommentSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Comment
-        fields = ("id", "post", "author", "content", "created_at", "updated_at")
-        read_only_fields = ("id", "author", "created_at", "updated_at")
+        fields = ("id", "post", "parent", "depth", "author", "content", "created_at", "updated_at")
+        read_only_fields = ("id", "author", "depth", "created_at", "updated_at")
+
+    def validate(self, attrs):
+        parent = attrs.get("parent")
+        if self.instance is not None:
+            # a comment cannot be moved to another post or thread
+            attrs.pop("post", None)
+            attrs.pop("parent", None)
+        elif parent is not None:
+            if parent.post_id != attrs["post"].pk:
+                raise serializers.ValidationError({"parent": "Parent comment belongs to another post."})
+            if parent.depth + 1 > Comment.MAX_DEPTH:
+                raise serializers.ValidationError({"parent": "Thread is too deep to reply here."})
+        return attrs
 
 class PostSerializer(serializers.ModelSerializer):
     author = UserMiniSerializer(read_only=True)
-    comments_count = serializers.IntegerField(source="comments.count", read_only=True)
 
     class Meta:
         model = Post
-        fields = ("id", "author", "title", "content", "created_at", "updated_at", "comments_count")
-        read_only_fields = ("id", "author", "created_at", "updated_at", "comments_count")
+        fields = (
+            "id", "author", "title", "content", "created_at", "updated_at",
+            "comments_count", "likes_count",
+        )
+        # counts are denormalized columns on Post: no per-row COUNT queries
+        read_only_fields = ("id", "author", "created_at", "updated_at", "comments_count", "likes_count")
+
+
+# PostSerializer for list pages, rendered from Post.objects.values() rows (posts.projections)
+PostSummarySerializer = compile_serializer(PostSerializer)
+
+
+class LikeActionSerializer(serializers.Serializer):
+    post = serializers.IntegerField(min_value=1)
+    action = serializers.ChoiceField(choices=("like", "unlike"))
+
+
+class LikeBatchSerializer(serializers.Serializer):
+    actions = LikeActionSerializer(many=True, allow_empty=False, max_length=500)
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Post, Comment
+from .response_cache import bump_post_versions, bump_version
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_responses(sender, **kwargs):
+    bump_version()
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_commented_post(sender, instance, **kwargs):
+    # comments only move the post's comments_count
+    bump_post_versions([instance.post_id])
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_author_responses(sender, instance, created, update_fields=None, **kwargs):
+    # author usernames are embedded in posts; last_login and counter saves are not
+    if created or (update_fields is not None and "username" not in update_fields):
+        return
+    bump_version()
@@ -1,3 +1,759 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
 
-# Create your tests here.
+from accounts.utils import follow
+from .models import Post, FeedEntry, Like
+
+User = get_user_model()
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class FeedTests(APITestCase):
+    """
+    Materialized feed:
+      - fan-out on post create, backfill on follow, prune on unfollow
+      - CASCADE cleanup on post delete
+      - pull fallback for authors above FEED_FANOUT_MAX_FOLLOWERS
+    """
+
+    def setUp(self):
+        self.alice = User.objects.create_user(username="alice", password="pass1234")
+        self.bob = User.objects.create_user(username="bob", password="pass1234")
+
+        self.alice_client = APIClient()
+        self.alice_client.force_authenticate(user=self.alice)
+        self.bob_client = APIClient()
+        self.bob_client.force_authenticate(user=self.bob)
+
+    def feed_ids(self):
+        res = self.alice_client.get("/api/feed/")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [p["id"] for p in res.data["results"]]
+
+    def test_new_post_fans_out_to_followers(self):
+        self.alice_client.post(f"/follow/{self.bob.id}/")
+        res = self.bob_client.post("/api/posts/", {"title": "Hi", "content": "first"}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(FeedEntry.objects.filter(owner=self.alice, post_id=res.data["id"]).exists())
+        self.assertEqual(self.feed_ids(), [res.data["id"]])
+
+    def test_follow_backfills_and_unfollow_prunes(self):
+        older = Post.objects.create(author=self.bob, title="Old", content="x")
+        self.alice_client.post(f"/follow/{self.bob.id}/")
+        self.assertEqual(self.feed_ids(), [older.id])
+
+        self.alice_client.post(f"/unfollow/{self.bob.id}/")
+        self.assertEqual(self.feed_ids(), [])
+        self.assertFalse(FeedEntry.objects.filter(owner=self.alice).exists())
+
+    def test_deleted_post_leaves_feed(self):
+        self.alice_client.post(f"/follow/{self.bob.id}/")
+        res = self.bob_client.post("/api/posts/", {"title": "Bye", "content": "x"}, format="json")
+        self.bob_client.delete(f"/api/posts/{res.data['id']}/")
+        self.assertEqual(self.feed_ids(), [])
+
+    @override_settings(FEED_FANOUT_MAX_FOLLOWERS=0)
+    def test_widely_followed_author_is_pulled_on_read(self):
+        self.alice_client.post(f"/follow/{self.bob.id}/")
+        res = self.bob_client.post("/api/posts/", {"title": "Big", "content": "x"}, format="json")
+        self.assertFalse(FeedEntry.objects.exists())
+        self.assertEqual(self.feed_ids(), [res.data["id"]])
+
+
+    @override_settings(FEED_FANOUT_MAX_FOLLOWERS=1)
+    def test_cursor_pages_merge_entries_with_pull_authors(self):
+        carol = User.objects.create_user(username="carol", password="pass1234")
+        follow(self.alice, self.bob)
+        follow(self.alice, carol)
+        early = Post.objects.create(author=carol, title="C0", content="x")
+        FeedEntry.objects.create(owner=self.alice, post=early, author=carol, created_at=early.created_at)
+        User.objects.filter(pk=carol.pk).update(followers_count=2)  # carol is pulled from now on
+        for i in range(3):
+            self.bob_client.post("/api/posts/", {"title": f"B{i}", "content": "x"}, format="json")
+            Post.objects.create(author=carol, title=f"C{i + 1}", content="x")
+
+        expected = [p["id"] for p in self.alice_client.get("/api/feed/?page_size=100").data["results"]]
+        self.assertEqual(len(expected), 7)
+        seen, url = [], "/api/feed/?cursor=&page_size=2&count=1"
+        with CaptureQueriesContext(connection) as ctx:
+            while url:
+                res = self.alice_client.get(url)
+                self.assertEqual(res.data["count"], 7)
+                seen += [p["id"] for p in res.data["results"]]
+                url = res.data["next"]
+        self.assertEqual(seen, expected)
+        pages = [q["sql"] for q in ctx.captured_queries if "LIMIT" in q["sql"] and "feedentry" in q["sql"]]
+        self.assertTrue(all('FROM "posts_feedentry"' in sql for sql in pages))
+        back = self.alice_client.get(res.data["previous"])
+        self.assertEqual([p["id"] for p in back.data["results"]], expected[4:6])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class KeysetPaginationTests(APITestCase):
+    """Cursor mode on /api/posts/: stable under inserts, optional count, page mode unchanged."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="writer", password="pass1234")
+        self.posts = [
+            Post.objects.create(author=self.user, title=f"P{i}", content="x") for i in range(5)
+        ]
+        self.newest_first = [p.id for p in reversed(self.posts)]
+
+    def test_walk_forward_and_back(self):
+        res = self.client.get("/api/posts/?cursor=&page_size=2")
+        self.assertEqual([p["id"] for p in res.data["results"]], self.newest_first[:2])
+        self.assertNotIn("count", res.data)
+        self.assertIsNone(res.data["previous"])
+
+        # rows inserted while scrolling must not shift the next page
+        Post.objects.create(author=self.user, title="late", content="x")
+        res = self.client.get(res.data["next"])
+        self.assertEqual([p["id"] for p in res.data["results"]], self.newest_first[2:4])
+
+        res = self.client.get(res.data["previous"])
+        self.assertEqual([p["id"] for p in res.data["results"]], self.newest_first[:2])
+
+    def test_last_page_and_count(self):
+        res = self.client.get("/api/posts/?cursor=&page_size=3&count=1")
+        self.assertEqual(res.data["count"], 5)
+        res = self.client.get(res.data["next"])
+        self.assertEqual([p["id"] for p in res.data["results"]], self.newest_first[3:])
+        self.assertIsNone(res.data["next"])
+
+    def test_bad_cursor_is_404(self):
+        res = self.client.get("/api/posts/?cursor=garbage")
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_page_number_mode_still_default(self):
+        res = self.client.get("/api/posts/?page=2&page_size=2")
+        self.assertEqual(res.data["count"], 5)
+        self.assertEqual([p["id"] for p in res.data["results"]], self.newest_first[2:4])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class CounterTests(APITestCase):
+    """Denormalized comments/likes counters and the reconcile command."""
+
+    def setUp(self):
+        self.author = User.objects.create_user(username="author", password="pass1234")
+        self.fan = User.objects.create_user(username="fan", password="pass1234")
+        self.post = Post.objects.create(author=self.author, title="T", content="x")
+        self.fan_client = APIClient()
+        self.fan_client.force_authenticate(user=self.fan)
+
+    def test_comment_and_like_paths_keep_counts(self):
+        res = self.fan_client.post("/api/comments/", {"post": self.post.id, "content": "hi"}, format="json")
+        self.fan_client.post(f"/api/posts/{self.post.id}/like/")
+        self.fan_client.post(f"/api/posts/{self.post.id}/like/")  # duplicate like is a no-op
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.comments_count, self.post.likes_count), (1, 1))
+
+        self.fan_client.delete(f"/api/comments/{res.data['id']}/")
+        self.fan_client.post(f"/api/posts/{self.post.id}/unlike/")
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.comments_count, self.post.likes_count), (0, 0))
+
+    def test_list_serializes_counts_without_extra_queries(self):
+        for i in range(5):
+            Post.objects.create(author=self.author, title=f"P{i}", content="x")
+        # COUNT(*) for the page + one SELECT ... JOIN author
+        with self.assertNumQueries(2):
+            res = self.client.get("/api/posts/")
+        self.assertIn("likes_count", res.data["results"][0])
+
+    def test_reconcile_counters_fixes_drift(self):
+        from django.core.management import call_command
+
+        self.post.comments.create(author=self.fan, content="raw")
+        Post.objects.filter(pk=self.post.pk).update(likes_count=7)
+        call_command("reconcile_counters", stdout=open("/dev/null", "w"))
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.comments_count, self.post.likes_count), (1, 0))
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class LikeToggleTests(APITestCase):
+    """Single-statement like/unlike and the offline batch endpoint."""
+
+    def setUp(self):
+        self.author = User.objects.create_user(username="author", password="pass1234")
+        self.fan = User.objects.create_user(username="fan", password="pass1234")
+        self.post = Post.objects.create(author=self.author, title="T", content="x")
+        self.other = Post.objects.create(author=self.author, title="U", content="y")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.fan)
+
+    def test_like_is_idempotent_and_returns_count(self):
+        res = self.client.post(f"/api/posts/{self.post.id}/like/")
+        self.assertEqual((res.status_code, res.data["likes_count"]), (201, 1))
+        # double-tap: the INSERT ... ON CONFLICT DO NOTHING, then a read of the counter
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.post(f"/api/posts/{self.post.id}/like/")
+        statements = [q["sql"] for q in ctx.captured_queries if "SAVEPOINT" not in q["sql"]]
+        self.assertEqual(len(statements), 2)
+        self.assertEqual((res.status_code, res.data["likes_count"]), (200, 1))
+        self.assertEqual(Like.objects.count(), 1)
+
+        res = self.client.post(f"/api/posts/{self.post.id}/unlike/")
+        self.assertEqual(res.data["likes_count"], 0)
+
+    def test_missing_post_is_404(self):
+        self.assertEqual(self.client.post("/api/posts/9999/like/").status_code, 404)
+        self.assertEqual(self.client.post("/api/posts/9999/unlike/").status_code, 404)
+
+    def test_offline_batch_last_action_wins(self):
+        Like.objects.create(user=self.fan, post=self.other)
+        Post.objects.filter(pk=self.other.pk).update(likes_count=1)
+        actions = [
+            {"post": self.post.id, "action": "like"},
+            {"post": self.other.id, "action": "unlike"},
+            {"post": self.other.id, "action": "like"},
+            {"post": 9999, "action": "like"},
+        ]
+        res = self.client.post("/api/likes/batch/", {"actions": actions}, format="json")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data["missing"], [9999])
+        by_post = {r["post"]: (r["liked"], r["likes_count"]) for r in res.data["results"]}
+        self.assertEqual(by_post, {self.post.id: (True, 1), self.other.id: (True, 1)})
+        self.assertEqual(Like.objects.filter(user=self.fan).count(), 2)
+
+    def test_batch_notifies_every_author_in_one_write(self):
+        from notifications.models import Notification
+
+        authors = [User.objects.create_user(username=f"writer{i}", password="pass1234") for i in range(6)]
+        posts = [Post.objects.create(author=a, title="T", content="x") for a in authors]
+        actions = [{"post": p.id, "action": "like"} for p in posts]
+        # the like-batch budget is constant, so a write per author would overshoot it
+        res = self.client.post("/api/likes/batch/", {"actions": actions}, format="json")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(Notification.objects.filter(verb="liked your post", actor=self.fan).count(), 6)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class BulkIngestTests(APITestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username="author", password="pass1234")
+        self.reader = User.objects.create_user(username="reader", password="pass1234")
+        follow(self.reader, self.author)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.author)
+
+    def test_bulk_endpoint_reports_invalid_rows(self):
+        rows = [{"title": f"T{i}", "content": "x"} for i in range(3)] + [{"title": "no content"}]
+        res = self.client.post("/api/posts/bulk/", rows, format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual((res.data["created"], res.data["invalid"]), (3, 1))
+        self.assertEqual(res.data["errors"][0]["row"], 4)
+        # bulk rows are fanned out like single creates
+        self.assertEqual(FeedEntry.objects.filter(owner=self.reader).count(), 3)
+
+    def test_import_command_streams_ndjson_and_csv(self):
+        import gzip
+        import json
+        import os
+        import tempfile
+        from django.core.management import call_command
+
+        with tempfile.TemporaryDirectory() as tmp:
+            ndjson = os.path.join(tmp, "posts.ndjson.gz")
+            with gzip.open(ndjson, "wt") as fh:
+                for i in range(5):
+                    fh.write(json.dumps({"title": f"N{i}", "content": "x", "author": "author"}) + "\n")
+                fh.write("{broken\n")
+                fh.write(json.dumps({"title": "who", "content": "x", "author": "ghost"}) + "\n")
+            csv_path = os.path.join(tmp, "posts.csv")
+            with open(csv_path, "w") as fh:
+                fh.write(f"title,content,author\nC1,x,{self.author.pk}\n")
+
+            out = open(os.devnull, "w")
+            call_command("import_posts", ndjson, "--batch-size", "2", stdout=out, stderr=out)
+            call_command("import_posts", csv_path, stdout=out, stderr=out)
+
+        self.assertEqual(Post.objects.filter(title__startswith="N").count(), 5)
+        self.assertTrue(Post.objects.filter(title="C1", author=self.author).exists())
+        self.assertFalse(Post.objects.filter(title="who").exists())
+
+    def test_numeric_author_is_a_username_before_an_id(self):
+        from unittest import mock
+        from .ingest import ingest
+
+        numeric = User.objects.create_user(username=str(self.author.pk), password="pass1234")
+        report = ingest([
+            {"title": "by-name", "content": "x", "author": str(self.author.pk)},
+            {"title": "by-id", "content": "x", "author_id": self.author.pk},
+        ])
+        self.assertEqual(report.created, 2)
+        self.assertEqual(Post.objects.get(title="by-name").author, numeric)
+        self.assertEqual(Post.objects.get(title="by-id").author, self.author)
+
+        # a backend that returns no pks from bulk_create is reported, not silently dropped
+        with mock.patch("posts.ingest.Post.objects.bulk_create", side_effect=lambda posts: posts):
+            with self.assertLogs("posts.ingest", "WARNING"):
+                report = ingest([{"title": "no-pk", "content": "x"}], author=self.author)
+        self.assertEqual(report.as_dict()["fanout_skipped"], 1)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class SearchTests(APITestCase):
+    """Full-text ?search= on /api/posts/: index stays in sync, prefix match, relevance order."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="writer", password="pass1234")
+        self.weak = Post.objects.create(author=self.user, title="Weekly notes", content="a little django")
+        self.strong = Post.objects.create(author=self.user, title="Django tips", content="django django")
+        Post.objects.create(author=self.user, title="Gardening", content="tomatoes")
+
+    def search_ids(self, q, extra=""):
+        res = self.client.get(f"/api/posts/?search={q}{extra}")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [p["id"] for p in res.data["results"]]
+
+    def test_prefix_match_ranked_by_relevance(self):
+        self.assertEqual(self.search_ids("djan"), [self.strong.id, self.weak.id])
+        self.assertEqual(self.search_ids("djan", "&ordering=created_at"), [self.weak.id, self.strong.id])
+        self.assertEqual(self.search_ids("django tomatoes"), [])
+
+    def test_index_follows_updates_deletes_and_bulk_create(self):
+        self.strong.content = "nothing here"
+        self.strong.title = "Renamed"
+        self.strong.save()
+        self.weak.delete()
+        self.assertEqual(self.search_ids("django"), [])
+        self.assertEqual(self.search_ids("renamed"), [self.strong.id])
+
+        Post.objects.bulk_create([Post(author=self.user, title="Bulk", content="zebra")])
+        self.assertEqual(len(self.search_ids("zeb")), 1)
+
+    def test_punctuation_only_query_is_ignored(self):
+        self.assertEqual(len(self.search_ids("%22*()")), 3)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ConditionalGetTests(APITestCase):
+    """ETag / Last-Modified on post and comment resources; 304s skip serialization."""
+
+    def setUp(self):
+        self.author = User.objects.create_user(username="author", password="pass1234")
+        self.fan = User.objects.create_user(username="fan", password="pass1234")
+        self.post = Post.objects.create(author=self.author, title="T", content="x")
+        self.fan_client = APIClient()
+        self.fan_client.force_authenticate(user=self.fan)
+
+    def test_list_revalidates_without_serializing(self):
+        res = self.client.get("/api/posts/")
+        etag = res["ETag"]
+        self.assertIn("Last-Modified", res)
+        with self.assertNumQueries(2):  # COUNT(*) and the page
+            res = self.client.get("/api/posts/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # a like only moves the counter, not updated_at
+        self.fan_client.post(f"/api/posts/{self.post.id}/like/")
+        res = self.client.get("/api/posts/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+        # different query string, different representation
+        self.assertNotEqual(self.client.get("/api/posts/?page_size=1")["ETag"], res["ETag"])
+
+    def test_changes_that_cancel_out_still_change_the_etag(self):
+        other = Post.objects.create(author=self.author, title="U", content="y")
+        self.fan_client.post(f"/api/posts/{other.id}/like/")
+        comment = self.fan_client.post("/api/comments/", {"post": other.id, "content": "hi"}, format="json").data
+        etag = self.client.get("/api/posts/")["ETag"]
+
+        # totals stay the same (one like, one comment) but move between posts
+        self.fan_client.post(f"/api/posts/{other.id}/unlike/")
+        self.fan_client.post(f"/api/posts/{self.post.id}/like/")
+        res = self.client.get("/api/posts/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        etag = res["ETag"]
+        self.fan_client.delete(f"/api/comments/{comment['id']}/")
+        self.fan_client.post("/api/comments/", {"post": self.post.id, "content": "moved"}, format="json")
+        self.assertEqual(self.client.get("/api/posts/", HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    def test_cursor_page_validators_come_from_the_page(self):
+        url = "/api/posts/?cursor=&page_size=1"
+        etag = self.client.get(url)["ETag"]
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        # only the page query: no aggregate over the whole table
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertNotIn("MAX(", ctx.captured_queries[0]["sql"])
+
+        self.fan_client.post(f"/api/posts/{self.post.id}/like/")
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    def test_detail_etag_tracks_edits(self):
+        url = f"/api/posts/{self.post.id}/"
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        Post.objects.filter(pk=self.post.pk).update(comments_count=4)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_comments_honour_if_modified_since(self):
+        comment = self.post.comments.create(author=self.fan, content="hi")
+        res = self.client.get(f"/api/comments/{comment.id}/")
+        since = res["Last-Modified"]
+        self.assertEqual(self.client.get("/api/comments/", HTTP_IF_MODIFIED_SINCE=since).status_code, 304)
+        self.post.comments.create(author=self.fan, content="later")
+        self.assertEqual(self.client.get("/api/comments/", HTTP_IF_NONE_MATCH=res["ETag"]).status_code, 200)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class CommentThreadTests(APITestCase):
+    """Materialized-path threads: thread order, subtree reads, nested keyset endpoint."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="talker", password="pass1234")
+        self.post = Post.objects.create(author=self.user, title="T", content="x")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def reply(self, content, parent=None):
+        payload = {"post": self.post.id, "content": content}
+        if parent is not None:
+            payload["parent"] = parent
+        res = self.client.post("/api/comments/", payload, format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED, res.data)
+        return res.data["id"]
+
+    def test_thread_is_depth_first_and_pages_by_cursor(self):
+        a = self.reply("a")
+        b = self.reply("b")
+        a1 = self.reply("a1", parent=a)
+        a1x = self.reply("a1x", parent=a1)
+        a2 = self.reply("a2", parent=a)
+
+        res = self.client.get(f"/api/posts/{self.post.id}/comments/?cursor=&page_size=3")
+        self.assertEqual([c["id"] for c in res.data["results"]], [a, a1, a1x])
+        self.assertEqual([c["depth"] for c in res.data["results"]], [0, 1, 2])
+        res = self.client.get(res.data["next"])
+        self.assertEqual([c["id"] for c in res.data["results"]], [a2, b])
+
+        res = self.client.get(f"/api/posts/{self.post.id}/comments/?max_depth=0")
+        self.assertEqual([c["id"] for c in res.data["results"]], [a, b])
+
+        with self.assertNumQueries(2):  # the comment, then one range scan
+            res = self.client.get(f"/api/comments/{a}/replies/")
+        self.assertEqual([c["id"] for c in res.data["results"]], [a1, a1x, a2])
+
+    def test_reply_must_stay_on_its_post(self):
+        other = Post.objects.create(author=self.user, title="O", content="y")
+        parent = self.reply("a")
+        res = self.client.post("/api/comments/", {"post": other.id, "parent": parent, "content": "x"}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(self.client.get(f"/api/comments/?post={other.id}").data["results"]), 0)
+
+    def test_deleting_a_comment_removes_its_subtree_from_the_count(self):
+        root = parent = self.reply("a")
+        for depth in range(5):  # deeper than the comment-detail budget if deleted level by level
+            parent = self.reply(f"a{depth}", parent=parent)
+        self.reply("b")
+        self.assertEqual(self.client.delete(f"/api/comments/{root}/").status_code, status.HTTP_204_NO_CONTENT)
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.comments_count, self.post.comments.count()), (1, 1))
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, POST_RESPONSE_CACHE={"ENABLED": True, "TTL": 30, "WAIT": 0})
+class ResponseCacheTests(APITestCase):
+    """Anonymous post responses are cached per normalized query and dropped on writes."""
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.author = User.objects.create_user(username="author", password="pass1234")
+        self.post = Post.objects.create(author=self.author, title="T", content="x")
+        self.fan = APIClient()
+        self.fan.force_authenticate(user=User.objects.create_user(username="fan", password="pass1234"))
+
+    def test_hit_skips_the_database_and_query_order_is_normalized(self):
+        self.assertEqual(self.client.get("/api/posts/?page=1&ordering=title")["X-Cache"], "MISS")
+        with self.assertNumQueries(0):
+            res = self.client.get("/api/posts/?ordering=title&page=1")
+        self.assertEqual((res.status_code, res["X-Cache"]), (200, "HIT"))
+        self.assertEqual(res.json()["results"][0]["id"], self.post.id)
+        res = self.client.get("/api/posts/?ordering=title&page=1", HTTP_IF_NONE_MATCH=res["ETag"])
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_writes_invalidate(self):
+        url = f"/api/posts/{self.post.id}/"
+        self.client.get(url)
+        self.fan.post(f"/api/posts/{self.post.id}/like/")  # raw SQL path
+        res = self.client.get(url)
+        self.assertEqual((res["X-Cache"], res.json()["likes_count"]), ("MISS", 1))
+
+        self.fan.post("/api/comments/", {"post": self.post.id, "content": "hi"}, format="json")
+        self.assertEqual(self.client.get(url).json()["comments_count"], 1)
+
+    def test_comment_refreshes_cached_list_pages(self):
+        self.assertEqual(self.client.get("/api/posts/")["X-Cache"], "MISS")
+        self.fan.post("/api/comments/", {"post": self.post.id, "content": "hi"}, format="json")
+        res = self.client.get("/api/posts/")
+        self.assertEqual((res["X-Cache"], res.json()["results"][0]["comments_count"]), ("MISS", 1))
+
+    def test_counter_writes_only_drop_the_posts_they_touch(self):
+        other = Post.objects.create(author=self.author, title="U", content="y")
+        urls = ["/api/posts/", f"/api/posts/{self.post.id}/", f"/api/posts/{other.id}/"]
+        for url in urls:
+            self.client.get(url)
+        self.fan.post(f"/api/posts/{self.post.id}/like/")
+        self.fan.post("/api/comments/", {"post": self.post.id, "content": "hi"}, format="json")
+        self.author.save(update_fields=["last_login"])
+        # list pages show every post's counters; the other post's detail is untouched
+        self.assertEqual([self.client.get(url)["X-Cache"] for url in urls], ["MISS", "MISS", "HIT"])
+
+        self.author.username = "renamed"
+        self.author.save()
+        self.assertEqual(self.client.get("/api/posts/")["X-Cache"], "MISS")
+
+    def test_stale_entry_served_while_another_worker_recomputes(self):
+        from django.core.cache import cache
+        from .response_cache import cache_key, serve
+
+        self.client.get("/api/posts/")
+        request = self.client.get("/api/posts/").wsgi_request
+        key = cache_key(request)
+        entry = cache.get(key)
+        entry["fresh_until"] = 0
+        cache.set(key, entry)
+        cache.add(key + ":lock", 1)  # someone else is recomputing
+
+        res = serve(request, lambda: self.fail("must not recompute"))
+        self.assertEqual(res["X-Cache"], "STALE")
+
+    def test_authenticated_requests_bypass_cache(self):
+        from rest_framework.authtoken.models import Token
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=self.author).key}")
+        self.assertNotIn("X-Cache", client.get("/api/posts/"))
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, TRENDING={"HALF_LIFE_HOURS": 6, "MIN_SCORE": 0.05, "SAFETY_LAG": 0})
+class TrendingTests(APITestCase):
+    """Incremental hot ranking: watermark-driven updates, decay, ?ordering=hot and /trending/."""
+
+    def setUp(self):
+        self.author = User.objects.create_user(username="author", password="pass1234")
+        self.fans = [User.objects.create_user(username=f"fan{i}", password="pass1234") for i in range(3)]
+        self.quiet = Post.objects.create(author=self.author, title="quiet", content="x")
+        self.busy = Post.objects.create(author=self.author, title="busy", content="x")
+        self.warm = Post.objects.create(author=self.author, title="warm", content="x")
+
+    def test_ranking_is_incremental(self):
+        from .models import TrendingPost, ActivityWatermark
+        from .trending import update_trending
+
+        for fan in self.fans:
+            Like.objects.create(user=fan, post=self.busy)
+        Like.objects.create(user=self.fans[0], post=self.warm)
+        stats = update_trending()
+        self.assertEqual((stats["events"], stats["posts"]), (4, 2))
+
+        # nothing new: no activity rows are read again
+        self.assertEqual(update_trending()["events"], 0)
+        self.assertEqual(ActivityWatermark.objects.get(name="like").last_id, Like.objects.latest("id").id)
+
+        self.warm.comments.create(author=self.fans[1], content="!")
+        self.warm.comments.create(author=self.fans[2], content="!")
+        self.assertEqual(update_trending()["events"], 2)
+        self.assertEqual(
+            list(TrendingPost.objects.values_list("post_id", flat=True)), [self.warm.id, self.busy.id]
+        )
+
+        res = self.client.get("/api/posts/?ordering=hot")
+        self.assertEqual([p["id"] for p in res.data["results"]], [self.warm.id, self.busy.id])
+        res = self.client.get("/api/posts/trending/")
+        self.assertEqual([p["id"] for p in res.data], [self.warm.id, self.busy.id])
+        self.assertAlmostEqual(res.data[0]["hot_score"], 7.0, places=2)
+
+    def test_old_activity_decays_out(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from .models import TrendingPost
+        from .trending import update_trending
+
+        Like.objects.create(user=self.fans[0], post=self.busy)
+        update_trending()
+        self.assertTrue(TrendingPost.objects.filter(post=self.busy).exists())
+        # 5 half-lives later 1.0 has decayed to ~0.03 < MIN_SCORE
+        stats = update_trending(now=timezone.now() + timedelta(hours=30))
+        self.assertEqual(stats["pruned"], 1)
+        self.assertEqual(self.client.get("/api/posts/?ordering=hot").data["results"], [])
+
+
+    def test_watermark_waits_for_rows_that_may_still_be_committing(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from .models import ActivityWatermark
+        from .trending import update_trending
+
+        settled = Like.objects.create(user=self.fans[0], post=self.busy)
+        Like.objects.filter(pk=settled.pk).update(created_at=timezone.now() - timedelta(minutes=5))
+        recent = Like.objects.create(user=self.fans[1], post=self.busy)
+        with override_settings(TRENDING={"SAFETY_LAG": 120}):
+            stats = update_trending()
+            self.assertEqual((stats["events"], stats["deferred"]), (1, 1))
+            self.assertEqual(ActivityWatermark.objects.get(name="like").last_id, settled.pk)
+            # a row committed late below `recent` would still be read by the next run
+            self.assertEqual(update_trending(now=timezone.now() + timedelta(minutes=3))["events"], 1)
+        self.assertEqual(ActivityWatermark.objects.get(name="like").last_id, recent.pk)
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class AsyncReadTests(APITestCase):
+    """/api/async/* return the same bodies as the sync cursor endpoints."""
+
+    def setUp(self):
+        from rest_framework.authtoken.models import Token
+
+        self.alice = User.objects.create_user(username="alice", password="pass1234")
+        self.bob = User.objects.create_user(username="bob", password="pass1234")
+        self.token = Token.objects.create(user=self.alice)
+        follow(self.alice, self.bob)
+        for i in range(3):
+            res = APIClient()
+            res.force_authenticate(user=self.bob)
+            res.post("/api/posts/", {"title": f"P{i}", "content": "x"}, format="json")
+        self.auth = {"Authorization": f"Token {self.token.key}"}
+
+    async def test_feed_matches_sync_cursor_mode(self):
+        res = await self.async_client.get("/api/async/feed/?page_size=2&count=1", headers=self.auth)
+        self.assertEqual(res.status_code, 200)
+        body = res.json()
+        self.assertEqual((body["count"], len(body["results"])), (3, 2))
+
+        sync = await self.sync_get("/api/feed/?cursor=&page_size=2&count=1")
+        # identical bytes apart from the endpoint in the `next` link
+        self.assertEqual(res.content.replace(b"/api/async/feed/", b"/api/feed/"), sync.content)
+
+        # follow `next` through the async endpoint
+        nxt = body["next"].replace("http://testserver", "")
+        res = await self.async_client.get(nxt, headers=self.auth)
+        self.assertEqual([p["title"] for p in res.json()["results"]], ["P0"])
+
+    async def test_feed_requires_token(self):
+        res = await self.async_client.get("/api/async/feed/")
+        self.assertEqual(res.status_code, 401)
+        self.assertEqual(res["WWW-Authenticate"], "Token")
+        res = await self.async_client.get("/api/async/feed/", headers={"Authorization": "Token nope"})
+        self.assertEqual(res.status_code, 401)
+
+    async def test_post_list_is_public(self):
+        import asyncio
+
+        responses = await asyncio.gather(*[self.async_client.get("/api/async/posts/") for _ in range(5)])
+        self.assertEqual({r.status_code for r in responses}, {200})
+        self.assertEqual(len({r.content for r in responses}), 1)
+        self.assertEqual([p["title"] for p in responses[0].json()["results"]], ["P2", "P1", "P0"])
+
+    async def sync_get(self, url):
+        from asgiref.sync import sync_to_async
+
+        return await sync_to_async(self.client.get)(url, headers=self.auth)
+
+
+class ProjectionTests(APITestCase):
+    """posts.projections renders values() rows exactly like PostSerializer."""
+
+    def setUp(self):
+        author = User.objects.create_user(username="zoë", password="pass1234")
+        Post.objects.create(author=author, title="Ünïcode ✓", content='quotes " and \\ slashes', likes_count=3)
+        Post.objects.create(author=author, title="Plain", content="x", comments_count=2)
+
+    def render_both(self):
+        from rest_framework.renderers import JSONRenderer
+        from .serializers import PostSerializer, PostSummarySerializer
+
+        posts = Post.objects.select_related("author").order_by("-id")
+        rows = PostSummarySerializer.project(Post.objects.order_by("-id"))
+        return (
+            JSONRenderer().render(PostSerializer(posts, many=True).data),
+            JSONRenderer().render(PostSummarySerializer(rows, many=True).data),
+        )
+
+    def test_output_is_byte_identical(self):
+        from django.utils import timezone
+
+        slow, fast = self.render_both()
+        self.assertEqual(slow, fast)
+        with timezone.override("Asia/Kolkata"):  # offsets other than Z
+            slow, fast = self.render_both()
+        self.assertEqual(slow, fast)
+        self.assertIn(b"+05:30", fast)
+
+    def test_unsupported_fields_fail_at_compile_time(self):
+        from django.core.exceptions import ImproperlyConfigured
+        from rest_framework import serializers
+        from .projections import compile_serializer
+
+        class WithMethod(serializers.ModelSerializer):
+            shout = serializers.SerializerMethodField()
+
+            class Meta:
+                model = Post
+                fields = ("id", "shout")
+
+        with self.assertRaises(ImproperlyConfigured):
+            compile_serializer(WithMethod).compile()
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class LikeArchiveTests(APITestCase):
+    """Likes on old posts moved to ArchivedLike still behave like likes."""
+
+    def setUp(self):
+        from datetime import timedelta
+        from django.utils import timezone
+
+        self.author = User.objects.create_user(username="author", password="pass1234")
+        self.fan = User.objects.create_user(username="fan", password="pass1234")
+        self.old = Post.objects.create(author=self.author, title="Old", content="x")
+        self.new = Post.objects.create(author=self.author, title="New", content="y")
+        Post.objects.filter(pk=self.old.pk).update(created_at=timezone.now() - timedelta(days=800))
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.fan)
+        self.client.post(f"/api/posts/{self.old.id}/like/")
+        self.client.post(f"/api/posts/{self.new.id}/like/")
+
+    def test_archived_like_blocks_relike_and_is_removed_by_unlike(self):
+        from django.core.management import call_command
+        from .archive import archive_likes
+        from .models import ArchivedLike
+
+        self.assertEqual(archive_likes(batch_size=1), 1)
+        self.assertEqual(list(Like.objects.values_list("post_id", flat=True)), [self.new.id])
+        self.assertEqual(ArchivedLike.objects.get().post_id, self.old.id)
+
+        res = self.client.post(f"/api/posts/{self.old.id}/like/")
+        self.assertEqual((res.status_code, res.data["likes_count"]), (200, 1))
+        call_command("reconcile_counters", stdout=open("/dev/null", "w"))
+        self.old.refresh_from_db()
+        self.assertEqual(self.old.likes_count, 1)
+
+        res = self.client.post(f"/api/posts/{self.old.id}/unlike/")
+        self.assertEqual(res.data["likes_count"], 0)
+        self.assertFalse(ArchivedLike.objects.exists())
+
+    def test_command_writes_ndjson_copy(self):
+        import gzip
+        import json
+        import os
+        import tempfile
+        from io import StringIO
+        from django.core.management import call_command
+
+        with tempfile.TemporaryDirectory() as tmp:
+            out = StringIO()
+            call_command("archive_old_rows", "--only", "likes", "--dump", tmp, stdout=out)
+            self.assertIn("likes: 1 rows archived", out.getvalue())
+            (name,) = os.listdir(tmp)
+            with gzip.open(os.path.join(tmp, name), "rt") as fh:
+                rows = [json.loads(line) for line in fh]
+        self.assertEqual([(r["post_id"], r["user_id"]) for r in rows], [(self.old.id, self.fan.id)])
@@ -0,0 +1,181 @@
+"""
+Trending ("hot") posts from recent Like and Comment activity.
+
+Each event contributes weight * 2 ** -(age / HALF_LIFE). Because every
+post decays at the same rate, ranking by the decayed sum is the same as
+ranking by
+
+    score = log(sum(weight * exp(LAMBDA * (event_time - EPOCH))))
+
+which never changes once written. An update therefore only folds in new
+events: rows with id > the per-table ActivityWatermark are read in id
+order, `BATCH_SIZE` at a time, merged into TrendingPost with log-sum-exp,
+and the watermark advances in the same transaction. Old likes are never
+rescanned.
+
+Ids are allocated at INSERT but become visible at COMMIT, so a row can
+appear below a watermark that has already moved past it. A run therefore
+stops at the first row younger than SAFETY_LAG seconds and leaves it, and
+everything after it, for a later run. A row below a settled row's id was
+inserted before it, so it is missed only if its transaction stays open
+longer than SAFETY_LAG. Posts whose decayed score fell below MIN_SCORE are deleted with
+one indexed range delete.
+
+Unlikes and deleted comments are not subtracted; their weight simply
+decays away.
+
+settings.TRENDING:
+    HALF_LIFE_HOURS  time for an event's weight to halve
+    LIKE_WEIGHT      weight of one like
+    COMMENT_WEIGHT   weight of one comment
+    MIN_SCORE        decayed score below which a post leaves the table
+    BATCH_SIZE       activity rows read per transaction
+    SAFETY_LAG       seconds an activity row must age before the watermark passes it
+"""
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.filters import OrderingFilter
+
+from .models import Post, Comment, Like, TrendingPost, ActivityWatermark
+from .response_cache import bump_version
+
+DEFAULTS = {
+    "HALF_LIFE_HOURS": 6,
+    "LIKE_WEIGHT": 1.0,
+    "COMMENT_WEIGHT": 3.0,
+    "MIN_SCORE": 0.05,
+    "BATCH_SIZE": 5000,
+    "SAFETY_LAG": 120,
+}
+
+EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc).timestamp()
+
+
+def _conf(name):
+    return getattr(settings, "TRENDING", {}).get(name, DEFAULTS[name])
+
+
+def decay_rate():
+    return math.log(2) / (_conf("HALF_LIFE_HOURS") * 3600)
+
+
+def log_weight(weight, when):
+    return math.log(weight) + decay_rate() * (when.timestamp() - EPOCH)
+
+
+def logsumexp(values):
+    top = max(values)
+    return top + math.log(sum(math.exp(v - top) for v in values))
+
+
+def floor_score(now=None):
+    """Stored scores below this have decayed under MIN_SCORE at `now`."""
+    now = now or timezone.now()
+    return math.log(_conf("MIN_SCORE")) + decay_rate() * (now.timestamp() - EPOCH)
+
+
+def current_score(score, now=None):
+    """Turn a stored log-space score into the decayed activity score at `now`."""
+    now = now or timezone.now()
+    return math.exp(score - decay_rate() * (now.timestamp() - EPOCH))
+
+
+def _sources():
+    return (
+        ("like", Like, _conf("LIKE_WEIGHT")),
+        ("comment", Comment, _conf("COMMENT_WEIGHT")),
+    )
+
+
+def _merge(contributions):
+    """contributions: {post_id: [log weights]} -> rows written."""
+    live = set(Post.objects.filter(pk__in=list(contributions)).values_list("id", flat=True))
+    existing = {
+        row.post_id: row for row in TrendingPost.objects.filter(post_id__in=live)
+    }
+    to_update, to_create = [], []
+    for post_id in live:
+        values = contributions[post_id]
+        row = existing.get(post_id)
+        if row is not None:
+            row.score = logsumexp([row.score, *values])
+            to_update.append(row)
+        else:
+            to_create.append(TrendingPost(post_id=post_id, score=logsumexp(values)))
+    if to_update:
+        TrendingPost.objects.bulk_update(to_update, ["score", "updated_at"])
+    if to_create:
+        TrendingPost.objects.bulk_create(to_create)
+    return len(to_update) + len(to_create)
+
+
+def update_trending(batch_size=None, now=None):
+    """Fold activity newer than the watermarks into TrendingPost. Returns a stats dict."""
+    batch_size = batch_size or _conf("BATCH_SIZE")
+    now = now or timezone.now()
+    floor = floor_score(now)
+    settled = now - timedelta(seconds=_conf("SAFETY_LAG"))
+    stats = {"events": 0, "skipped": 0, "posts": 0, "pruned": 0, "deferred": 0}
+
+    for name, model, weight in _sources():
+        mark, _ = ActivityWatermark.objects.get_or_create(name=name)
+        fresh = None
+        while fresh is None:
+            rows = list(
+                model.objects.filter(pk__gt=mark.last_id).order_by("pk")
+                .values_list("pk", "post_id", "created_at")[:batch_size]
+            )
+            fresh = next((i for i, row in enumerate(rows) if row[2] > settled), None)
+            if fresh is not None:
+                stats["deferred"] += 1  # this table waits for the next run from here
+                rows = rows[:fresh]
+            if not rows:
+                break
+            contributions = defaultdict(list)
+            for _, post_id, created_at in rows:
+                value = log_weight(weight, created_at)
+                if value < floor:
+                    stats["skipped"] += 1  # already too old to matter (e.g. first run)
+                    continue
+                contributions[post_id].append(value)
+            with transaction.atomic():
+                if contributions:
+                    stats["posts"] += _merge(contributions)
+                mark.last_id = rows[-1][0]
+                mark.save(update_fields=["last_id", "updated_at"])
+            stats["events"] += len(rows)
+
+    stats["pruned"], _ = TrendingPost.objects.filter(score__lt=floor).delete()
+    if stats["posts"] or stats["pruned"]:
+        bump_version()
+    return stats
+
+
+def generation():
+    """Changes whenever update_trending() folds in new activity (for ETags)."""
+    return tuple(ActivityWatermark.objects.order_by("name").values_list("last_id", flat=True))
+
+
+def trending_posts(limit=20):
+    """[(post, current score)] hottest first; one indexed read."""
+    now = timezone.now()
+    rows = TrendingPost.objects.select_related("post__author").order_by("-score")[:limit]
+    return [(row.post, current_score(row.score, now)) for row in rows]
+
+
+class HotOrderingFilter(OrderingFilter):
+    """OrderingFilter that also accepts `?ordering=hot` (trending posts only, hottest first)."""
+    hot_term = "hot"
+
+    def is_hot(self, request):
+        return request.query_params.get(self.ordering_param, "").strip() == self.hot_term
+
+    def filter_queryset(self, request, queryset, view):
+        if self.is_hot(request):
+            return queryset.filter(trending__isnull=False).order_by("-trending__score", "-id")
+        return super().filter_queryset(request, queryset, view)
@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import PostViewSet, CommentViewSet, FeedView, LikePostView, UnlikePostView
+from .views import PostViewSet, CommentViewSet, FeedView, LikePostView, UnlikePostView, LikeBatchView
+from .async_views import AsyncFeedView, AsyncPostListView
 
 router = DefaultRouter()
 router.register(r"posts", PostViewSet, basename="post")
@@ -12,4 +13,8 @@ urlpatterns = [
     
     path("posts/<int:pk>/like/", LikePostView.as_view(), name="post-like"),
     path("posts/<int:pk>/unlike/", UnlikePostView.as_view(), name="post-unlike"),
+    path("likes/batch/", LikeBatchView.as_view(), name="like-batch"),
+
+    path("async/feed/", AsyncFeedView.as_view(), name="feed-async"),
+    path("async/posts/", AsyncPostListView.as_view(), name="post-list-async"),
 ]
@@ -2,6 +2,9 @@
 ASGI config for social_media_api project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it with an ASGI server (e.g. ``uvicorn social_media_api.asgi:application``)
+to get the async read endpoints (/api/async/feed/, /api/async/posts/,
+/async/users/) without a thread per waiting request.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -0,0 +1,59 @@
+"""
+Base class for async read endpoints.
+
+DRF's APIView is synchronous, so under ASGI every DRF request holds a
+worker thread while it waits on the database. AsyncReadView is a plain
+Django async view with just enough of DRF around it for read endpoints:
+
+  - token auth through CachedTokenAuthentication.aauthenticate()
+    (a warm token is answered without leaving the event loop)
+  - `self.params` is a DRF Request wrapper, so pagination classes and
+    `query_params` work unchanged
+  - APIException subclasses become the same {"detail": ...} bodies
+  - respond() renders like DRF's JSONRenderer (compact, UTF-8)
+
+Querysets are evaluated with the async ORM (aiterator, acount, afirst) and
+serialized from the rows already fetched, so serializers must not trigger
+lazy loads (select_related what they render).
+"""
+from django.contrib.auth.models import AnonymousUser
+from django.http import JsonResponse
+from django.views import View
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.utils.encoders import JSONEncoder
+
+from accounts.authentication import CachedTokenAuthentication
+
+
+class AsyncReadView(View):
+    http_method_names = ["get", "head", "options"]
+    authentication_class = CachedTokenAuthentication
+    require_auth = True
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            authenticator = self.authentication_class()
+            result = await authenticator.aauthenticate(request)
+            if result is None and self.require_auth:
+                raise exceptions.NotAuthenticated()
+            request.user, request.auth = result or (AnonymousUser(), None)
+            self.params = Request(request)
+            # every handler (incl. Django's options/405) is a coroutine on an async view
+            return await super().dispatch(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return self.error_response(exc)
+
+    def error_response(self, exc):
+        response = self.respond({"detail": exc.detail}, status=exc.status_code)
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            response.status_code = 401
+            response["WWW-Authenticate"] = self.authentication_class().authenticate_header(None)
+        return response
+
+    @staticmethod
+    def respond(data, status=200):
+        return JsonResponse(
+            data, status=status, safe=False, encoder=JSONEncoder,
+            json_dumps_params={"ensure_ascii": False, "separators": (",", ":")},
+        )
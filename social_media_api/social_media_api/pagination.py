@@ -0,0 +1,197 @@
+"""
+Shared pagination classes.
+
+KeysetPagination pages on a composite sort key (e.g. created_at, id) instead of
+OFFSET, so deep pages cost the same as the first one and new rows inserted
+while a client scrolls do not shift or duplicate results.
+
+PageOrKeysetPagination keeps the classic `?page=N` behaviour and switches to
+keyset mode as soon as a `cursor` parameter is present (`?cursor=` for the
+first page). Views pick their sort key with `keyset_ordering`.
+
+Async views call KeysetPagination.apaginate_queryset() and render
+get_paginated_data() themselves.
+"""
+import base64
+import json
+from collections import OrderedDict
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+TRUTHY = ("1", "true", "yes")
+
+
+class KeysetPagination(BasePagination):
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    invalid_cursor_message = "Invalid cursor"
+
+    # Must end in a unique field so every row has a distinct key.
+    ordering = ("-created_at", "-id")
+
+    def get_ordering(self, view):
+        return tuple(getattr(view, "keyset_ordering", None) or self.ordering)
+
+    def get_page_size(self, request):
+        size = request.query_params.get(self.page_size_query_param)
+        try:
+            size = int(size)
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    # --- cursor encoding -------------------------------------------------
+
+    def encode_cursor(self, keys, reverse=False):
+        payload = {"k": keys}
+        if reverse:
+            payload["r"] = 1
+        raw = json.dumps(payload, separators=(",", ":"), default=str)
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, model, fields, cursor):
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            keys = payload["k"]
+            if len(keys) != len(fields):
+                raise ValueError
+            values = [model._meta.get_field(f).to_python(v) for f, v in zip(fields, keys)]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+        return values, bool(payload.get("r"))
+
+    # --- paging ----------------------------------------------------------
+
+    @staticmethod
+    def _split(term):
+        return (term[1:], True) if term.startswith("-") else (term, False)
+
+    def _after(self, fields, descending, values, reverse):
+        """Q for rows strictly after `values` in the (possibly reversed) order."""
+        q = None
+        for field, desc, value in reversed(list(zip(fields, descending, values))):
+            op = "lt" if desc != reverse else "gt"
+            strict = Q(**{f"{field}__{op}": value})
+            if q is None:
+                q = strict
+            else:
+                q = Q(**{f"{field}__{op}e": value}) & (strict | (Q(**{field: value}) & q))
+        return q
+
+    def _keys(self, obj, fields):
+        if isinstance(obj, dict):  # values() rows
+            return [obj[f] for f in fields]
+        return [getattr(obj, f) for f in fields]
+
+    def _start(self, request, view):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size_value = self.get_page_size(request)
+        self.count = None
+        terms = self.get_ordering(view)
+        return [self._split(t)[0] for t in terms], [self._split(t)[1] for t in terms]
+
+    def _wants_count(self, request):
+        return request.query_params.get(self.count_query_param, "").lower() in TRUTHY
+
+    def _window(self, queryset, fields, descending, cursor):
+        """The (unevaluated) page query: one row past the page tells whether there is more."""
+        reverse = False
+        if cursor:
+            values, reverse = self.decode_cursor(queryset.model, fields, cursor)
+            queryset = queryset.filter(self._after(fields, descending, values, reverse))
+        order = [("-" if d != reverse else "") + f for f, d in zip(fields, descending)]
+        return queryset.order_by(*order)[: self.page_size_value + 1], reverse
+
+    def _finish(self, rows, fields, cursor, reverse):
+        has_more = len(rows) > self.page_size_value
+        rows = rows[: self.page_size_value]
+        if reverse:
+            rows.reverse()
+
+        self.next_keys = self.prev_keys = None
+        if rows:
+            if reverse:
+                # walked backwards from a cursor: there is always a next page
+                self.next_keys = self._keys(rows[-1], fields)
+                if has_more:
+                    self.prev_keys = self._keys(rows[0], fields)
+            else:
+                if has_more:
+                    self.next_keys = self._keys(rows[-1], fields)
+                if cursor:
+                    self.prev_keys = self._keys(rows[0], fields)
+        return rows
+
+    def paginate_queryset(self, queryset, request, view=None):
+        fields, descending = self._start(request, view)
+        if self._wants_count(request):
+            self.count = queryset.count()
+        cursor = request.query_params.get(self.cursor_query_param) or ""
+        page, reverse = self._window(queryset, fields, descending, cursor)
+        return self._finish(list(page), fields, cursor, reverse)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset() for async views: the same queries, through the async ORM."""
+        fields, descending = self._start(request, view)
+        if self._wants_count(request):
+            self.count = await queryset.acount()
+        cursor = request.query_params.get(self.cursor_query_param) or ""
+        page, reverse = self._window(queryset, fields, descending, cursor)
+        return self._finish([row async for row in page], fields, cursor, reverse)
+
+    def get_next_link(self):
+        if self.next_keys is None:
+            return None
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, self.encode_cursor(self.next_keys)
+        )
+
+    def get_previous_link(self):
+        if self.prev_keys is None:
+            return None
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, self.encode_cursor(self.prev_keys, reverse=True)
+        )
+
+    def get_paginated_data(self, data):
+        body = OrderedDict()
+        if self.count is not None:
+            body["count"] = self.count
+        body["next"] = self.get_next_link()
+        body["previous"] = self.get_previous_link()
+        body["results"] = data
+        return body
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+
+class PageOrKeysetPagination(PageNumberPagination):
+    """`?page=N` by default; keyset mode when a `cursor` param is present."""
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.keyset_class.cursor_query_param in request.query_params:
+            self.keyset = self.keyset_class()
+            self.keyset.page_size = self.page_size
+            self.keyset.max_page_size = self.max_page_size
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -11,12 +11,15 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 import os
+import sys
 from pathlib import Path
 import dj_database_url
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+TESTING = len(sys.argv) > 1 and sys.argv[1] == "test"
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
@@ -44,12 +47,15 @@ INSTALLED_APPS = [
     'accounts',
     'posts',
     'notifications',
+    'instrumentation',
+    'benchmarks',
     "storages", 
 ]
 
 MIDDLEWARE = [
+    'instrumentation.middleware.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'social_media_api.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -101,6 +107,20 @@ else:
     }
 
 
+# Cache: per-process memory locally; point CACHE_BACKEND/CACHE_LOCATION at a
+# shared backend (file, redis, memcached) when running several workers.
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", "social-media-api"),
+    }
+}
+
+FOLLOW_GRAPH_CACHE = {
+    "LOCAL_TTL": 5,
+    "SHARED_TTL": 3600,
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -149,20 +169,159 @@ AUTH_USER_MODEL = "accounts.User"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "accounts.authentication.CachedTokenAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.AllowAny",
     ],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
+    # sliding-window counters in the default cache; views opt in with `throttle_scope`
+    "DEFAULT_THROTTLE_CLASSES": [
+        "social_media_api.throttling.SlidingWindowThrottle",
+    ],
+    "DEFAULT_THROTTLE_RATES": {
+        "login": os.getenv("THROTTLE_LOGIN", "10/min"),
+        "register": os.getenv("THROTTLE_REGISTER", "20/hour"),
+        "likes": os.getenv("THROTTLE_LIKES", "120/min"),
+        "comments": os.getenv("THROTTLE_COMMENTS", "30/min"),
+    },
+    # Trusted reverse proxies in front of the app. 0 keys anonymous throttles on
+    # REMOTE_ADDR; with None DRF would believe a client-supplied X-Forwarded-For.
+    "NUM_PROXIES": int(os.getenv("NUM_PROXIES", "0")),
+
+}
+
+# Notification delivery (see notifications/pipeline.py): "thread" batches
+# writes in a background worker; tests write synchronously.
+NOTIFICATIONS = {
+    "DELIVERY": os.getenv("NOTIFICATION_DELIVERY", "sync" if TESTING else "thread"),
+    "BATCH_SIZE": 500,
+    "FLUSH_INTERVAL": 0.5,
+    "COALESCE_WINDOW": 3600,
+}
+
+# Realtime push to GET /notifications/stream/ (see notifications/push.py)
+NOTIFICATION_PUSH = {
+    "BACKEND": os.getenv("NOTIFICATION_PUSH_BACKEND", "local"),  # local | socket | postgres
+    "BUFFER": 100,
+    "HEARTBEAT": 15,
+    "MAX_AGE": 300,
+}
+
+# Token -> user lookups (see accounts/authentication.py)
+TOKEN_AUTH_CACHE = {
+    "LOCAL_TTL": 5,  # bounds how long other workers honour a revoked token
+    "SHARED": True,
+    "SHARED_TTL": 300,
+}
 
+# Anonymous /api/posts/ responses (see posts/response_cache.py)
+POST_RESPONSE_CACHE = {
+    "ENABLED": not TESTING,
+    "TTL": 30,
+    "STALE_TTL": 60,
 }
 
+# Trending ranking (see posts/trending.py; refreshed by `manage.py update_trending`)
+TRENDING = {
+    "HALF_LIFE_HOURS": 6,
+    "LIKE_WEIGHT": 1.0,
+    "COMMENT_WEIGHT": 3.0,
+}
+
+# Retention (see notifications/archive.py, posts/archive.py; run `manage.py archive_old_rows`)
+ARCHIVE = {
+    "NOTIFICATIONS_AFTER_DAYS": 90,   # read notifications older than this
+    "LIKES_POST_AFTER_DAYS": 365,     # likes on posts older than this
+    "BATCH_SIZE": 1000,
+    "PAUSE": 0.0,                     # seconds between batches
+}
+
+# Per-request query/latency metrics and /metrics (see instrumentation/conf.py).
+# Budgets are per method where a URL takes writes (writes include SAVEPOINTs and
+# sync notification delivery under tests); reads are set to what the test suite
+# observes, and list budgets must not scale with page size.
+INSTRUMENTATION = {
+    "ENFORCE_BUDGETS": TESTING,
+    "METRICS_TOKEN": os.getenv("METRICS_TOKEN", ""),
+    # Ceilings by design, not today's counts: each is the sum of the statements
+    # the endpoint needs with cold caches (token auth +1, ContentType +1) and sync
+    # notification delivery, as under the test runner. Tests run inside a
+    # transaction, so every nested atomic() adds a SAVEPOINT/RELEASE pair (+2).
+    # None of them grows with page or batch size: an N+1 overshoots as soon as a
+    # test renders more than one row.
+    "QUERY_BUDGETS": {
+        # GET: auth + COUNT + page (author joined); POST: auth + INSERT + author's
+        # followers_count + follower ids + feed INSERT
+        "post-list": {"GET": 3, "*": 5},
+        # GET: auth + row; PATCH: + UPDATE; DELETE: auth + row + comments + their
+        # replies + 4 fast deletes (likes, archived likes, feed entries, trending) + comments + post
+        "post-detail": {"GET": 2, "*": 10},
+        "post-comments": 3,  # auth + post exists + thread page
+        "post-trending": 2,  # auth + ranked rows (author joined)
+        # GET: auth + COUNT + page; POST: auth + post + parent + savepoint(INSERT, path,
+        # comments_count) + post author + ContentType + notification SELECT + savepoint(write)
+        "comment-list": {"GET": 3, "*": 14},
+        # GET: auth + row; DELETE: auth + row + savepoint(subtree, its replies, DELETE,
+        # comments_count); PATCH needs 3
+        "comment-detail": {"GET": 2, "*": 8},
+        "comment-replies": 3,  # auth + parent + page
+        # auth + pulled author ids + feed entries + pulled authors' posts + 2 COUNTs (?count=1)
+        "feed": 6,
+        "feed-async": 6,
+        # auth + savepoint(INSERT, UPDATE .. RETURNING) + ContentType + notification
+        # SELECT + savepoint(write); an already-liked post reads its counts instead
+        "post-like": 10,
+        "post-unlike": 6,  # auth + savepoint(DELETE live, DELETE archived, UPDATE .. RETURNING)
+        # auth + savepoint(savepoint(like INSERT, UPDATE) + savepoint(2 DELETEs, UPDATE))
+        # + unchanged counts + ContentType + one notification batch (SELECT, UPDATE, INSERT)
+        "like-batch": 19,
+        "users-list": 4,  # auth + page + following ids + COUNT (?count=1)
+        "users-list-async": 4,
+        "post-list-async": 3,  # auth + page + COUNT (?count=1)
+        "follow-suggestions": 4,  # auth + following ids + suggestions + candidate users
+        # auth + target + savepoint(exists, savepoint(INSERT), counts) + followers_count
+        # + backfill posts + feed INSERT + ContentType + notification SELECT + savepoint(INSERT)
+        "follow-user": 17,
+        "unfollow-user": 7,  # auth + target + savepoint(DELETE, counts) + feed entries DELETE
+        # GET: auth + fresh row; PATCH: + UPDATE + token key (auth cache eviction)
+        "profile": {"GET": 2, "*": 4},
+        "login": 5,  # user + token, or a first token's savepoint(SELECT, INSERT)
+        "register": 5,  # username check + INSERT + token INSERT (signal) + token read + thumbnail
+        # auth + live page + archived page + one generic target query per type
+        # (Post, User) for each
+        "notification-list": 7,
+        "notification-unread-count": 2,  # auth + COUNT (then cached)
+        "notification-mark-read": 2,  # auth + UPDATE
+        "notification-stream": 3,  # auth + replay page + COUNT of what the replay left out
+        "notification-stream-ticket": 1,  # auth
+    },
+    "COLLECTORS": {
+        "notification_dispatcher": "notifications.pipeline.dispatcher.stats",
+        "notification_push": "notifications.push.stats",
+        "follow_graph_cache": "accounts.graph.graph.stats",
+        "token_auth_cache": "accounts.authentication.token_cache.stats",
+        "post_response_cache": "posts.response_cache.stats",
+        "media_pipeline": "accounts.media.stats",
+        "throttle": "social_media_api.throttling.stats",
+    },
+}
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Uploads above this size are streamed to a temp file instead of held in memory.
+FILE_UPLOAD_MAX_MEMORY_SIZE = 512 * 1024
+
+# Profile image thumbnails (see accounts/media.py)
+MEDIA_PIPELINE = {
+    "MODE": os.getenv("MEDIA_PIPELINE_MODE", "sync" if TESTING else "thread"),
+    "MAX_WORKERS": int(os.getenv("MEDIA_PIPELINE_WORKERS", "2")),
+    "SIZES": (64, 256),
+    "FORMATS": ("webp", "jpeg"),
+}
+
 SECURE_BROWSER_XSS_FILTER = True
 X_FRAME_OPTIONS = "DENY"
 SECURE_CONTENT_TYPE_NOSNIFF = True
@@ -0,0 +1,116 @@
+"""
+Rate limiting with a sliding-window counter in the shared cache.
+
+Views opt in with `throttle_scope` (rates in REST_FRAMEWORK
+["DEFAULT_THROTTLE_RATES"], e.g. "likes": "120/min") and may restrict it to
+some methods with `throttle_methods`. Clients are identified by user id
+when authenticated, otherwise by IP (REMOTE_ADDR, or the X-Forwarded-For
+entry REST_FRAMEWORK["NUM_PROXIES"] trusted proxies back).
+
+Each window of `duration` seconds has one integer counter,
+`throttle:<scope>:<ident>:<window>`. The request rate is estimated as
+
+    current_count + previous_count * (1 - elapsed fraction of current window)
+
+which approximates a true sliding window without storing timestamps. The
+current counter costs one cache.incr per request; the previous window's
+final count never changes, so each process reads it once per window and
+memoizes it. Rejected requests still count, so a client that keeps
+hammering stays limited.
+
+stats() reports checks and rejections per scope.
+"""
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+from django.core.cache import cache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+PREVIOUS_MEMO_SIZE = 10_000
+
+_stats = defaultdict(lambda: {"checked": 0, "rejected": 0})
+_previous = OrderedDict()  # counter key -> final count of that (closed) window
+_previous_lock = threading.Lock()
+
+
+def parse_rate(rate):
+    """"10/min" -> (10, 60); None -> (None, None)."""
+    if rate is None:
+        return None, None
+    num, period = rate.split("/")
+    return int(num), PERIODS[period.strip()[0]]
+
+
+def _incr(key, timeout):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        if cache.add(key, 1, timeout):
+            return 1
+        return cache.incr(key)  # lost the race to create it
+
+
+def _previous_count(key):
+    with _previous_lock:
+        if key in _previous:
+            return _previous[key]
+    count = cache.get(key) or 0
+    with _previous_lock:
+        _previous[key] = count
+        while len(_previous) > PREVIOUS_MEMO_SIZE:
+            _previous.popitem(last=False)
+    return count
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    scope_attr = "throttle_scope"
+
+    def get_rate(self, scope):
+        return api_settings.DEFAULT_THROTTLE_RATES.get(scope)
+
+    def get_ident_key(self, request):
+        if request.user and request.user.is_authenticated:
+            return f"user:{request.user.pk}"
+        return f"ip:{self.get_ident(request)}"
+
+    def allow_request(self, request, view):
+        scope = getattr(view, self.scope_attr, None)
+        methods = getattr(view, "throttle_methods", None)
+        if not scope or (methods is not None and request.method not in methods):
+            return True
+        self.limit, self.duration = parse_rate(self.get_rate(scope))
+        if self.limit is None:
+            return True
+
+        now = time.time()
+        window = int(now // self.duration)
+        self.elapsed = now / self.duration - window
+        base = f"throttle:{scope}:{self.get_ident_key(request)}"
+        current = _incr(f"{base}:{window}", self.duration * 2)
+        previous = _previous_count(f"{base}:{window - 1}")
+        self.estimate = current + previous * (1 - self.elapsed)
+
+        _stats[scope]["checked"] += 1
+        if self.estimate <= self.limit:
+            return True
+        _stats[scope]["rejected"] += 1
+        self.previous = previous
+        self.current = current
+        return False
+
+    def wait(self):
+        # when will current + previous * (1 - t) drop back to the limit?
+        if self.current > self.limit:
+            return (1 - self.elapsed) * self.duration
+        needed = 1 - (self.limit - self.current) / self.previous
+        return max(0.0, needed - self.elapsed) * self.duration
+
+
+def stats():
+    out = {}
+    for scope, s in _stats.items():
+        out[scope] = dict(s, rejection_rate=round(s["rejected"] / s["checked"], 4) if s["checked"] else None)
+    return out
@@ -24,6 +24,7 @@ urlpatterns = [
     path("", include("accounts.urls")),
     path("api/", include("posts.urls")),
     path("", include("notifications.urls")),
+    path("", include("instrumentation.urls")),
 ]
 
 if settings.DEBUG: